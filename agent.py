@@ -1,5 +1,17 @@
-from langchain_google_genai import ChatGoogleGenerativeAI
-from langchain_core.prompts import ChatPromptTemplate
+import asyncio
+
+from chat_context import estimate_tokens
+from rate_limiter import RateLimiter
+import instrumentation
+import llm_gateway
+import model_router
+
+NO_MATCH_REPLY = "I'm sorry, no information match your query!"
+
+# Chunk size and overlap, in estimated tokens.
+CHUNK_TOKENS = 2000
+CHUNK_OVERLAP_TOKENS = 100
+CHARS_PER_TOKEN = 4  # matches estimate_tokens
 
 template = (
     "You are a web scraper agent. you are tasked with answering questions and extracting specific "
@@ -13,16 +25,241 @@ template = (
     "The question: <<{query}>>"
 )
 
-model = ChatGoogleGenerativeAI(model="gemini-2.5-pro")
+reduce_template = (
+    "You are merging partial answers that were extracted from different parts of the same webpage. "
+    "The question: <<{query}>>\n\n"
+    "Partial answers:\n{answers}\n\n"
+    "Combine them into one answer to the question. Remove duplicates, keep every distinct piece of data, "
+    "and do not include any additional text, comments, or explanations."
+)
+
+# Replies that hedge instead of extracting; the chunk is then re-read by the strong tier.
+LOW_CONFIDENCE_MARKERS = ("not sure", "unclear", "cannot determine", "can't determine", "i think")
 
-def parse_with_gemini(chunks, query):
+def _build_chain(tier: str):
+    from langchain_core.prompts import ChatPromptTemplate
     prompt = ChatPromptTemplate.from_template(template)
-    chain = prompt | model
+    return prompt | model_router.chat_model(tier)
+
+def _build_reduce_chain(tier: str):
+    from langchain_core.prompts import ChatPromptTemplate
+    prompt = ChatPromptTemplate.from_template(reduce_template)
+    return prompt | model_router.chat_model(tier)
+
+def is_low_confidence(answer: str) -> bool:
+    text = (answer or "").strip().lower()
+    return not text or any(marker in text for marker in LOW_CONFIDENCE_MARKERS)
+
+def _routed_call(task: str, build, inputs: dict, **options):
+    """Sync extraction or reduce call on the tier `model_router` picks; returns the reply text."""
+    def attempt(tier):
+        chain = llm_gateway.get_chain((task, tier), lambda: build(tier))
+        return llm_gateway.invoke(chain, inputs, **options).content
+    return model_router.run(task, attempt, prompt_chars=sum(map(len, inputs.values())),
+                            accept=lambda answer: not is_low_confidence(answer))
+
+async def _arouted_call(task: str, build, inputs: dict, **options):
+    async def attempt(tier):
+        chain = llm_gateway.get_chain((task, tier), lambda: build(tier))
+        return (await llm_gateway.ainvoke(chain, inputs, **options)).content
+    return await model_router.arun(task, attempt, prompt_chars=sum(map(len, inputs.values())),
+                                   accept=lambda answer: not is_low_confidence(answer))
+
+# --- CHUNKING ---
+
+def _cut_point(text: str, limit: int) -> int:
+    """Last paragraph, line, sentence or word break in the second half of `text[:limit]`."""
+    for separator in ("\n\n", "\n", ". ", " "):
+        index = text.rfind(separator, limit // 2, limit)
+        if index != -1:
+            return index + len(separator)
+    return limit
+
+def iter_chunks(content, max_tokens: int = CHUNK_TOKENS, overlap_tokens: int = CHUNK_OVERLAP_TOKENS):
+    """
+    Yields chunks of at most about `max_tokens` tokens from `content`, which may
+    be one string or an iterable of strings (e.g. a page read in pieces), so
+    a large page never has to be held or split all at once. Chunks break at
+    paragraph, line, sentence or word boundaries, and each repeats the last
+    `overlap_tokens` of the previous one so data on a boundary is not lost.
+    """
+    max_chars = max_tokens * CHARS_PER_TOKEN
+    overlap_chars = min(overlap_tokens * CHARS_PER_TOKEN, max_chars // 2)
+    pieces = [content] if isinstance(content, str) else content
+    buffer = ""
+    fresh = False  # whether `buffer` holds text not yet sent in any chunk
+    for piece in pieces:
+        buffer += piece
+        fresh = fresh or bool(piece.strip())
+        while len(buffer) > max_chars:
+            cut = _cut_point(buffer, max_chars)
+            yield buffer[:cut].strip()
+            start = cut - overlap_chars
+            if overlap_chars:
+                # Start the overlap on a word boundary
+                space = buffer.find(" ", start, cut)
+                start = space + 1 if space != -1 else start
+            buffer = buffer[max(0, start):]
+            fresh = bool(buffer[cut - max(0, start):].strip())
+    if fresh and buffer.strip():
+        yield buffer.strip()
+
+# --- COMBINING ANSWERS ---
+
+def is_no_match(answer: str) -> bool:
+    """True for empty replies and the "no information" reply; answers of only numbers or symbols count."""
+    text = (answer or "").strip()
+    return not text or "no information match" in text.lower()
+
+def _line_key(line: str) -> str:
+    return " ".join(line.lower().split())
+
+def _overlap(previous: list, lines: list) -> int:
+    """Number of leading `lines` that repeat the last lines of `previous` (the chunk overlap)."""
+    previous_keys = [_line_key(line) for line in previous]
+    keys = [_line_key(line) for line in lines]
+    for size in range(min(len(previous_keys), len(keys)), 0, -1):
+        if previous_keys[-size:] == keys[:size]:
+            return size
+    return 0
+
+def combine_answers(answers: list) -> list:
+    """
+    Drops "no information" replies, answers repeated in full, and the leading
+    lines of an answer that repeat the end of the one before it (chunks
+    overlap, so a row on a boundary is often extracted twice). Lines that
+    repeat elsewhere, such as the same price under two plans, are kept.
+    Returns the remaining answers in their original order.
+    """
+    seen = set()
+    combined = []
+    for answer in answers:
+        if is_no_match(answer):
+            continue
+        lines = [line for line in str(answer).strip().splitlines() if line.strip()]
+        key = "\n".join(map(_line_key, lines))
+        if key in seen:
+            continue
+        seen.add(key)
+        if combined:
+            lines = lines[_overlap(combined[-1].splitlines(), lines):]
+        if lines:
+            combined.append("\n".join(lines))
+    return combined
+
+async def aparse_with_gemini(chunks, query, concurrency: int = 8, requests_per_minute: float = None,
+                             max_retries: int = 3, on_progress=None):
+    """
+    Async version of `parse_with_gemini` that runs up to `concurrency` chunks at once.
+    Responses are joined in chunk order regardless of the order they finish in.
+    """
+    limiter = RateLimiter(requests_per_minute) if requests_per_minute else None
+    semaphore = asyncio.Semaphore(max(1, concurrency))
+
+    parsed_result = [None] * len(chunks)
+    done = 0
+
+    async def parse_chunk(i, chunk):
+        nonlocal done
+        async with semaphore:
+            parsed_result[i] = await _arouted_call(
+                "extract", _build_chain, {"body_content": chunk, "query": query},
+                max_retries=max_retries, extra_limiter=limiter,
+            )
+        done += 1
+        if on_progress is not None:
+            on_progress(done, len(chunks), i)
+
+    with instrumentation.track("parse_with_gemini", chunks=len(chunks), concurrency=concurrency):
+        await asyncio.gather(*(parse_chunk(i, chunk) for i, chunk in enumerate(chunks)))
+    return "\n".join(combine_answers(parsed_result)) or NO_MATCH_REPLY
+
+def parse_with_gemini(chunks, query, concurrency: int = 1, requests_per_minute: float = None,
+                      max_retries: int = 3, on_progress=None):
+    """
+    Runs the extraction prompt over every chunk and joins the answers in chunk
+    order, leaving out "no information" replies and repeated lines.
+
+    With `concurrency` > 1 the chunks are sent in parallel (see `aparse_with_gemini`).
+    `on_progress(done, total, index)` is called after each chunk finishes.
+    """
+    if concurrency > 1:
+        return asyncio.run(aparse_with_gemini(
+            chunks, query, concurrency=concurrency, requests_per_minute=requests_per_minute,
+            max_retries=max_retries, on_progress=on_progress,
+        ))
+
+    limiter = RateLimiter(requests_per_minute) if requests_per_minute else None
 
     parsed_result = []
 
-    for i, chunk in enumerate(chunks, start=1):
-        response = chain.invoke({"body_content": chunk, "query": query})
-        print(f"Parsed batch {i} of {len(chunks)}")
-        parsed_result.append(response.content) # Add .content for Gemini
-    return "\n".join(parsed_result)
\ No newline at end of file
+    with instrumentation.track("parse_with_gemini", chunks=len(chunks), concurrency=1):
+        for i, chunk in enumerate(chunks):
+            parsed_result.append(_routed_call(
+                "extract", _build_chain, {"body_content": chunk, "query": query},
+                max_retries=max_retries, extra_limiter=limiter,
+            ))
+            if on_progress is not None:
+                on_progress(i + 1, len(chunks), i)
+    return "\n".join(combine_answers(parsed_result)) or NO_MATCH_REPLY
+
+# --- WHOLE PAGES ---
+
+async def aparse_content(content, query, max_tokens: int = CHUNK_TOKENS, overlap_tokens: int = CHUNK_OVERLAP_TOKENS,
+                         stop_on_first_match: bool = False, reduce: bool = False, concurrency: int = 4,
+                         requests_per_minute: float = None, max_retries: int = 3, on_progress=None):
+    """
+    Chunks `content` (a string or an iterable of strings) with `iter_chunks`
+    and extracts the answer to `query` from it, `concurrency` chunks at a time.
+
+    With `stop_on_first_match`, no further chunks are read or sent once a
+    batch has produced an answer (for questions with one answer, e.g. a
+    price). With `reduce`, the partial answers are merged by one more call.
+    `on_progress(done, index)` is called after each chunk.
+    """
+    limiter = RateLimiter(requests_per_minute) if requests_per_minute else None
+    chunks = iter_chunks(content, max_tokens=max_tokens, overlap_tokens=overlap_tokens)
+    answers = []
+    done = 0
+
+    async def parse_chunk(index, chunk):
+        nonlocal done
+        record.add("chunk_tokens", estimate_tokens(chunk))
+        answer = await _arouted_call(
+            "extract", _build_chain, {"body_content": chunk, "query": query},
+            max_retries=max_retries, extra_limiter=limiter,
+        )
+        done += 1
+        if on_progress is not None:
+            on_progress(done, index)
+        return answer
+
+    with instrumentation.track("parse_content", concurrency=concurrency) as record:
+        index = 0
+        while True:
+            batch = []
+            for chunk in chunks:
+                batch.append(parse_chunk(index, chunk))
+                index += 1
+                if len(batch) == concurrency:
+                    break
+            if not batch:
+                break
+            answers += await asyncio.gather(*batch)
+            if stop_on_first_match and combine_answers(answers):
+                record.set(early_exit=True)
+                break
+        combined = combine_answers(answers)
+        record.set(chunks=index, answers=len(combined))
+        if not combined:
+            return NO_MATCH_REPLY
+        if not reduce or len(combined) == 1:
+            return "\n".join(combined)
+        return await _arouted_call(
+            "reduce", _build_reduce_chain, {"query": query, "answers": "\n---\n".join(combined)},
+            max_retries=max_retries, extra_limiter=limiter,
+        )
+
+def parse_content(content, query, **options):
+    """Synchronous wrapper around `aparse_content`."""
+    return asyncio.run(aparse_content(content, query, **options))
@@ -0,0 +1,224 @@
+# In api.py
+
+"""
+Headless HTTP API for the agents, for other frontends and batch jobs.
+
+    uvicorn api:app --host 0.0.0.0 --port 8000 --workers 4
+
+Endpoints:
+    POST /evaluate   resume + job description -> evaluation JSON
+    POST /careers    survey answers -> three career suggestions
+    POST /chat       resume, job description and messages -> answer as Server-Sent Events
+    POST /parse      page content + question -> extracted answer
+    GET  /health     load and coalescing counters
+    GET  /metrics    per-agent metrics in the Prometheus text format
+
+The server keeps no session state (caches and history live in SQLite under
+CAREERO_CACHE_DIR), so several processes or hosts can sit behind one load
+balancer. Within a process, identical concurrent requests share one upstream
+call, and at most CAREERO_API_MAX_WORKERS agent calls run at once with up to
+CAREERO_API_MAX_QUEUE more waiting; beyond that requests get a 503 with
+Retry-After.
+"""
+
+import asyncio
+import json
+import os
+from typing import List, Optional
+
+from dotenv import load_dotenv
+from fastapi import FastAPI, Request
+from fastapi.responses import JSONResponse, PlainTextResponse, StreamingResponse
+from starlette.background import BackgroundTask
+from pydantic import BaseModel, Field, model_validator
+
+import instrumentation
+import llm_gateway
+from result_cache import make_cache_key
+from single_flight import Overloaded, SingleFlight, WorkerPool
+
+load_dotenv()
+
+MAX_WORKERS = int(os.environ.get("CAREERO_API_MAX_WORKERS", str(llm_gateway.MAX_IN_FLIGHT)))
+MAX_QUEUE = int(os.environ.get("CAREERO_API_MAX_QUEUE", "32"))
+
+app = FastAPI(title="CareeroAI API")
+workers = WorkerPool(MAX_WORKERS, MAX_QUEUE)
+single_flight = SingleFlight()
+
+
+# --- REQUEST MODELS ---
+
+class EvaluateRequest(BaseModel):
+    resume: str = Field(min_length=1)
+    job_description: str = Field(min_length=1)
+
+
+class SurveyRequest(BaseModel):
+    subjects: str
+    score: int = Field(ge=0, le=100)
+    interests: str
+    work_style: str
+    budget: str
+    relocate: str = "Yes"
+    home_state: str
+    cities: str = "Any"
+
+
+class ChatMessage(BaseModel):
+    role: str = Field(pattern="^(user|model)$")
+    content: str
+
+
+class ChatRequest(BaseModel):
+    resume: str = Field(min_length=1)
+    job_description: str = Field(min_length=1)
+    messages: List[ChatMessage] = Field(min_length=1)
+
+
+class ParseRequest(BaseModel):
+    query: str = Field(min_length=1)
+    content: Optional[str] = None
+    chunks: Optional[List[str]] = None
+    concurrency: int = Field(default=4, ge=1, le=16)
+    # Only used with `content`, which is chunked by tokens on the server.
+    max_tokens: int = Field(default=2000, ge=200, le=30000)
+    overlap_tokens: int = Field(default=100, ge=0, le=1000)
+    stop_on_first_match: bool = False
+    reduce: bool = False
+
+    @model_validator(mode="after")
+    def check_input(self):
+        if not self.content and not self.chunks:
+            raise ValueError("Provide either `content` or `chunks`.")
+        return self
+
+
+@app.exception_handler(Overloaded)
+async def overloaded_handler(request: Request, error: Overloaded):
+    return JSONResponse(
+        status_code=503,
+        content={"detail": str(error)},
+        headers={"Retry-After": str(int(error.retry_after + 0.5))},
+    )
+
+
+# --- ENDPOINTS ---
+
+@app.post("/evaluate")
+async def evaluate(body: EvaluateRequest) -> dict:
+    from evaluator_agent import evaluate_resume_instant
+
+    key = make_cache_key({"endpoint": "evaluate", "resume": body.resume, "job": body.job_description})
+    return await single_flight.do(
+        key, lambda: workers.run(evaluate_resume_instant, body.resume, body.job_description)
+    )
+
+
+@app.post("/careers")
+async def careers(body: SurveyRequest) -> dict:
+    from career_agent import canonicalize_survey, get_career_suggestions
+
+    survey = canonicalize_survey(body.model_dump())
+    key = make_cache_key({"endpoint": "careers", "survey": survey})
+    return await single_flight.do(key, lambda: workers.run(get_career_suggestions, survey))
+
+
+@app.post("/parse")
+async def parse(body: ParseRequest) -> dict:
+    from agent import aparse_content, aparse_with_gemini
+
+    key = make_cache_key({"endpoint": "parse", **body.model_dump(exclude={"concurrency"})})
+    if body.chunks:
+        run = lambda: workers.run_async(aparse_with_gemini, body.chunks, body.query, concurrency=body.concurrency)
+    else:
+        run = lambda: workers.run_async(
+            aparse_content, body.content, body.query, max_tokens=body.max_tokens,
+            overlap_tokens=body.overlap_tokens, stop_on_first_match=body.stop_on_first_match,
+            reduce=body.reduce, concurrency=body.concurrency,
+        )
+    return {"result": await single_flight.do(key, run)}
+
+
+def _sse(data: dict, event: str = None) -> str:
+    prefix = f"event: {event}\n" if event else ""
+    return f"{prefix}data: {json.dumps(data, ensure_ascii=False)}\n\n"
+
+
+@app.post("/chat")
+async def chat(body: ChatRequest) -> StreamingResponse:
+    """
+    Streams the answer as Server-Sent Events: `data: {"text": ...}` per chunk,
+    then `event: done` with token usage and the turn's outcome (or
+    `event: error`). A client disconnect cancels the generation. Chats are not
+    coalesced, since two identical conversations in flight at once are rare.
+    """
+    from chat_agent import advisor_system_prompt, start_chat_turn, summarize_messages
+    from chat_context import ChatContext
+
+    messages = [message.model_dump() for message in body.messages]
+    system_prompt = await asyncio.to_thread(advisor_system_prompt, body.resume, body.job_description, messages)
+    # Clients send the whole history; keep what fits the token budget.
+    messages, system_prompt, usage = ChatContext(summarize=summarize_messages).build(messages, system_prompt)
+
+    # The slot is held until the stream ends, so long answers count against the limit.
+    # It is taken here so an overloaded server still answers with a 503.
+    await workers.acquire()
+    released = False
+
+    def release():
+        nonlocal released
+        if not released:
+            released = True
+            workers.release()
+
+    try:
+        turn = await asyncio.to_thread(start_chat_turn, messages, system_prompt)
+    except BaseException:
+        release()
+        raise
+
+    async def events():
+        try:
+            async for text in turn.astream():
+                yield _sse({"text": text})
+            yield _sse({
+                "usage": usage,
+                "outcome": turn.status,
+                "ttft_ms": turn.record.fields.get("ttft_ms"),
+                "tokens_per_second": turn.record.fields.get("tokens_per_second"),
+            }, event="done")
+        except Exception as e:
+            yield _sse({"detail": f"{type(e).__name__}: {e}"}, event="error")
+        finally:
+            release()
+
+    async def cleanup():
+        # Runs after the response, including when the client left before the
+        # body started and `events()` never ran.
+        turn.abandon()
+        release()
+
+    return StreamingResponse(events(), media_type="text/event-stream", headers={"Cache-Control": "no-cache"},
+                             background=BackgroundTask(cleanup))
+
+
+@app.get("/health")
+async def health() -> dict:
+    return {
+        "status": "ok",
+        "active": workers.active,
+        "queued": workers.waiting,
+        "max_workers": workers.max_workers,
+        "max_queue": workers.max_queue,
+        "coalescing": {
+            "in_flight": single_flight.in_flight,
+            "started": single_flight.started,
+            "coalesced": single_flight.coalesced,
+        },
+    }
+
+
+@app.get("/metrics", response_class=PlainTextResponse)
+async def metrics() -> str:
+    return instrumentation.prometheus_text()
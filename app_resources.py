@@ -0,0 +1,75 @@
+# In app_resources.py
+
+"""
+Streamlit resource factories for the agents. Pages call these instead of
+importing agent modules at the top, so the agents and their dependencies
+load the first time a feature is used (not on first paint) and are then shared
+by every session in the server process.
+"""
+
+import importlib
+import os
+import sys
+import threading
+
+import streamlit as st
+
+import instrumentation
+
+# Set CAREERO_PRELOAD=1 to import the agents' dependencies in the background
+# after the first paint instead of on first use.
+PRELOAD = os.environ.get("CAREERO_PRELOAD", "").lower() in ("1", "true", "yes")
+
+_preloading = set()
+_preload_lock = threading.Lock()
+
+
+def _load(name: str):
+    if name in sys.modules:
+        return sys.modules[name]
+    with instrumentation.track("import_module", module=name):
+        return importlib.import_module(name)
+
+
+@st.cache_resource(show_spinner="Loading the resume evaluator...")
+def evaluator_agent():
+    return _load("evaluator_agent")
+
+
+@st.cache_resource(show_spinner="Loading the chat assistant...")
+def chat_agent():
+    return _load("chat_agent")
+
+
+@st.cache_resource(show_spinner="Loading the career finder...")
+def career_agent():
+    return _load("career_agent")
+
+
+@st.cache_resource(show_spinner="Loading the job ranker...")
+def jd_ranker():
+    return _load("jd_ranker")
+
+
+def preload(*names: str) -> None:
+    """
+    Imports modules on a background thread once the page has painted, so the
+    first click on a feature usually finds them loaded. Each module is only
+    preloaded once per process. Does nothing unless CAREERO_PRELOAD is set.
+    """
+    if not PRELOAD:
+        return
+    with _preload_lock:
+        names = [name for name in names if name not in sys.modules and name not in _preloading]
+        _preloading.update(names)
+    if not names:
+        return
+
+    def run():
+        for name in names:
+            try:
+                _load(name)
+            except Exception as e:
+                print(f"Could not preload {name}: {e}")
+
+    threading.Thread(target=run, name="careero-preload", daemon=True).start()
@@ -0,0 +1,119 @@
+# In background_jobs.py
+
+"""
+Runs slow agent calls on a per-process thread pool so a Streamlit script run
+does not block on them. Pages keep one `SessionJobs` in st.session_state and
+start work under a name ("evaluation") and a key (what the work is for).
+Starting a name with a new key cancels the job it supersedes; starting it with
+the same key attaches to the job that is already running.
+"""
+
+import os
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+MAX_WORKERS = int(os.environ.get("CAREERO_BACKGROUND_WORKERS", "4"))
+
+_pool = ThreadPoolExecutor(max_workers=MAX_WORKERS, thread_name_prefix="careero-job")
+
+
+class JobCancelled(Exception):
+    """Raised inside a job (and by `Job.result`) once the job has been cancelled."""
+
+
+class Job:
+    """
+    One unit of background work. The function receives the job as its first
+    argument so it can publish partial results in `progress` and call
+    `raise_if_cancelled` between steps; a cancelled job stops at its next check,
+    and its result is never used.
+    """
+
+    def __init__(self, key):
+        self.key = key
+        self.progress = {}
+        self.future = None
+        self._cancelled = threading.Event()
+        self._wake = threading.Event()
+
+    def cancel(self) -> None:
+        self._cancelled.set()
+        self._wake.set()
+        self.future.cancel()
+
+    def expedite(self) -> None:
+        """Skips what is left of the start delay."""
+        self._wake.set()
+
+    @property
+    def cancelled(self) -> bool:
+        return self._cancelled.is_set()
+
+    def raise_if_cancelled(self) -> None:
+        if self.cancelled:
+            raise JobCancelled()
+
+    def done(self) -> bool:
+        return self.future.done()
+
+    @property
+    def failed(self) -> bool:
+        return self.done() and not self.future.cancelled() and self.future.exception() is not None
+
+    def result(self, timeout: float = None):
+        """Waits for the job and returns its result, or raises its error."""
+        if self.future.cancelled():
+            raise JobCancelled()
+        return self.future.result(timeout)
+
+
+def submit(fn, *args, key=None, delay: float = 0.0) -> Job:
+    """
+    Runs `fn(job, *args)` on the pool after `delay` seconds. Cancelling the
+    job during the delay means `fn` never runs, which is how rapid edits are
+    debounced: each edit supersedes the previous job before it starts.
+    """
+    job = Job(key)
+
+    def run():
+        if delay:
+            job._wake.wait(delay)
+        job.raise_if_cancelled()
+        return fn(job, *args)
+
+    job.future = _pool.submit(run)
+    return job
+
+
+class SessionJobs:
+    """The background jobs of one session, at most one per name."""
+
+    def __init__(self):
+        self._jobs = {}
+
+    def get(self, name: str, key=None) -> Job:
+        """The live (not cancelled) job for `name`, if it is for `key`; failed jobs are returned too."""
+        job = self._jobs.get(name)
+        if job is None or job.cancelled or (key is not None and job.key != key):
+            return None
+        return job
+
+    def start(self, name: str, key, fn, *args, delay: float = 0.0) -> Job:
+        """
+        Returns the job for `name` and `key`, starting it if needed. A job for
+        the same key that is waiting out its delay is started straight away
+        when `delay` is 0; a failed one is started again.
+        """
+        current = self.get(name, key)
+        if current is not None and not current.failed:
+            if not delay:
+                current.expedite()
+            return current
+        self.cancel(name)
+        job = self._jobs[name] = submit(fn, *args, key=key, delay=delay)
+        return job
+
+    def cancel(self, name: str) -> None:
+        job = self._jobs.pop(name, None)
+        if job is not None:
+            job.cancel()
@@ -0,0 +1,205 @@
+# In batch_evaluate.py
+
+"""
+Scores a folder of resume PDFs against one job description.
+
+    python batch_evaluate.py resumes/ --jd job.txt --out results.jsonl
+
+Results are appended to the output file (JSONL or CSV, by extension) as each
+evaluation finishes; unreadable PDFs are written with status "parse_error".
+Rerunning with the same output file skips resumes that were already scored
+successfully against the same job description.
+"""
+
+import argparse
+import csv
+import hashlib
+import json
+import os
+import re
+import threading
+import time
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, ThreadPoolExecutor, wait
+
+from dotenv import load_dotenv
+
+from resume_ingest import content_hash, extract_text
+
+SCORE_FIELDS = ("global_score", "education_relevance", "matching_skills", "project_relevance", "industry_standard")
+CSV_FIELDS = ("file", "resume_hash", "job_hash", "status", "title") + SCORE_FIELDS + ("elapsed_seconds", "error")
+
+
+def score_value(value) -> float:
+    """Pulls the numeric score out of an evaluation field ("7/10", {"score": "7"}, 7 ...)."""
+    if isinstance(value, dict):
+        value = value.get("score", "")
+    match = re.search(r'(\d+\.?\d*)', str(value))
+    return float(match.group(1)) if match else None
+
+
+def _parse_resume(path: str) -> tuple:
+    # Runs in a worker process, so it only touches picklable values.
+    with open(path, "rb") as f:
+        data = f.read()
+    return path, content_hash(data), extract_text(data)
+
+
+class _ResultWriter:
+    """Appends one record per finished evaluation, safe to call from several threads."""
+
+    def __init__(self, path: str):
+        self.path = path
+        self.is_csv = path.lower().endswith(".csv")
+        self._lock = threading.Lock()
+        write_header = self.is_csv and (not os.path.exists(path) or os.path.getsize(path) == 0)
+        partial_line = False
+        if not self.is_csv and os.path.exists(path) and os.path.getsize(path):
+            with open(path, "rb") as f:
+                f.seek(-1, os.SEEK_END)
+                partial_line = f.read(1) != b"\n"
+        self._file = open(path, "a", newline="", encoding="utf-8")
+        if partial_line:
+            # Start on a new line after a partial record left by a killed run.
+            self._file.write("\n")
+        if self.is_csv:
+            self._csv = csv.DictWriter(self._file, fieldnames=CSV_FIELDS, extrasaction="ignore")
+            if write_header:
+                self._csv.writeheader()
+
+    def write(self, record: dict) -> None:
+        with self._lock:
+            if self.is_csv:
+                row = {key: record.get(key) for key in CSV_FIELDS}
+                evaluation = record.get("evaluation") or {}
+                row["title"] = evaluation.get("title")
+                for key in SCORE_FIELDS:
+                    row[key] = score_value(evaluation.get(key)) if key in evaluation else None
+                self._csv.writerow(row)
+            else:
+                self._file.write(json.dumps(record, ensure_ascii=False) + "\n")
+            self._file.flush()
+
+    def close(self) -> None:
+        self._file.close()
+
+
+def load_scored(path: str, job_hash: str) -> set:
+    """Returns the hashes of resumes already scored successfully against `job_hash`."""
+    if not os.path.exists(path):
+        return set()
+    with open(path, newline="", encoding="utf-8") as f:
+        if path.lower().endswith(".csv"):
+            records = list(csv.DictReader(f))
+        else:
+            records = []
+            for line in f:
+                try:
+                    records.append(json.loads(line))
+                except json.JSONDecodeError:
+                    # A run killed mid-write leaves a partial last line; that resume is scored again.
+                    continue
+    return {r.get("resume_hash") for r in records if r.get("job_hash") == job_hash and r.get("status") == "ok"}
+
+
+def evaluate_directory(resume_dir: str, job_description: str, output_path: str,
+                       workers: int = 4, parse_processes: int = None, on_result=None) -> dict:
+    """
+    Evaluates every PDF in `resume_dir` against `job_description`.
+
+    PDFs are parsed in a process pool and each is evaluated by one of
+    `workers` threads as soon as it is parsed; the LLM gateway enforces the
+    rate limit. Each record is written to `output_path` and passed to
+    `on_result(record)` as soon as it is ready. PDFs that cannot be read get
+    a record with status "parse_error". Returns counts of scored, skipped and
+    failed resumes.
+    """
+    from evaluator_agent import evaluate_resume
+
+    job_hash = hashlib.sha256(job_description.encode("utf-8")).hexdigest()
+    already_scored = load_scored(output_path, job_hash)
+    paths = sorted(
+        os.path.join(resume_dir, name) for name in os.listdir(resume_dir)
+        if name.lower().endswith(".pdf")
+    )
+    summary = {"total": len(paths), "scored": 0, "skipped": 0, "failed": 0}
+
+    writer = _ResultWriter(output_path)
+
+    def evaluate(path, resume_hash, text):
+        record = {"file": os.path.basename(path), "resume_hash": resume_hash, "job_hash": job_hash}
+        started = time.perf_counter()
+        try:
+            record["evaluation"] = evaluate_resume(text, job_description)
+            record["status"] = "ok"
+        except Exception as e:
+            record["status"] = "error"
+            record["error"] = str(e)
+        record["elapsed_seconds"] = round(time.perf_counter() - started, 2)
+        return record
+
+    def finish(record):
+        writer.write(record)
+        summary["scored" if record["status"] == "ok" else "failed"] += 1
+        if on_result is not None:
+            on_result(record)
+
+    try:
+        with ProcessPoolExecutor(max_workers=parse_processes) as parse_pool, \
+                ThreadPoolExecutor(max_workers=workers) as eval_pool:
+            # Parses and evaluations are waited on together, so each resume is
+            # evaluated (and its result written) as soon as it has been parsed.
+            parsing = {parse_pool.submit(_parse_resume, path): path for path in paths}
+            pending = set(parsing)
+            while pending:
+                done, pending = wait(pending, return_when=FIRST_COMPLETED)
+                for future in done:
+                    if future not in parsing:
+                        finish(future.result())
+                        continue
+                    try:
+                        path, resume_hash, text = future.result()
+                    except Exception as e:
+                        print(f"Could not read {parsing[future]}: {e}")
+                        finish({"file": os.path.basename(parsing[future]), "resume_hash": None,
+                                "job_hash": job_hash, "status": "parse_error", "error": str(e)})
+                        continue
+                    if resume_hash in already_scored:
+                        summary["skipped"] += 1
+                        continue
+                    # The same file may appear twice under different names.
+                    already_scored.add(resume_hash)
+                    pending.add(eval_pool.submit(evaluate, path, resume_hash, text))
+    finally:
+        writer.close()
+    return summary
+
+
+def main(argv=None) -> None:
+    load_dotenv()
+    parser = argparse.ArgumentParser(description="Evaluate a folder of resume PDFs against one job description.")
+    parser.add_argument("resume_dir", help="Folder containing resume PDFs")
+    parser.add_argument("--jd", required=True, help="Text file with the job description")
+    parser.add_argument("--out", default="evaluations.jsonl", help="Output file (.jsonl or .csv)")
+    parser.add_argument("--workers", type=int, default=4, help="Concurrent evaluations")
+    parser.add_argument("--rpm", type=float, default=None, help="Maximum LLM requests per minute")
+    args = parser.parse_args(argv)
+
+    if args.rpm:
+        import llm_gateway
+        llm_gateway.set_rate_limit(args.rpm)
+
+    with open(args.jd, encoding="utf-8") as f:
+        job_description = f.read()
+
+    def report(record):
+        score = score_value((record.get("evaluation") or {}).get("global_score"))
+        print(f"{record['file']}: {record['status']}" + (f" ({score}/10)" if score is not None else ""))
+
+    summary = evaluate_directory(args.resume_dir, job_description, args.out,
+                                 workers=args.workers, on_result=report)
+    print(f"Done: {summary['scored']} scored, {summary['skipped']} skipped, "
+          f"{summary['failed']} failed, {summary['total']} total.")
+
+
+if __name__ == "__main__":
+    main()
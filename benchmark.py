@@ -0,0 +1,258 @@
+# In benchmark.py
+
+"""
+Offline performance benchmarks. Every agent runs against the simulated
+Gemini in fake_llm.py, so no network or API key is needed.
+
+    python benchmark.py
+    python benchmark.py --scenario careers --concurrency 1,4,16 --requests 32
+    python benchmark.py --latency 1.5 --tokens-per-second 40 --error-rate 0.05 --out bench.json
+
+Each scenario is run once per concurrency level and reports throughput,
+latency percentiles, time to first token (chat) and the process's peak RSS.
+Peak RSS is a high-water mark for the whole process, so run one scenario at
+a time to compare memory.
+"""
+
+import argparse
+import itertools
+import json
+import os
+import resource
+import sys
+import tempfile
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+SAMPLE_RESUME = """
+Priya Sharma - B.Tech in Computer Science, NIT Trichy (2024), CGPA 8.4
+Skills: Python, Java, SQL, React, Docker, AWS, Git, machine learning, pandas
+Projects: built a REST API for a college event portal with Flask and PostgreSQL;
+trained a CNN image classifier with TensorFlow; deployed a React dashboard on AWS.
+Experience: Software engineering intern at a fintech startup, wrote unit tests and CI pipelines.
+""" * 3
+
+SAMPLE_JOB = """
+Software Engineer, Backend - Example Corp
+We need a graduate with a Bachelor's degree in Computer Science or a related field.
+Required: Python, SQL, REST APIs, Docker, Git. Nice to have: AWS, Kubernetes, system design.
+You will design services, write tests and review code with a small team.
+"""
+
+SAMPLE_SURVEY = {
+    "subjects": "Physics, Mathematics",
+    "interests": "Coding & Technology, Building & Fixing Things",
+    "work_style": "In a team, collaborating with others",
+    "budget": "₹2 Lakhs - ₹5 Lakhs",
+    "relocate": "Yes",
+    "home_state": "Maharashtra",
+    "cities": "Pune, Mumbai",
+}
+
+CHAT_SYSTEM_PROMPT = "You are a helpful interview coach. Resume:\n" + SAMPLE_RESUME + "\nJob description:\n" + SAMPLE_JOB
+
+SCENARIOS = ("evaluate", "careers", "chat", "parse", "page")
+
+
+def _peak_rss_mb() -> float:
+    # ru_maxrss is in kilobytes on Linux (bytes on macOS).
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return round(peak / (1024 * 1024 if sys.platform == "darwin" else 1024), 1)
+
+
+def _percentile(values: list, q: float) -> float:
+    if not values:
+        return None
+    values = sorted(values)
+    return round(values[min(len(values) - 1, round(q * (len(values) - 1)))], 1)
+
+
+# --- SCENARIOS ---
+# Each takes a request number (unique across the whole run, so caches never
+# hit) and the concurrency level, and returns the time to first token in
+# milliseconds, or None when the call does not stream.
+
+def run_evaluate(index: int, concurrency: int):
+    from evaluator_agent import evaluate_resume_instant
+    evaluate_resume_instant(SAMPLE_RESUME, f"{SAMPLE_JOB}\nRequisition {index}")
+
+
+def run_careers(index: int, concurrency: int):
+    from career_agent import get_career_suggestions
+    get_career_suggestions(dict(SAMPLE_SURVEY, score=f"{60 + index % 40} (run {index})"))
+
+
+def run_chat(index: int, concurrency: int):
+    from chat_agent import start_chat_turn
+    messages = [
+        {"role": "user", "content": "What should I prepare first for this role?"},
+        {"role": "model", "content": "Start with the required skills in the job description."},
+        {"role": "user", "content": f"How do I explain my internship? ({index})"},
+    ]
+    started = time.perf_counter()
+    ttft = None
+    for text in start_chat_turn(messages, CHAT_SYSTEM_PROMPT).stream():
+        if ttft is None:
+            ttft = (time.perf_counter() - started) * 1000
+    return ttft
+
+
+PARSE_CHUNKS = 12
+
+
+def run_parse(index: int, concurrency: int):
+    from agent import parse_with_gemini
+    chunks = [f"<div class='product'>Item {index}-{i} costs ₹{100 + i}</div>" * 50 for i in range(PARSE_CHUNKS)]
+    parse_with_gemini(chunks, "List every product with its price", concurrency=concurrency)
+
+
+def _page_pieces(index: int):
+    """A large scraped page, read in pieces: one product listing, then navigation and footer text."""
+    yield f"<div class='product'>Item {index} costs ₹{100 + index}</div>\n\n"
+    for i in range(400):
+        yield f"<li><a href='/category/{i}'>Category {i}</a> - browse our range of related items.</li>\n"
+
+
+def run_page(index: int, concurrency: int):
+    from agent import parse_content
+    parse_content(_page_pieces(index), "What is the price of the product?",
+                  stop_on_first_match=True, concurrency=concurrency)
+
+
+SCENARIO_RUNNERS = {
+    "evaluate": run_evaluate,
+    "careers": run_careers,
+    "chat": run_chat,
+    "parse": run_parse,
+    "page": run_page,
+}
+
+# Parsing fans out over chunks itself, so its requests are sent one at a time.
+INNER_CONCURRENCY = {"parse", "page"}
+
+_request_numbers = itertools.count()
+
+
+def run_scenario(name: str, requests: int, concurrency: int, backend) -> dict:
+    """Sends `requests` calls of one scenario, `concurrency` at a time, and summarises them."""
+    runner = SCENARIO_RUNNERS[name]
+    latencies, ttfts, errors = [], [], []
+    calls_before = backend.calls
+
+    def one(_):
+        index = next(_request_numbers)
+        started = time.perf_counter()
+        try:
+            ttft = runner(index, concurrency)
+        except Exception as e:
+            errors.append(f"{type(e).__name__}: {e}")
+            return
+        latencies.append((time.perf_counter() - started) * 1000)
+        if ttft is not None:
+            ttfts.append(ttft)
+
+    workers = 1 if name in INNER_CONCURRENCY else concurrency
+    started = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=workers) as pool:
+        list(pool.map(one, range(requests)))
+    wall = time.perf_counter() - started
+
+    return {
+        "scenario": name,
+        "concurrency": concurrency,
+        "requests": requests,
+        "errors": len(errors),
+        "llm_calls": backend.calls - calls_before,
+        "wall_seconds": round(wall, 2),
+        "throughput_rps": round(len(latencies) / wall, 2) if wall else None,
+        "p50_ms": _percentile(latencies, 0.5),
+        "p95_ms": _percentile(latencies, 0.95),
+        "p99_ms": _percentile(latencies, 0.99),
+        "ttft_p50_ms": _percentile(ttfts, 0.5),
+        "peak_rss_mb": _peak_rss_mb(),
+        "first_error": errors[0] if errors else None,
+    }
+
+
+def print_table(rows: list) -> None:
+    columns = ("scenario", "concurrency", "requests", "errors", "llm_calls", "throughput_rps",
+               "p50_ms", "p95_ms", "p99_ms", "ttft_p50_ms", "peak_rss_mb")
+    widths = {column: max(len(column), *(len(str(row[column])) for row in rows)) for column in columns}
+    print("  ".join(column.rjust(widths[column]) for column in columns))
+    for row in rows:
+        print("  ".join(str(row[column] if row[column] is not None else "-").rjust(widths[column]) for column in columns))
+
+
+def main(argv=None) -> None:
+    parser = argparse.ArgumentParser(description="Benchmark the agents against a simulated Gemini backend.")
+    parser.add_argument("--scenario", action="append", choices=SCENARIOS,
+                        help="Scenario to run (repeatable; default: all)")
+    parser.add_argument("--concurrency", default="1,4,8", help="Comma-separated concurrency levels")
+    parser.add_argument("--requests", type=int, default=16, help="Requests per scenario and level")
+    parser.add_argument("--latency", type=float, default=0.5, help="Seconds before the first token")
+    parser.add_argument("--jitter", type=float, default=0.1, help="Random +/- seconds added to the latency")
+    parser.add_argument("--tokens-per-second", type=float, default=80.0, help="Simulated output speed")
+    parser.add_argument("--error-rate", type=float, default=0.0, help="Fraction of calls failing with a 429")
+    parser.add_argument("--malformed-rate", type=float, default=0.0, help="Fraction of calls not answering in JSON")
+    parser.add_argument("--rpm", type=float, default=1_000_000, help="Gateway requests per minute")
+    parser.add_argument("--max-in-flight", type=int, default=None, help="Gateway in-flight cap (default: CAREERO_LLM_MAX_IN_FLIGHT)")
+    parser.add_argument("--semantic-cache", action="store_true",
+                        help="Keep the semantic cache on (off by default so similar requests do not hit it)")
+    parser.add_argument("--routing", default="auto", choices=("auto", "lite", "fast", "strong"),
+                        help="Model tier routing (a tier name sends every request to that tier)")
+    parser.add_argument("--model-latency", default="",
+                        help="Per-model latency, e.g. gemini-2.5-pro=1.5,gemini-2.5-flash-lite=0.2")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--out", default=None, help="Also write the results to this JSON file")
+    args = parser.parse_args(argv)
+
+    # Keep caches, metrics and history away from the app's own, and make every
+    # run start cold. These must be set before the agents are imported.
+    os.environ["CAREERO_CACHE_DIR"] = tempfile.mkdtemp(prefix="careero-bench-")
+    if not args.semantic_cache:
+        os.environ["CAREERO_SEMANTIC_CACHE"] = "0"
+    if args.max_in_flight:
+        os.environ["CAREERO_LLM_MAX_IN_FLIGHT"] = str(args.max_in_flight)
+    os.environ["CAREERO_ROUTING"] = args.routing
+
+    import llm_gateway
+    from fake_llm import FakeBackend
+
+    backend = FakeBackend(
+        latency=args.latency, jitter=args.jitter, tokens_per_second=args.tokens_per_second,
+        error_rate=args.error_rate, malformed_rate=args.malformed_rate, seed=args.seed,
+        model_latency={
+            model.strip(): float(seconds)
+            for model, seconds in (pair.split("=") for pair in args.model_latency.split(",") if pair.strip())
+        },
+    )
+    llm_gateway.set_backend(backend)
+    llm_gateway.set_rate_limit(args.rpm)
+
+    levels = [int(level) for level in args.concurrency.split(",") if level.strip()]
+    rows = []
+    for name in args.scenario or SCENARIOS:
+        for level in levels:
+            row = run_scenario(name, args.requests, level, backend)
+            rows.append(row)
+            print(f"{name} x{level}: {row['throughput_rps']} req/s, p95 {row['p95_ms']} ms, {row['errors']} errors")
+
+    print()
+    print_table(rows)
+
+    import instrumentation
+    import model_router
+    tiers = model_router.tier_summary(instrumentation.load_records(limit=100_000))
+    if tiers:
+        print()
+        for row in tiers:
+            print(f"{row['tier']:>6}  {row['task']:<14} calls={row['calls']:<5} p50={row['p50_ms']}ms "
+                  f"escalated={row['escalation_rate']:.1%}")
+    if args.out:
+        with open(args.out, "w", encoding="utf-8") as f:
+            json.dump({"settings": vars(args), "results": rows}, f, indent=2)
+        print(f"\nWrote {args.out}")
+
+
+if __name__ == "__main__":
+    main()
@@ -1,84 +1,391 @@
 # In career_agent.py
 
-from langchain_google_genai import ChatGoogleGenerativeAI
-from langchain_core.prompts import ChatPromptTemplate
-from langchain_core.output_parsers import JsonOutputParser
-from langchain_core.exceptions import OutputParserException
+from concurrent.futures import ThreadPoolExecutor, as_completed
 
-def get_career_suggestions(survey_data: dict):
-    llm = ChatGoogleGenerativeAI(model="gemini-2.5-pro", temperature=0.5)
+from college_catalogue import CAREER_STREAMS, get_catalogue
+from result_cache import ResultCache, make_cache_key
+import instrumentation
+import llm_gateway
+import model_router
+from json_repair import repair_json
+from semantic_cache import SemanticCache, scope_key
+
+# Bump this whenever the prompt or output format changes so stale cached answers are not served.
+PROMPT_VERSION = 6
+
+# Stage 1 only picks three careers. College lists come from the local
+# catalogue; stage 2 (six calls in parallel) only runs for lists the catalogue
+# cannot fill. Both stages start on the fast tier (see model_router) and move
+# to the strong one only when a reply has no usable JSON.
+OWNERSHIP_TYPES = ("government", "private")
+COLLEGES_PER_LIST = 10
+
+CAREERS_PER_RESPONSE = 3
+
+# Keys every career and every college must have; anything missing one is re-requested.
+CAREER_KEYS = ("career_name", "average_salary", "reasoning")
+COLLEGE_KEYS = ("College Name", "Fees Range", "Location", "Entrances Required", "Difficulty Level", "Average Package")
+
+# Fields the survey page sends as comma-joined multiselect values.
+LIST_FIELDS = ("subjects", "interests", "cities")
+
+suggestion_cache = ResultCache("career_suggestions", max_memory_items=256, ttl_seconds=7 * 24 * 3600)
+# Near-duplicate surveys (a score of 74 vs 75, one interest more) reuse an answer.
+semantic_suggestions = SemanticCache("careers", threshold=0.97, ttl_seconds=7 * 24 * 3600)
 
-    json_format = """
+# Survey answers that must match exactly for a similar survey's answer to be reused
+# (they decide the stream and which catalogue colleges are listed); the rest are
+# compared by embedding similarity.
+SEMANTIC_EXACT_FIELDS = ("budget", "relocate", "home_state", "cities", "subjects")
+
+profile_template = """
+**Student Profile:**
+- Strongest Subjects: {subjects}
+- Class 12th Score: {score}%
+- Interests & Hobbies: {interests}
+- Work Style Preference: {work_style}
+- College Fee Budget: {budget} per year
+- Willingness to Relocate: {relocate}
+- Home State: {home_state}
+- Preferred Cities: {cities}
+"""
+
+careers_format = """
+{{
+  "careers": [
     {{
-      "careers": [
-        {{
-          "career_name": "Name of the career path",
-          "average_salary": "Average starting salary in INR, e.g., '₹6-8 Lakhs per annum'",
-          "top_colleges": {{
-            "government": [
-              {{ "College Name": "...", "Fees Range": "...", "Location": "...", "Entrances Required": "...", "Difficulty Level": "...", "Average Package": "..." }},
-              {{ "College Name": "...", "Fees Range": "...", "Location": "...", "Entrances Required": "...", "Difficulty Level": "...", "Average Package": "..." }},
-              "... 8 more colleges ..."
-            ],
-            "private": [
-              {{ "College Name": "...", "Fees Range": "...", "Location": "...", "Entrances Required": "...", "Difficulty Level": "...", "Average Package": "..." }},
-              {{ "College Name": "...", "Fees Range": "...", "Location": "...", "Entrances Required": "...", "Difficulty Level": "...", "Average Package": "..." }},
-              "... 8 more colleges ..."
-            ]
-          }},
-          "reasoning": "A brief paragraph explaining why this career is a good fit for the student."
-        }}
-      ]
+      "career_name": "Name of the career path",
+      "stream": "The field of study this career needs, exactly one of: """ + ", ".join(CAREER_STREAMS) + """",
+      "average_salary": "Average starting salary in INR, e.g., '₹6-8 Lakhs per annum'",
+      "reasoning": "A brief paragraph explaining why this career is a good fit for the student."
     }}
-    """
+  ]
+}}
+"""
+
+careers_template = """
+You are an expert career counselor AI. Your task is to provide {count} career path suggestions based on the student's profile.
+""" + profile_template + """
+Suggest EXACTLY {count} career paths. Do not list any colleges.
+{exclusions}
+
+Your entire response MUST be a single, valid JSON object that follows this exact format, with no other text or commentary.
+{format_instructions}
+"""
+
+colleges_format = """
+{{
+  "colleges": [
+    {{ "College Name": "...", "Fees Range": "...", "Location": "...", "Entrances Required": "...", "Difficulty Level": "...", "Average Package": "..." }},
+    {{ "College Name": "...", "Fees Range": "...", "Location": "...", "Entrances Required": "...", "Difficulty Level": "...", "Average Package": "..." }},
+    "... 8 more colleges ..."
+  ]
+}}
+"""
 
-    # UPDATED PROMPT to be extremely forceful and explicit
-    prompt_template = """
-    You are an expert career counselor AI. Your task is to provide three career path suggestions based on the student's profile.
-
-    **Student Profile:**
-    - Strongest Subjects: {subjects}
-    - Class 12th Score: {score}%
-    - Interests & Hobbies: {interests}
-    - Work Style Preference: {work_style}
-    - College Fee Budget: {budget} per year
-    - Willingness to Relocate: {relocate}
-    - Home State: {home_state}
-    - Preferred Cities: {cities}
-
-    **PRIMARY DIRECTIVE:**
-    Your single most important task is to generate comprehensive college lists. For EACH of the 3 career paths suggested, you MUST generate two lists of colleges: one for "government" and one for "private".
-
-    **NON-NEGOTIABLE RULE:**
-    **EACH of these lists (government and private) MUST CONTAIN EXACTLY 10 colleges.**
-    - Your response will be considered a failure if you provide fewer than 10 colleges in any list.
-    - The colleges in each list of 10 must be sorted by the latest available NIRF rankings.
-    - If 'Willingness to Relocate' is 'No', prioritize colleges within the student's 'Home State'.
-
-    Your entire response MUST be a single, valid JSON object that follows this exact format, with no other text or commentary.
-    {format_instructions}
+colleges_template = """
+You are an expert career counselor AI for Indian colleges. A student wants to pursue a career as: **{career_name}**.
+""" + profile_template + """
+**NON-NEGOTIABLE RULE:**
+List EXACTLY {count} {ownership} colleges in India for this career path.
+- Your response will be considered a failure if you provide fewer than {count} colleges.
+- The colleges must be sorted by the latest available NIRF rankings.
+- If 'Willingness to Relocate' is 'No', prioritize colleges within the student's 'Home State'.
+{exclusions}
+
+Your entire response MUST be a single, valid JSON object that follows this exact format, with no other text or commentary.
+{format_instructions}
+"""
+
+def canonicalize_survey(survey_data: dict) -> dict:
     """
+    Normalises a survey so that equivalent profiles produce the same cache key,
+    e.g. "Physics, Mathematics" and "Mathematics,Physics" are treated as equal.
+    """
+    canonical = {}
+    for key, value in survey_data.items():
+        if key in LIST_FIELDS and isinstance(value, str):
+            items = sorted({item.strip() for item in value.split(",") if item.strip()})
+            canonical[key] = ", ".join(items)
+        elif isinstance(value, str):
+            canonical[key] = value.strip()
+        else:
+            canonical[key] = value
+    return canonical
+
+def _cache_key(survey_data: dict) -> str:
+    return make_cache_key({
+        "version": PROMPT_VERSION,
+        "catalogue": get_catalogue().version,
+        "survey": survey_data,
+    })
 
-    parser = JsonOutputParser()
-    prompt = ChatPromptTemplate.from_template(
-        template=prompt_template,
-        partial_variables={"format_instructions": json_format}
+def _semantic_text(survey_data: dict) -> str:
+    return "; ".join(
+        f"{key}: {value}" for key, value in sorted(survey_data.items()) if key not in SEMANTIC_EXACT_FIELDS
     )
-    chain = prompt | llm | parser
 
-    max_retries = 3
-    for i in range(max_retries):
+def _semantic_scope(survey_data: dict) -> str:
+    return scope_key(
+        PROMPT_VERSION, get_catalogue().version, *(survey_data.get(field) for field in SEMANTIC_EXACT_FIELDS)
+    )
+
+def _cached_suggestions(survey_data: dict, cache_key: str, record) -> dict:
+    """Looks the survey up in the exact cache, then the semantic one. Returns None on a miss."""
+    cached = suggestion_cache.get(cache_key)
+    if cached is not None:
+        record.set(cache_hit="exact")
+        return cached
+    similar = semantic_suggestions.get(_semantic_text(survey_data), _semantic_scope(survey_data))
+    if similar is not None:
+        cached, similarity = similar
+        record.set(cache_hit="semantic", similarity=round(similarity, 4))
+        suggestion_cache.set(cache_key, cached)
+        return cached
+    record.set(cache_hit=False)
+    return None
+
+def _is_complete(response: dict, record) -> bool:
+    """Whether a response has every career and full college lists, and so may be cached."""
+    careers = response.get("careers", [])
+    if record.fields.get("failed_college_lists") or len(careers) < CAREERS_PER_RESPONSE:
+        return False
+    return all(len(career.get("top_colleges", {}).get(ownership, [])) >= COLLEGES_PER_LIST
+               for career in careers for ownership in OWNERSHIP_TYPES)
+
+def _store_suggestions(survey_data: dict, cache_key: str, response: dict, record) -> None:
+    # A partial answer (a failed call, a short list) is shown but not cached, so
+    # one transient error is not served to every matching profile for a week.
+    if not _is_complete(response, record):
+        record.set(partial=True)
+        print("Career suggestions are incomplete; not caching them.")
+        return
+    suggestion_cache.set(cache_key, response)
+    semantic_suggestions.set(_semantic_text(survey_data), _semantic_scope(survey_data), response)
+
+def _build_chain(tier: str, template: str, format_instructions: str):
+    # The chain returns raw text; `_invoke_json` parses and repairs it locally.
+    def factory():
+        from langchain_core.output_parsers import StrOutputParser
+        from langchain_core.prompts import ChatPromptTemplate
+        llm = model_router.chat_model(tier, temperature=0.5)
+        prompt = ChatPromptTemplate.from_template(
+            template=template,
+            partial_variables={"format_instructions": format_instructions}
+        )
+        return prompt | llm | StrOutputParser()
+    return llm_gateway.get_chain(("career_agent", tier, template), factory)
+
+def _invoke_json(task: str, template: str, format_instructions: str, inputs: dict, label: str,
+                 accept=None) -> dict:
+    # Quota and server errors are retried by the gateway. Syntax slips (fences,
+    # trailing commas, truncation) are repaired locally; only a reply with no
+    # usable JSON at all (or one `accept` rejects) is requested again, from the
+    # strong tier.
+    from langchain_core.exceptions import OutputParserException
+
+    def attempt(tier):
+        text = llm_gateway.invoke(_build_chain(tier, template, format_instructions), inputs)
         try:
-            print(f"Attempt {i+1} of {max_retries} to call the AI...")
-            response = chain.invoke(survey_data)
-            return response
-        except OutputParserException as e:
-            print(f"Attempt {i+1} failed: The AI did not return valid JSON. Retrying... Error: {e}")
-            if i == max_retries - 1:
-                raise e
-        except Exception as e:
-            print(f"An unexpected error occurred: {e}")
-            if i == max_retries - 1:
-                raise e
-    
-    return None
\ No newline at end of file
+            response = repair_json(text)
+            if not isinstance(response, dict):
+                raise ValueError("Expected a JSON object.")
+        except ValueError as e:
+            print(f"[{label}] The {tier} tier did not return usable JSON. Error: {e}")
+            raise
+        return response
+
+    prompt_chars = len(template) + sum(len(str(value)) for value in inputs.values())
+    try:
+        return model_router.run(task, attempt, prompt_chars=prompt_chars, structured=True, accept=accept)
+    except ValueError as e:
+        raise OutputParserException(f"[{label}] No usable JSON: {e}") from e
+
+def _exclusions(kind: str, names: list) -> str:
+    if not names:
+        return ""
+    return f"Do not include these {kind}, which the student already has: {', '.join(names)}."
+
+def _valid_items(items, keys: tuple, name_key: str, seen: set = None) -> list:
+    """Keeps the entries that have every required key filled in, dropping duplicates by name."""
+    seen = set() if seen is None else seen
+    valid = []
+    for item in items if isinstance(items, list) else []:
+        if not isinstance(item, dict) or not all(str(item.get(key, "")).strip() for key in keys):
+            continue
+        name = str(item[name_key]).strip().lower()
+        if name not in seen:
+            seen.add(name)
+            valid.append(item)
+    return valid
+
+def _pick_careers(survey_data: dict) -> list:
+    """
+    Stage 1: a small call that only names the careers and explains them. If
+    fewer than three valid careers come back, only the missing ones are
+    requested again.
+    """
+    careers, seen = [], set()
+    for attempt in range(2):
+        missing = CAREERS_PER_RESPONSE - len(careers)
+        inputs = dict(survey_data, count=missing, exclusions=_exclusions("careers", [c["career_name"] for c in careers]))
+        response = _invoke_json(
+            "careers", careers_template, careers_format, inputs,
+            "careers" if attempt == 0 else f"careers (top-up of {missing})",
+            accept=lambda response: bool(_valid_items(response.get("careers"), CAREER_KEYS, "career_name")),
+        )
+        careers += _valid_items(response.get("careers"), CAREER_KEYS, "career_name", seen)[:missing]
+        if len(careers) == CAREERS_PER_RESPONSE:
+            break
+        instrumentation.count("repairs")
+    if not careers:
+        raise ValueError("The AI did not suggest any valid careers.")
+    return careers
+
+def _get_college_list(survey_data: dict, career_name: str, ownership: str,
+                      count: int = COLLEGES_PER_LIST, exclude: list = ()) -> list:
+    """Stage 2: one call per career and ownership type. Returns only valid, distinct colleges."""
+    inputs = dict(survey_data, career_name=career_name, ownership=ownership, count=count,
+                  exclusions=_exclusions("colleges", list(exclude)))
+    response = _invoke_json(
+        "colleges", colleges_template, colleges_format, inputs, f"{career_name} / {ownership}",
+        accept=lambda response: bool(_valid_items(response.get("colleges"), COLLEGE_KEYS, "College Name")),
+    )
+    seen = {name.lower() for name in exclude}
+    return _valid_items(response.get("colleges"), COLLEGE_KEYS, "College Name", seen)[:count]
+
+def _complete_college_list(survey_data: dict, career_name: str, ownership: str, colleges: list) -> list:
+    """
+    Fills `colleges` (possibly empty, e.g. a partial list from the catalogue) up
+    to COLLEGES_PER_LIST, asking only for the missing entries. At most one
+    top-up follows the first request, so a short answer costs one small call
+    rather than a whole new generation.
+    """
+    colleges = list(colleges)
+    for attempt in range(2):
+        missing = COLLEGES_PER_LIST - len(colleges)
+        if missing <= 0:
+            break
+        if attempt:
+            instrumentation.count("repairs")
+        exclude = [college["College Name"] for college in colleges]
+        colleges += _get_college_list(survey_data, career_name, ownership, count=missing, exclude=exclude)
+    if len(colleges) < COLLEGES_PER_LIST:
+        print(f"[{career_name} / {ownership}] Only {len(colleges)} of {COLLEGES_PER_LIST} colleges found.")
+    return colleges[:COLLEGES_PER_LIST]
+
+def _catalogue_colleges(survey_data: dict, stream: str, ownership: str) -> list:
+    """Returns the catalogue's colleges for a list (possibly fewer than needed, or none)."""
+    if stream not in CAREER_STREAMS:
+        return []
+    return get_catalogue().find_colleges(
+        stream, ownership,
+        budget=survey_data.get("budget"),
+        relocate=survey_data.get("relocate", "Yes"),
+        home_state=survey_data.get("home_state"),
+        cities=survey_data.get("cities"),
+        limit=COLLEGES_PER_LIST,
+    )
+
+def _with_record(record, fn, *args):
+    # Worker threads do not inherit the caller's context, so LLM calls made
+    # there are attributed to the caller's record explicitly.
+    with instrumentation.activate(record):
+        return fn(*args)
+
+def _generate_careers(survey_data: dict, record):
+    """
+    Runs the two-stage pipeline and yields `(index, career)` as each career's
+    college lists finish. A list the LLM still cannot fill keeps whatever
+    valid colleges it has instead of failing the whole response.
+    """
+    careers = _with_record(record, _pick_careers, survey_data)
+    pending = []
+    for i, career in enumerate(careers):
+        career["top_colleges"] = {}
+        stream = str(career.pop("stream", "")).strip().lower()
+        for ownership in OWNERSHIP_TYPES:
+            colleges = _catalogue_colleges(survey_data, stream, ownership)
+            if len(colleges) < COLLEGES_PER_LIST:
+                # The LLM only tops up what the catalogue could not fill.
+                pending.append((i, ownership, colleges))
+            else:
+                career["top_colleges"][ownership] = colleges
+        if len(career["top_colleges"]) == len(OWNERSHIP_TYPES):
+            yield i, career
+
+    if not pending:
+        return
+
+    with ThreadPoolExecutor(max_workers=len(pending)) as pool:
+        futures = {
+            pool.submit(_with_record, record, _complete_college_list, survey_data,
+                        careers[i]["career_name"], ownership, colleges): (i, ownership, colleges)
+            for i, ownership, colleges in pending
+        }
+        for future in as_completed(futures):
+            i, ownership, colleges = futures[future]
+            try:
+                careers[i]["top_colleges"][ownership] = future.result()
+            except Exception as e:
+                print(f"Could not get {ownership} colleges for {careers[i]['career_name']}: {e}")
+                careers[i]["top_colleges"][ownership] = colleges
+                record.add("failed_college_lists")
+            if len(careers[i]["top_colleges"]) == len(OWNERSHIP_TYPES):
+                yield i, careers[i]
+
+def get_career_suggestions(survey_data: dict):
+    survey_data = canonicalize_survey(survey_data)
+    cache_key = _cache_key(survey_data)
+    with instrumentation.track("get_career_suggestions") as record:
+        cached = _cached_suggestions(survey_data, cache_key, record)
+        if cached is not None:
+            print("Returning cached career suggestions.")
+            return cached
+
+        careers = [None] * CAREERS_PER_RESPONSE
+        for i, career in _generate_careers(survey_data, record):
+            careers[i] = career
+        response = {"careers": [career for career in careers if career is not None]}
+        _store_suggestions(survey_data, cache_key, response, record)
+    return response
+
+def stream_career_suggestions(survey_data: dict):
+    """
+    Streaming variant of `get_career_suggestions`.
+
+    Yields `(index, career)` for each career as soon as both of its college
+    lists are ready, so careers may arrive out of order. `index` is the
+    career's position in the final result.
+    """
+    survey_data = canonicalize_survey(survey_data)
+    cache_key = _cache_key(survey_data)
+
+    # A generator can be paused between yields, so the record is finished by
+    # hand rather than with `track`. Time to first token is time to first career.
+    record = instrumentation.CallRecord("stream_career_suggestions")
+    error = None
+    try:
+        with instrumentation.activate(record):
+            cached = _cached_suggestions(survey_data, cache_key, record)
+        if cached is not None:
+            for i, career in enumerate(cached.get("careers", [])):
+                record.mark_first_token()
+                yield i, career
+            return
+
+        careers = [None] * CAREERS_PER_RESPONSE
+        for i, career in _generate_careers(survey_data, record):
+            careers[i] = career
+            record.mark_first_token()
+            yield i, career
+        _store_suggestions(survey_data, cache_key, {"careers": [career for career in careers if career is not None]},
+                           record)
+    except GeneratorExit:
+        record.set(cancelled=True)
+        raise
+    except Exception as e:
+        error = e
+        raise
+    finally:
+        record.finish(error)
@@ -1,28 +1,157 @@
 # In chat_agent.py, replace everything with this code
 
-import google.generativeai as genai
 import os
+from types import SimpleNamespace
 
-genai.configure(api_key=os.environ['GOOGLE_API_KEY'])
-
-def call_chat_agent(messages: list, system_prompt: str):
-    model = genai.GenerativeModel('gemini-2.5-flash',
-                                  system_instruction=system_prompt)
-    
-    # --- THIS IS THE NEW, CRITICAL FIX ---
-    # Convert the message history to the format Gemini's API requires.
-    # The API expects a 'parts' key with a list containing the text.
-    formatted_messages = []
-    for msg in messages:
-        # The role must be "user" or "model"
-        if msg.get("role") in ["user", "model"]:
-            formatted_messages.append({
-                "role": msg["role"],
-                "parts": [{"text": msg["content"]}]
-            })
-
-    response = model.generate_content(
-        formatted_messages, # Send the newly formatted list
-        stream=True,
+import instrumentation
+import llm_gateway
+import model_router
+from chat_stream import ChatTurn
+from semantic_cache import SemanticCache, scope_key
+
+# Reworded questions about the same resume and job description reuse an answer.
+chat_answers = SemanticCache("chat", threshold=0.93, ttl_seconds=24 * 3600)
+
+# Follow-up questions up to this long ("and for Java?") go to the lite tier.
+FOLLOWUP_MAX_CHARS = 200
+
+# Resume and job description pairs longer than this are not sent in full; each
+# question gets only its most relevant sections (see section_index.py).
+RETRIEVAL = os.environ.get("CAREERO_CHAT_RETRIEVAL", "1").lower() not in ("0", "false", "no")
+RETRIEVAL_MIN_CHARS = int(os.environ.get("CAREERO_RETRIEVAL_MIN_CHARS", "6000"))
+RETRIEVAL_TOP_K = int(os.environ.get("CAREERO_RETRIEVAL_TOP_K", "4"))
+
+def _recent_questions(messages: list) -> str:
+    # The question before the latest one gives follow-ups ("tell me more") their subject.
+    questions = [msg.get("content", "") for msg in messages or [] if msg.get("role") == "user"]
+    return "\n".join(questions[-2:])
+
+def _format_sections(sections: list) -> str:
+    return "\n\n".join(f"[{section['section'].title()}]\n{section['text']}" for section in sections)
+
+def _retrieval_system_prompt(resume: str, job_description: str, question: str) -> str:
+    from section_index import relevant_sections
+
+    with instrumentation.track("retrieve_sections", top_k=RETRIEVAL_TOP_K) as record:
+        found = relevant_sections(resume, job_description, question, top_k=RETRIEVAL_TOP_K)
+        prompt = f"""
+    You are a career advisor for a candidate. Below are the sections of their resume (delimited by <<<>>>) and of the job description (delimited by ((( )))) most relevant to the current question.
+    Resume sections: <<< {_format_sections(found["resume"]) or "(none relevant)"} >>>
+    Job description sections: ((( {_format_sections(found["job"]) or "(none relevant)"} )))
+    All resume sections: {", ".join(found["outline"]["resume"])}. All job description sections: {", ".join(found["outline"]["job"])}.
+    Answer the questions giving the given information only. If the answer needs a section that is not shown, say which one it is. If you don't know the answer, say that you don't know.
+    """
+        record.set(system_prompt_chars=len(prompt), full_chars=len(resume) + len(job_description))
+    return prompt
+
+def advisor_system_prompt(resume: str, job_description: str, messages: list = None) -> str:
+    """
+    The chat's system prompt. When `messages` is given and the resume and job
+    description are long, only the sections relevant to the latest questions
+    are included; otherwise both documents are included in full.
+    """
+    question = _recent_questions(messages)
+    if RETRIEVAL and question and len(resume) + len(job_description) > RETRIEVAL_MIN_CHARS:
+        try:
+            return _retrieval_system_prompt(resume, job_description, question)
+        except Exception as e:
+            # Retrieval only saves tokens; the full documents still answer the question.
+            print(f"Section retrieval failed, sending the full resume and job description: {e}")
+    return f"""
+    You are a career advisor for a candidate with the resume delimited by <<<>>> and the job description delimited by ((( ))).
+    Resume: <<< {resume} >>>
+    Job description: ((( {job_description} )))
+    Answer the questions giving the given information only. If you don't know the answer, say that you don't know.
+    """
+
+def _chat_task(messages: list, system_prompt: str) -> tuple:
+    """Returns `(task, tier)` for the turn; the system prompt is sized too, as its sections change per question."""
+    question = messages[-1].get("content", "") if messages else ""
+    followup = any(msg.get("role") == "model" for msg in messages) and len(question) <= FOLLOWUP_MAX_CHARS
+    task = "chat_followup" if followup else "chat"
+    prompt_chars = len(system_prompt or "") + sum(len(msg.get("content", "")) for msg in messages)
+    return task, model_router.classify(task, prompt_chars)
+
+def _format_messages(messages: list) -> list:
+    # Gemini expects {"role": "user" | "model", "parts": [{"text": ...}]}
+    return [
+        {"role": msg["role"], "parts": [{"text": msg["content"]}]}
+        for msg in messages if msg.get("role") in ("user", "model")
+    ]
+
+def start_chat_turn(messages: list, system_prompt: str) -> ChatTurn:
+    """
+    Prepares the answer to the latest message as a `ChatTurn`; iterate
+    `turn.stream()` (or `turn.astream()`) to run it. Reworded questions may be
+    answered from the semantic cache.
+
+    The tier is picked up front, since a streamed answer cannot be checked and
+    escalated. Gemini serves chat even when a local model is configured. If the
+    model has not started answering by the first-token deadline, the turn
+    switches to a fallback tier.
+    """
+    task, tier = _chat_task(messages, system_prompt)
+    fallback_tier = "fast" if tier == "lite" else "lite"
+    formatted_messages = _format_messages(messages)
+    record = instrumentation.CallRecord("chat_turn", messages=len(formatted_messages))
+    question, scope = _semantic_key(messages, system_prompt)
+
+    with instrumentation.activate(record):
+        cached = chat_answers.get(question, scope) if question else None
+    if cached is not None:
+        answer, similarity = cached
+        record.set(cache_hit="semantic", similarity=round(similarity, 4))
+
+        async def replay():
+            # Same shape as a streamed Gemini chunk
+            yield SimpleNamespace(text=answer)
+        return ChatTurn(replay, record)
+
+    def opener(tier_name: str):
+        model_name = model_router.model_name(tier_name, local=False)
+
+        def open_stream():
+            # Only calls that reach a model count towards the tier's latency.
+            record.set(task=task, tier=tier_name, model=model_name)
+            # The gateway reuses one client per system prompt and configures the API key lazily
+            model = llm_gateway.get_genai_model(model_name, system_instruction=system_prompt)
+            return llm_gateway.astream_content(model, formatted_messages, record=record)
+        return open_stream
+
+    def on_complete(answer: str) -> None:
+        # Only complete answers are cached
+        if question and answer:
+            chat_answers.set(question, scope, answer)
+
+    return ChatTurn(opener(tier), record, open_fallback=opener(fallback_tier), on_complete=on_complete)
+
+def _semantic_key(messages: list, system_prompt: str) -> tuple:
+    """
+    The text and scope a chat turn is cached under: the latest question plus
+    the one before it (so follow-ups like "tell me more" only match in the same
+    context), scoped to this exact system prompt: the resume and job
+    description (or the sections retrieved from them) and the summary.
+    """
+    if not messages or messages[-1].get("role") != "user":
+        return None, None
+    return _recent_questions(messages), scope_key("chat", system_prompt)
+
+def summarize_messages(previous_summary: str, messages: list) -> str:
+    """
+    Folds `messages` into `previous_summary` and returns the new summary.
+    Used by ChatContext to keep long chats within the token budget.
+    """
+    transcript = "\n".join(
+        f"{'Candidate' if msg.get('role') == 'user' else 'Advisor'}: {msg.get('content', '')}"
+        for msg in messages
+    )
+    prompt = (
+        "You maintain a running summary of an interview-preparation chat between a candidate and a career advisor.\n"
+        f"Current summary: {previous_summary or '(empty)'}\n\n"
+        f"New messages:\n{transcript}\n\n"
+        "Rewrite the summary so it also covers the new messages. Keep every question asked, "
+        "the key facts and advice given, and any commitments. Answer with the summary only, in under 200 words."
     )
-    return response
\ No newline at end of file
+    tier = model_router.classify("summary", len(prompt))
+    model = llm_gateway.get_genai_model(model_router.model_name(tier, local=False))
+    return llm_gateway.generate_content(model, prompt).text.strip()
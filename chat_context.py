@@ -0,0 +1,125 @@
+# In chat_context.py
+
+import hashlib
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+# Summaries are cheap flash calls; a small shared pool is enough for every session.
+_summary_pool = ThreadPoolExecutor(max_workers=2, thread_name_prefix="chat-summary")
+
+
+def estimate_tokens(text: str) -> int:
+    """Rough token count (about four characters per token for English text)."""
+    return len(text) // 4 + 1 if text else 0
+
+
+def _fingerprint(messages: list) -> str:
+    digest = hashlib.sha256()
+    for msg in messages:
+        digest.update(msg.get("role", "").encode("utf-8"))
+        digest.update(b"\0")
+        digest.update(msg.get("content", "").encode("utf-8"))
+        digest.update(b"\0")
+    return digest.hexdigest()
+
+
+class ChatContext:
+    """
+    Decides what part of a chat history is sent to the model on each turn.
+
+    The last `keep_last_turns` turns (a user message plus the model's reply)
+    are sent verbatim. Older messages are folded into a rolling summary by
+    `summarize(previous_summary, messages) -> str`, which runs in a background
+    thread so it never delays a reply. The whole request is kept within
+    `token_budget` by dropping the oldest verbatim messages first.
+    """
+
+    def __init__(self, summarize, token_budget: int = 8000, keep_last_turns: int = 4):
+        self.summarize = summarize
+        self.token_budget = token_budget
+        self.keep_last_turns = keep_last_turns
+
+        self.summary = ""
+        self._folded = 0               # number of leading messages covered by `summary`
+        self._folded_fingerprint = _fingerprint([])
+        self._pending = None           # Future for the summary being computed
+        self._lock = threading.Lock()
+        self.last_usage = {}
+
+    def _reset_if_changed(self, messages: list) -> None:
+        # A different history (e.g. one loaded from the sidebar) invalidates the summary.
+        if len(messages) < self._folded or _fingerprint(messages[:self._folded]) != self._folded_fingerprint:
+            self.summary = ""
+            self._folded = 0
+            self._folded_fingerprint = _fingerprint([])
+            self._pending = None
+
+    def _window_start(self, messages: list) -> int:
+        """Index of the first message that must stay verbatim."""
+        return max(0, len(messages) - 2 * self.keep_last_turns)
+
+    def _collect_summary(self) -> None:
+        pending = self._pending
+        if pending is None or not pending.done():
+            return
+        self._pending = None
+        try:
+            summary, folded, fingerprint = pending.result()
+        except Exception as e:
+            print(f"Chat summary failed, keeping the previous one. Error: {e}")
+            return
+        self.summary, self._folded, self._folded_fingerprint = summary, folded, fingerprint
+
+    def schedule_summary(self, messages: list) -> None:
+        """Starts folding any messages older than the verbatim window into the summary."""
+        with self._lock:
+            self._reset_if_changed(messages)
+            self._collect_summary()
+            cutoff = self._window_start(messages)
+            if self._pending is not None or cutoff <= self._folded:
+                return
+            to_fold = [dict(msg) for msg in messages[self._folded:cutoff]]
+            fingerprint = _fingerprint(messages[:cutoff])
+            previous = self.summary
+
+            def job():
+                return self.summarize(previous, to_fold), cutoff, fingerprint
+
+            self._pending = _summary_pool.submit(job)
+
+    def build(self, messages: list, system_prompt: str) -> tuple:
+        """
+        Returns `(messages_to_send, system_prompt, usage)` for the next turn.
+
+        `usage` reports the estimated tokens sent: the system prompt (which
+        includes the summary) and the verbatim history.
+        """
+        with self._lock:
+            self._reset_if_changed(messages)
+            self._collect_summary()
+            summary = self.summary
+            # Anything not yet summarized stays verbatim, budget permitting.
+            window = list(messages[self._folded:])
+
+        if summary:
+            system_prompt = (
+                f"{system_prompt}\n"
+                f"Summary of the earlier conversation: [[[ {summary} ]]]\n"
+            )
+
+        system_tokens = estimate_tokens(system_prompt)
+        history_tokens = sum(estimate_tokens(msg["content"]) for msg in window)
+        while len(window) > 1 and system_tokens + history_tokens > self.token_budget:
+            history_tokens -= estimate_tokens(window.pop(0)["content"])
+        # Gemini expects the conversation to start with a user message.
+        while len(window) > 1 and window[0].get("role") != "user":
+            history_tokens -= estimate_tokens(window.pop(0)["content"])
+
+        self.last_usage = {
+            "system_tokens": system_tokens,
+            "history_tokens": history_tokens,
+            "summary_tokens": estimate_tokens(summary),
+            "messages_sent": len(window),
+            "total_tokens": system_tokens + history_tokens,
+        }
+        return window, system_prompt, self.last_usage
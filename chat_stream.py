@@ -0,0 +1,231 @@
+# In chat_stream.py
+
+"""
+Streaming pipeline for chat answers. A `ChatTurn` streams one answer as an
+asyncio task, so it can be cancelled mid-generation (which closes the request
+instead of letting it run on). Each turn has an overall timeout, and a
+first-token deadline after which it switches to a fallback model. The turn's
+record gets its time to first token and tokens per second.
+
+Async code (the HTTP API) iterates `turn.astream()`. Streamlit iterates
+`turn.stream()`, which runs the turn on a shared background event loop.
+"""
+
+import asyncio
+import os
+import queue
+import threading
+import time
+
+import instrumentation
+from chat_context import estimate_tokens
+
+TURN_TIMEOUT_SECONDS = float(os.environ.get("CAREERO_CHAT_TIMEOUT", "90"))
+FIRST_TOKEN_DEADLINE_SECONDS = float(os.environ.get("CAREERO_CHAT_FIRST_TOKEN_DEADLINE", "12"))
+
+# Appended to partial answers kept in the history.
+INTERRUPTED_MARKERS = {
+    "cancelled": "_(Answer interrupted.)_",
+    "timeout": "_(Answer cut short: the response took too long.)_",
+    "error": "_(Answer failed before it was complete.)_",
+}
+
+_DONE = object()
+_loop = None
+_loop_lock = threading.Lock()
+
+
+def _get_loop() -> asyncio.AbstractEventLoop:
+    global _loop
+    with _loop_lock:
+        if _loop is None:
+            _loop = asyncio.new_event_loop()
+            threading.Thread(target=_loop.run_forever, name="careero-chat-stream", daemon=True).start()
+        return _loop
+
+
+def _chunk_text(chunk, record) -> str:
+    try:
+        return chunk.text
+    except ValueError:
+        # Chunks without text (e.g. only a finish reason) raise ValueError in the genai client.
+        record.add("empty_chunks")
+        return ""
+
+
+class ChatTurn:
+    """
+    One streamed chat answer. `open_stream()` and `open_fallback()` return
+    async iterators of response chunks (see `llm_gateway.astream_content`).
+    `on_complete(text)` runs, on a worker thread, only when the whole answer
+    arrived.
+
+    After the stream ends, `status` is "complete", "cancelled", "timeout" or
+    "error", and `text` holds whatever arrived.
+    """
+
+    def __init__(self, open_stream, record: instrumentation.CallRecord, open_fallback=None, on_complete=None,
+                 timeout: float = TURN_TIMEOUT_SECONDS, first_token_deadline: float = FIRST_TOKEN_DEADLINE_SECONDS):
+        self._open_stream = open_stream
+        self._open_fallback = open_fallback
+        self._on_complete = on_complete
+        self.record = record
+        self.timeout = timeout
+        self.first_token_deadline = first_token_deadline
+        self.parts = []
+        self.status = "pending"
+        self._future = None
+        self._cancelled = threading.Event()
+
+    @property
+    def text(self) -> str:
+        return "".join(self.parts)
+
+    @property
+    def done(self) -> bool:
+        return self.status not in ("pending", "streaming")
+
+    async def _first_chunk(self, stream, deadline: float):
+        try:
+            return await asyncio.wait_for(stream.__anext__(), max(0.0, deadline - time.monotonic()))
+        except StopAsyncIteration:
+            return None
+
+    async def astream(self):
+        """Yields the answer's text as it arrives."""
+        started = time.monotonic()
+        turn_deadline = started + self.timeout
+        first_token_at = None
+        stream = None
+        self.status = "streaming"
+        try:
+            stream = self._open_stream()
+            try:
+                chunk = await self._first_chunk(stream, min(turn_deadline, started + self.first_token_deadline))
+            except asyncio.TimeoutError:
+                if self._open_fallback is None:
+                    raise
+                # The model is slow to start (overloaded, cold); ask the fallback instead.
+                await stream.aclose()
+                self.record.set(fallback=True)
+                stream = self._open_fallback()
+                chunk = await self._first_chunk(stream, turn_deadline)
+            while chunk is not None:
+                text = _chunk_text(chunk, self.record)
+                if text:
+                    if first_token_at is None:
+                        first_token_at = time.monotonic()
+                        self.record.mark_first_token()
+                    self.parts.append(text)
+                    yield text
+                try:
+                    chunk = await asyncio.wait_for(stream.__anext__(), max(0.0, turn_deadline - time.monotonic()))
+                except StopAsyncIteration:
+                    chunk = None
+            self.status = "complete"
+        except asyncio.TimeoutError:
+            self.status = "timeout"
+        except (asyncio.CancelledError, GeneratorExit):
+            self.status = "cancelled"
+            raise
+        except Exception:
+            self.status = "error"
+            raise
+        finally:
+            if stream is not None:
+                await stream.aclose()
+            self._finish(first_token_at)
+
+    def _finish(self, first_token_at: float) -> None:
+        tokens = self.record.fields.get("output_tokens") or estimate_tokens(self.text)
+        self.record.set(outcome=self.status, answer_chars=len(self.text))
+        if first_token_at is not None:
+            elapsed = time.monotonic() - first_token_at
+            if elapsed > 0:
+                self.record.set(tokens_per_second=round(tokens / elapsed, 1))
+        self.record.finish()
+        if self.status == "complete" and self._on_complete is not None:
+            # on_complete may embed and write to a cache; run it off the event
+            # loop so it does not stall the other streams sharing the loop.
+            asyncio.get_running_loop().run_in_executor(None, self._complete, self.text)
+
+    def _complete(self, text: str) -> None:
+        try:
+            self._on_complete(text)
+        except Exception as e:
+            print(f"Chat turn completion hook failed: {e}")
+
+    def abandon(self) -> None:
+        """Finishes the record of a turn that was never streamed (e.g. its client left first)."""
+        if self.status == "pending":
+            self.status = "cancelled"
+            self._finish(None)
+
+    def stream(self):
+        """
+        Plain generator over the answer's text for synchronous callers. The turn
+        runs on the background event loop; closing the generator cancels it.
+        """
+        items = queue.Queue()
+
+        async def pump():
+            try:
+                async for text in self.astream():
+                    items.put(text)
+            except BaseException as e:
+                items.put(e)
+                raise
+            finally:
+                items.put(_DONE)
+
+        self._future = asyncio.run_coroutine_threadsafe(pump(), _get_loop())
+        if self._cancelled.is_set():
+            self._future.cancel()
+        try:
+            while True:
+                item = items.get()
+                if item is _DONE:
+                    break
+                if isinstance(item, asyncio.CancelledError):
+                    break
+                if isinstance(item, BaseException):
+                    raise item
+                yield item
+        finally:
+            self.cancel()
+
+    def cancel(self) -> None:
+        """Stops a turn started with `stream()`; it keeps what has arrived so far."""
+        self._cancelled.set()
+        if self._future is not None and not self._future.done():
+            self._future.cancel()
+
+    def history_message(self) -> dict:
+        """The answer as a chat message; partial answers end with a marker and are flagged."""
+        if self.status in ("complete", "pending"):
+            return {"role": "model", "content": self.text}
+        marker = INTERRUPTED_MARKERS.get(self.status, INTERRUPTED_MARKERS["cancelled"])
+        content = f"{self.text}\n\n{marker}" if self.text else marker
+        return {"role": "model", "content": content, "interrupted": True}
+
+
+class ChatStreams:
+    """
+    The chat turn streaming in one session. Starting a turn cancels the one
+    before it, and the session's turn is cancelled when the session is dropped.
+    """
+
+    def __init__(self):
+        self.current = None
+
+    def start(self, turn: ChatTurn) -> ChatTurn:
+        self.cancel()
+        self.current = turn
+        return turn
+
+    def cancel(self) -> None:
+        if self.current is not None and not self.current.done:
+            self.current.cancel()
+
+    def __del__(self):
+        self.cancel()
@@ -0,0 +1,218 @@
+# In college_catalogue.py
+
+import csv
+import hashlib
+import math
+import os
+from array import array
+from functools import lru_cache
+
+CATALOGUE_PATH = os.environ.get(
+    "CAREERO_COLLEGES_CSV",
+    os.path.join(os.path.dirname(os.path.abspath(__file__)), "data", "colleges.csv"),
+)
+
+# The career streams the catalogue is indexed by. Stage 1 of the career agent
+# must label every career with one of these.
+CAREER_STREAMS = (
+    "engineering", "medicine", "law", "management", "design",
+    "architecture", "pharmacy", "science", "commerce", "arts",
+)
+
+# NIRF ranks each category separately, so a stream's view is ordered by the
+# categories that cover it, in turn: colleges ranked in the first category come
+# first (by that rank), then those only ranked in the next one, and so on. The
+# university and overall rankings are the last resort for every stream.
+NIRF_CATEGORIES = {
+    "engineering": ("engineering",),
+    "medicine": ("medical",),
+    "law": ("law",),
+    "management": ("management",),
+    "design": (),
+    "architecture": ("architecture",),
+    "pharmacy": ("pharmacy",),
+    "science": ("university", "college"),
+    "commerce": ("college",),
+    "arts": ("college",),
+}
+NIRF_FALLBACK_CATEGORIES = ("university", "overall")
+
+# Upper bound (annual fees, in lakhs) for each budget option on the survey page.
+FEE_BANDS = (
+    ("Less than ₹2 Lakhs", 2.0),
+    ("₹2 Lakhs - ₹5 Lakhs", 5.0),
+    ("₹5 Lakhs - ₹10 Lakhs", 10.0),
+    ("More than ₹10 Lakhs", math.inf),
+)
+
+
+def _split(value: str) -> tuple:
+    return tuple(item.strip() for item in value.split(";") if item.strip())
+
+
+def _ranks(value: str) -> dict:
+    """Parses "engineering:12;overall:30" into {"engineering": 12, "overall": 30}."""
+    ranks = {}
+    for item in _split(value):
+        category, _, rank = item.partition(":")
+        ranks[category.strip().lower()] = int(rank)
+    return ranks
+
+
+def _categories(stream: str) -> tuple:
+    categories = NIRF_CATEGORIES.get(stream, ())
+    return categories + tuple(c for c in NIRF_FALLBACK_CATEGORIES if c not in categories)
+
+
+def _format_lakhs(value: float) -> str:
+    if value < 1:
+        return f"₹{value * 100000:,.0f}"
+    return f"₹{value:g} Lakh" if value == 1 else f"₹{value:g} Lakhs"
+
+
+class CollegeCatalogue:
+    """
+    Read-only, column-oriented view of the bundled college dataset.
+
+    Each CSV column is stored as one tuple (or a numeric array), and rows are
+    referred to by their integer position. Lookups go through precomputed
+    indexes of row ids, so a query never scans the whole table and only the
+    returned rows are turned into dicts.
+
+    NIRF ranks are stored per category ("engineering:12"), since each NIRF
+    category is ranked on its own scale. Fees, packages and NIRF positions are
+    indicative; refresh the CSV from the latest NIRF release and college
+    prospectuses.
+    """
+
+    def __init__(self, path: str = CATALOGUE_PATH):
+        with open(path, "rb") as f:
+            raw = f.read()
+        self.version = hashlib.sha256(raw).hexdigest()[:12]
+        records = list(csv.DictReader(raw.decode("utf-8").splitlines()))
+
+        self.name = tuple(r["name"] for r in records)
+        self.ownership = tuple(r["ownership"].lower() for r in records)
+        self.city = tuple(r["city"] for r in records)
+        self.state = tuple(r["state"] for r in records)
+        self.streams = tuple(_split(r["streams"].lower()) for r in records)
+        self.entrances = tuple(_split(r["entrances"]) for r in records)
+        self.fee_min = array("d", (float(r["fee_min"]) for r in records))
+        self.fee_max = array("d", (float(r["fee_max"]) for r in records))
+        self.nirf_ranks = tuple(_ranks(r["nirf_ranks"]) for r in records)
+        self.difficulty = tuple(r["difficulty"] for r in records)
+        self.avg_package = array("d", (float(r["avg_package_lpa"]) if r["avg_package_lpa"] else math.nan for r in records))
+
+        self._build_indexes()
+
+    def __len__(self) -> int:
+        return len(self.name)
+
+    def _build_indexes(self) -> None:
+        def index(keys_per_row):
+            result = {}
+            for row, keys in enumerate(keys_per_row):
+                for key in keys:
+                    result.setdefault(key, []).append(row)
+            return {key: frozenset(rows) for key, rows in result.items()}
+
+        rows = range(len(self))
+        self.by_state = index((self.state[row].lower(),) for row in rows)
+        self.by_city = index((self.city[row].lower(),) for row in rows)
+        self.by_ownership = index((self.ownership[row],) for row in rows)
+        self.by_stream = index(self.streams)
+        self.by_entrance = index(tuple(e.lower() for e in entrances) for entrances in self.entrances)
+        self.by_fee_band = index((self._fee_band(self.fee_min[row]),) for row in rows)
+
+        # Colleges whose cheapest fees fit within each budget option.
+        self.affordable = {}
+        seen = frozenset()
+        for label, _ in FEE_BANDS:
+            seen = seen | self.by_fee_band.get(label, frozenset())
+            self.affordable[label] = seen
+
+        # NIRF-sorted views per stream, each by its own categories (see NIRF_CATEGORIES);
+        # unranked colleges go last, ties keep CSV order.
+        self.nirf_views = {}
+        for stream in self.by_stream:
+            order = sorted(self.by_stream[stream], key=lambda row: (*self._nirf_position(row, stream), row))
+            for ownership in self.by_ownership:
+                members = self.by_ownership[ownership]
+                self.nirf_views[(stream, ownership)] = tuple(row for row in order if row in members)
+
+    def _nirf_position(self, row: int, stream: str) -> tuple:
+        """`(category index, rank)` of the first of the stream's categories the college is ranked in."""
+        categories = _categories(stream)
+        for i, category in enumerate(categories):
+            if category in self.nirf_ranks[row]:
+                return i, self.nirf_ranks[row][category]
+        return len(categories), math.inf
+
+    @staticmethod
+    def _fee_band(fee: float) -> str:
+        for label, upper in FEE_BANDS:
+            if fee <= upper:
+                return label
+        return FEE_BANDS[-1][0]
+
+    def _nirf_label(self, row: int, stream: str) -> str:
+        index, rank = self._nirf_position(row, stream)
+        if math.isinf(rank):
+            return "Unranked"
+        return f"{rank} ({_categories(stream)[index].title()})"
+
+    def row(self, row: int, stream: str = None) -> dict:
+        """
+        Returns a row in the same shape the LLM used to generate for `top_colleges`.
+        The NIRF rank shown is the one `stream`'s view is ordered by.
+        """
+        fee_range = _format_lakhs(self.fee_min[row])
+        if self.fee_max[row] != self.fee_min[row]:
+            fee_range += f" - {_format_lakhs(self.fee_max[row])}"
+        package = self.avg_package[row]
+        return {
+            "College Name": self.name[row],
+            "Fees Range": f"{fee_range} per year",
+            "Location": f"{self.city[row]}, {self.state[row]}",
+            "Entrances Required": ", ".join(self.entrances[row]),
+            "Difficulty Level": self.difficulty[row],
+            "Average Package": "N/A" if math.isnan(package) else f"₹{package:g} LPA",
+            "NIRF Rank": self._nirf_label(row, (stream or "").lower()),
+        }
+
+    def find_colleges(self, stream: str, ownership: str, budget: str = None, relocate: str = "Yes",
+                      home_state: str = None, cities: str = None, entrance: str = None,
+                      limit: int = 10) -> list:
+        """
+        Returns up to `limit` colleges for a stream and ownership type, in NIRF order.
+
+        Survey preferences rank colleges rather than exclude them, so a list is
+        only short when the catalogue itself is: colleges in the home state come
+        first when the student will not relocate, then ones within budget, then
+        ones in a preferred city (`cities` is the page's comma-joined value or "Any").
+        """
+        view = self.nirf_views.get((stream.lower(), ownership.lower()), ())
+        if entrance:
+            view = tuple(row for row in view if row in self.by_entrance.get(entrance.lower(), frozenset()))
+
+        home = self.by_state.get(home_state.lower(), frozenset()) if home_state and relocate == "No" else None
+        within_budget = self.affordable.get(budget) if budget else None
+        preferred = frozenset()
+        if cities and cities != "Any":
+            for city in cities.split(","):
+                preferred = preferred | self.by_city.get(city.strip().lower(), frozenset())
+
+        def preference(row):
+            return (
+                home is not None and row not in home,
+                within_budget is not None and row not in within_budget,
+                bool(preferred) and row not in preferred,
+            )
+
+        # sorted() is stable, so NIRF order is kept within each preference group.
+        return [self.row(row, stream) for row in sorted(view, key=preference)[:limit]]
+
+
+@lru_cache(maxsize=1)
+def get_catalogue() -> CollegeCatalogue:
+    return CollegeCatalogue()
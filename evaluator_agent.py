@@ -1,15 +1,21 @@
-from langchain_google_genai import ChatGoogleGenerativeAI
-from langchain.output_parsers import ResponseSchema, StructuredOutputParser
-from langchain.prompts import ChatPromptTemplate
+import instrumentation
+import llm_gateway
+import model_router
+from local_scorer import merge_evaluations, score_resume
 
-def evaluate_resume(resume: str, job_description: str) -> dict:
+EVALUATION_KEYS = ("education_relevance", "matching_skills", "project_relevance", "industry_standard",
+                   "global_score", "title", "areas_to_improve")
+
+def _build_evaluation_chain(tier: str):
     """
-    Analyzes a resume against a job description using the standard Gemini API,
-    providing a detailed, structured evaluation.
+    Builds the evaluation prompt, model and parser for a model tier. Called
+    once per process and tier through the LLM gateway.
     """
-    
-    # Reverted to the standard ChatGoogleGenerativeAI model which works with your setup
-    llm = ChatGoogleGenerativeAI(model="gemini-2.5-pro", temperature=0.0)
+    # LangChain is imported here so importing this module stays cheap.
+    from langchain.output_parsers import ResponseSchema, StructuredOutputParser
+    from langchain.prompts import ChatPromptTemplate
+
+    llm = model_router.chat_model(tier, temperature=0.0)
 
     # --- NEW, DETAILED RESPONSE STRUCTURE ---
     
@@ -69,15 +75,39 @@ def evaluate_resume(resume: str, job_description: str) -> dict:
         """
     )
     
-    prompt = ChatPromptTemplate.from_template(template=template)
-    chain = prompt | llm | output_parser
+    prompt = ChatPromptTemplate.from_template(
+        template=template,
+        partial_variables={"format_instructions": format_instructions}
+    )
+    return prompt | llm | output_parser
 
-    # --- THIS IS THE FIX ---
-    # The 'format_instructions' variable must be passed to the chain.
-    response = chain.invoke({
-        "resume": resume,
-        "job_description": job_description,
-        "format_instructions": format_instructions
-    })
+def evaluate_resume(resume: str, job_description: str) -> dict:
+    """
+    Analyzes a resume against a job description using the standard Gemini API,
+    providing a detailed, structured evaluation.
+    """
+    def attempt(tier):
+        chain = llm_gateway.get_chain(("evaluate_resume", tier), lambda: _build_evaluation_chain(tier))
+        return llm_gateway.invoke(chain, {
+            "resume": resume,
+            "job_description": job_description,
+        })
+
+    with instrumentation.track("evaluate_resume", resume_chars=len(resume), job_chars=len(job_description)):
+        response = model_router.run(
+            "evaluate", attempt, prompt_chars=len(resume) + len(job_description), structured=True,
+            accept=lambda evaluation: all(key in evaluation for key in EVALUATION_KEYS),
+        )
     return response
 
+def evaluate_resume_instant(resume: str, job_description: str, on_local_scores=None) -> dict:
+    """
+    Scores skills and education locally first and passes them to
+    `on_local_scores` straight away, then runs the full LLM evaluation. The
+    local scores replace the LLM's for those two metrics, so they are the same
+    on every run.
+    """
+    local_scores = score_resume(resume, job_description)
+    if on_local_scores is not None:
+        on_local_scores(local_scores)
+    return merge_evaluations(local_scores, evaluate_resume(resume, job_description))
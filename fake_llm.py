@@ -0,0 +1,323 @@
+# In fake_llm.py
+"""
+A local stand-in for Gemini, used by benchmark.py to measure the app with no
+network or API key.
+
+    backend = FakeBackend(latency=0.8, tokens_per_second=60, error_rate=0.05)
+    llm_gateway.set_backend(backend)
+
+Every agent then gets its clients from the fake: LangChain chat models,
+`genai` models (including streaming) and embeddings. Responses are canned
+JSON or text picked from the prompt, so all parsers succeed unless
+`malformed_rate` asks for replies that are not JSON.
+"""
+
+import asyncio
+import hashlib
+import json
+import math
+import random
+import re
+import threading
+import time
+from types import SimpleNamespace
+from typing import Any
+
+from langchain_core.language_models.chat_models import BaseChatModel
+from langchain_core.messages import AIMessage, AIMessageChunk
+from langchain_core.outputs import ChatGeneration, ChatGenerationChunk, ChatResult
+
+from chat_context import estimate_tokens
+
+EMBEDDING_DIMENSIONS = 256
+STREAM_PIECES = 8  # chunks per streamed response
+
+
+class FakeQuotaError(Exception):
+    """Injected error that the gateway treats like a Gemini 429."""
+    code = 429
+
+
+# --- CANNED RESPONSES ---
+
+def _evaluation_response(prompt: str) -> str:
+    return "```json\n" + json.dumps({
+        "education_relevance": 7,
+        "matching_skills": 6,
+        "project_relevance": 8,
+        "industry_standard": 7,
+        "global_score": 7,
+        "title": "Software Engineer at Example Corp",
+        "areas_to_improve": [
+            {"area": "System design", "importance": "High", "current_level": "Beginner", "time_to_prepare": "4 weeks"},
+            {"area": "Cloud deployment", "importance": "Medium", "current_level": "Intermediate", "time_to_prepare": "2 weeks"},
+            {"area": "Testing", "importance": "Low", "current_level": "Intermediate", "time_to_prepare": "1 week"},
+        ],
+    }) + "\n```"
+
+
+def _careers_response(prompt: str) -> str:
+    # The last stream is not in the catalogue, so its college lists take the LLM path.
+    streams = ["engineering", "design", "data science"]
+    return json.dumps({"careers": [
+        {
+            "career_name": f"Career {i + 1}",
+            "stream": stream,
+            "average_salary": "₹6-8 Lakhs per annum",
+            "reasoning": "Matches the student's strongest subjects and interests. " * 3,
+        }
+        for i, stream in enumerate(streams)
+    ]})
+
+
+def _colleges_response(prompt: str) -> str:
+    match = re.search(r"EXACTLY (\d+)", prompt)
+    count = int(match.group(1)) if match else 10
+    return json.dumps({"colleges": [
+        {
+            "College Name": f"Example College {i + 1}",
+            "Fees Range": "₹1-2 Lakhs per year",
+            "Location": "Pune, Maharashtra",
+            "Entrances Required": "JEE Main",
+            "Difficulty Level": "Moderate",
+            "Average Package": "₹7 LPA",
+        }
+        for i in range(count)
+    ]})
+
+
+def _extraction_response(prompt: str) -> str:
+    # Like the real model, only answers when the chunk has something to extract.
+    if "₹" not in prompt.split("The question:")[0]:
+        return "I'm sorry, no information match your query!"
+    return "Name: Example Item | Price: ₹499 | Rating: 4.2"
+
+
+def _reduce_response(prompt: str) -> str:
+    return "Name: Example Item | Price: ₹499 | Rating: 4.2"
+
+
+def _summary_response(prompt: str) -> str:
+    return "The candidate asked about interview preparation and was advised to practise system design and revise projects."
+
+
+def _chat_response(prompt: str) -> str:
+    return ("Start by reviewing the core requirements in the job description, then prepare two or three "
+            "stories from your projects that show each of them. Practise explaining trade-offs out loud. " * 4)
+
+
+# (marker in the prompt, responder), checked in order; the last one is the default.
+RESPONDERS = (
+    ("structured evaluation of a candidate's resume", _evaluation_response),
+    ("provide three career path suggestions", _careers_response),
+    ("colleges in India for this career path", _colleges_response),
+    ("You are a web scraper agent", _extraction_response),
+    ("You are merging partial answers", _reduce_response),
+    ("running summary of an interview-preparation chat", _summary_response),
+    ("", _chat_response),
+)
+
+
+def canned_response(prompt: str) -> str:
+    for marker, responder in RESPONDERS:
+        if marker in prompt:
+            return responder(prompt)
+
+
+# --- BACKEND ---
+
+class FakeBackend:
+    """
+    Simulated Gemini. Each response takes `latency` seconds (± `jitter`) before
+    its first token, then streams at `tokens_per_second`. A fraction
+    `error_rate` of calls raise `FakeQuotaError` and a fraction
+    `malformed_rate` answer with prose instead of JSON. `responder(prompt)` overrides the
+    canned responses. `model_latency` maps model names to their own latency,
+    to simulate faster and slower model tiers.
+    """
+
+    def __init__(self, latency: float = 0.5, jitter: float = 0.1, tokens_per_second: float = 80.0,
+                 error_rate: float = 0.0, malformed_rate: float = 0.0, responder=None, seed: int = 0,
+                 model_latency: dict = None):
+        self.latency = latency
+        self.model_latency = model_latency or {}
+        self.jitter = jitter
+        self.tokens_per_second = tokens_per_second
+        self.error_rate = error_rate
+        self.malformed_rate = malformed_rate
+        self.responder = responder or canned_response
+        self._random = random.Random(seed)
+        self._lock = threading.Lock()
+        self.calls = 0
+        self.injected_errors = 0
+
+    # The gateway calls these three to build clients.
+    def chat_model(self, model: str, temperature: float = None):
+        return FakeChatModel(backend=self, model_name=model)
+
+    def genai_model(self, model: str, system_instruction: str = None):
+        return FakeGenerativeModel(self, model, system_instruction)
+
+    def embeddings(self, model: str):
+        return FakeEmbeddings(self)
+
+    def plan(self, prompt: str, model: str = None) -> dict:
+        """Decides one call's outcome: the text to return, its timing, or an error."""
+        latency = self.model_latency.get(model, self.latency)
+        with self._lock:
+            self.calls += 1
+            roll = self._random.random()
+            first_token = max(0.0, latency + self._random.uniform(-self.jitter, self.jitter))
+            fail = roll < self.error_rate
+            malformed = not fail and self._random.random() < self.malformed_rate
+            if fail:
+                self.injected_errors += 1
+        if fail:
+            return {"first_token": first_token, "error": FakeQuotaError("429 Resource has been exhausted (simulated)")}
+        text = self.responder(prompt)
+        if malformed:
+            text = "Sorry, I cannot answer that in the requested format."
+        return {
+            "first_token": first_token,
+            "text": text,
+            "input_tokens": estimate_tokens(prompt),
+            "output_tokens": estimate_tokens(text),
+        }
+
+    def generation_time(self, plan: dict) -> float:
+        return plan.get("output_tokens", 0) / self.tokens_per_second if self.tokens_per_second else 0.0
+
+
+def _pieces(text: str, count: int) -> list:
+    size = max(1, math.ceil(len(text) / max(1, count)))
+    return [text[i:i + size] for i in range(0, len(text), size)]
+
+
+class FakeChatModel(BaseChatModel):
+    """LangChain chat model backed by a `FakeBackend`; drop-in for ChatGoogleGenerativeAI."""
+
+    backend: Any = None
+    model_name: str = "fake"
+
+    @property
+    def _llm_type(self) -> str:
+        return "careero-fake"
+
+    def _prompt(self, messages) -> str:
+        return "\n".join(str(message.content) for message in messages)
+
+    def _result(self, plan: dict) -> ChatResult:
+        message = AIMessage(content=plan["text"], usage_metadata={
+            "input_tokens": plan["input_tokens"],
+            "output_tokens": plan["output_tokens"],
+            "total_tokens": plan["input_tokens"] + plan["output_tokens"],
+        })
+        return ChatResult(generations=[ChatGeneration(message=message)])
+
+    def _generate(self, messages, stop=None, run_manager=None, **kwargs) -> ChatResult:
+        plan = self.backend.plan(self._prompt(messages), self.model_name)
+        time.sleep(plan["first_token"])
+        if "error" in plan:
+            raise plan["error"]
+        time.sleep(self.backend.generation_time(plan))
+        return self._result(plan)
+
+    async def _agenerate(self, messages, stop=None, run_manager=None, **kwargs) -> ChatResult:
+        plan = self.backend.plan(self._prompt(messages), self.model_name)
+        await asyncio.sleep(plan["first_token"])
+        if "error" in plan:
+            raise plan["error"]
+        await asyncio.sleep(self.backend.generation_time(plan))
+        return self._result(plan)
+
+    def _stream(self, messages, stop=None, run_manager=None, **kwargs):
+        plan = self.backend.plan(self._prompt(messages), self.model_name)
+        time.sleep(plan["first_token"])
+        if "error" in plan:
+            raise plan["error"]
+        pieces = _pieces(plan["text"], STREAM_PIECES)
+        for piece in pieces:
+            time.sleep(self.backend.generation_time(plan) / len(pieces))
+            chunk = ChatGenerationChunk(message=AIMessageChunk(content=piece))
+            if run_manager is not None:
+                run_manager.on_llm_new_token(piece, chunk=chunk)
+            yield chunk
+
+
+class FakeGenerativeModel:
+    """Stand-in for `genai.GenerativeModel` with the parts of `generate_content` the app uses."""
+
+    def __init__(self, backend: FakeBackend, model: str, system_instruction: str = None):
+        self.backend = backend
+        self.model_name = model
+        self.system_instruction = system_instruction
+
+    def _prompt(self, contents) -> str:
+        if isinstance(contents, str):
+            return contents
+        return "\n".join(
+            part.get("text", "") for message in contents for part in message.get("parts", [])
+        )
+
+    @staticmethod
+    def _response(text: str, input_tokens: int = 0, output_tokens: int = 0):
+        usage = SimpleNamespace(prompt_token_count=input_tokens, candidates_token_count=output_tokens)
+        return SimpleNamespace(text=text, usage_metadata=usage)
+
+    def generate_content(self, contents, **options):
+        prompt = (self.system_instruction or "") + "\n" + self._prompt(contents)
+        plan = self.backend.plan(prompt, self.model_name)
+        time.sleep(plan["first_token"])
+        if "error" in plan:
+            raise plan["error"]
+        time.sleep(self.backend.generation_time(plan))
+        return self._response(plan["text"], plan["input_tokens"], plan["output_tokens"])
+
+    async def generate_content_async(self, contents, stream: bool = False, **options):
+        prompt = (self.system_instruction or "") + "\n" + self._prompt(contents)
+        plan = self.backend.plan(prompt, self.model_name)
+        if not stream:
+            await asyncio.sleep(plan["first_token"])
+            if "error" in plan:
+                raise plan["error"]
+            await asyncio.sleep(self.backend.generation_time(plan))
+            return self._response(plan["text"], plan["input_tokens"], plan["output_tokens"])
+        return self._astream(plan)
+
+    async def _astream(self, plan: dict):
+        await asyncio.sleep(plan["first_token"])
+        if "error" in plan:
+            raise plan["error"]
+        pieces = _pieces(plan["text"], STREAM_PIECES)
+        for i, piece in enumerate(pieces):
+            if i:
+                await asyncio.sleep(self.backend.generation_time(plan) / len(pieces))
+            if i == len(pieces) - 1:
+                yield self._response(piece, plan["input_tokens"], plan["output_tokens"])
+            else:
+                yield self._response(piece)
+
+
+class FakeEmbeddings:
+    """Deterministic bag-of-words embeddings, so similar texts get similar vectors."""
+
+    def __init__(self, backend: FakeBackend):
+        self.backend = backend
+
+    def _vector(self, text: str) -> list:
+        vector = [0.0] * EMBEDDING_DIMENSIONS
+        for word in re.findall(r"[a-z0-9+#]+", text.lower()):
+            bucket = int.from_bytes(hashlib.blake2b(word.encode("utf-8"), digest_size=4).digest(), "big")
+            vector[bucket % EMBEDDING_DIMENSIONS] += 1.0
+        norm = math.sqrt(sum(value * value for value in vector)) or 1.0
+        return [value / norm for value in vector]
+
+    def embed_documents(self, texts: list) -> list:
+        plan = self.backend.plan("")
+        time.sleep(plan["first_token"])
+        if "error" in plan:
+            raise plan["error"]
+        return [self._vector(text) for text in texts]
+
+    def embed_query(self, text: str) -> list:
+        return self.embed_documents([text])[0]
@@ -0,0 +1,143 @@
+# In history_store.py
+
+import hashlib
+import json
+import os
+import sqlite3
+import threading
+import time
+import zlib
+from contextlib import contextmanager
+
+from result_cache import CACHE_DIR
+
+HISTORY_PATH = os.environ.get("CAREERO_HISTORY_DB", os.path.join(CACHE_DIR, "history.sqlite3"))
+MAX_AGE_DAYS = float(os.environ.get("CAREERO_HISTORY_MAX_AGE_DAYS", "90"))
+
+
+def record_key(resume_hash: str, job_text: str) -> str:
+    """Identifies one resume + job description pair."""
+    job_hash = hashlib.sha256(job_text.encode("utf-8")).hexdigest()
+    return hashlib.sha256(f"{resume_hash}:{job_hash}".encode("utf-8")).hexdigest()
+
+
+def _compress(messages: list) -> bytes:
+    return zlib.compress(json.dumps(messages, ensure_ascii=False).encode("utf-8"))
+
+
+def _decompress(blob: bytes) -> list:
+    return json.loads(zlib.decompress(blob).decode("utf-8"))
+
+
+class HistoryStore:
+    """
+    SQLite-backed store of evaluations and chat transcripts, one row per
+    resume + job description pair. Transcripts are stored zlib-compressed.
+    Rows are indexed by user and by session, newest first, for the sidebar.
+    """
+
+    def __init__(self, path: str = HISTORY_PATH):
+        self.path = path
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        with self._connect() as conn:
+            conn.execute(
+                "CREATE TABLE IF NOT EXISTS records ("
+                " key TEXT PRIMARY KEY,"
+                " user_id TEXT,"
+                " session_id TEXT,"
+                " title TEXT,"
+                " job_text TEXT NOT NULL,"
+                " evaluation TEXT,"
+                " messages BLOB,"
+                " created_at REAL NOT NULL,"
+                " updated_at REAL NOT NULL)"
+            )
+            conn.execute("CREATE INDEX IF NOT EXISTS idx_records_user ON records (user_id, updated_at DESC)")
+            conn.execute("CREATE INDEX IF NOT EXISTS idx_records_session ON records (session_id, updated_at DESC)")
+            conn.execute("CREATE INDEX IF NOT EXISTS idx_records_updated ON records (updated_at)")
+
+    @contextmanager
+    def _connect(self):
+        conn = sqlite3.connect(self.path, timeout=10)
+        conn.row_factory = sqlite3.Row
+        try:
+            with conn:
+                yield conn
+        finally:
+            conn.close()
+
+    def save(self, key: str, job_text: str, user_id: str = None, session_id: str = None,
+             evaluation: dict = None, messages: list = None) -> None:
+        """Creates or updates a record. Fields passed as None keep their stored value."""
+        now = time.time()
+        title = evaluation.get("title") if isinstance(evaluation, dict) else None
+        with self._connect() as conn:
+            conn.execute(
+                "INSERT INTO records (key, user_id, session_id, title, job_text, evaluation, messages, created_at, updated_at)"
+                " VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)"
+                " ON CONFLICT(key) DO UPDATE SET"
+                "  user_id = COALESCE(excluded.user_id, user_id),"
+                "  session_id = COALESCE(excluded.session_id, session_id),"
+                "  title = COALESCE(excluded.title, title),"
+                "  evaluation = COALESCE(excluded.evaluation, evaluation),"
+                "  messages = COALESCE(excluded.messages, messages),"
+                "  updated_at = excluded.updated_at",
+                (
+                    key, user_id, session_id, title, job_text,
+                    json.dumps(evaluation, ensure_ascii=False) if evaluation is not None else None,
+                    _compress(messages) if messages is not None else None,
+                    now, now,
+                ),
+            )
+
+    def get(self, key: str) -> dict:
+        """Returns the record for `key` with `evaluation` and `messages` decoded, or None."""
+        with self._connect() as conn:
+            row = conn.execute("SELECT * FROM records WHERE key = ?", (key,)).fetchone()
+        if row is None:
+            return None
+        record = dict(row)
+        record["evaluation"] = json.loads(row["evaluation"]) if row["evaluation"] else None
+        record["messages"] = _decompress(row["messages"]) if row["messages"] else []
+        return record
+
+    def get_evaluation(self, key: str) -> dict:
+        with self._connect() as conn:
+            row = conn.execute("SELECT evaluation FROM records WHERE key = ?", (key,)).fetchone()
+        return json.loads(row["evaluation"]) if row and row["evaluation"] else None
+
+    def list_records(self, user_id: str = None, session_id: str = None, limit: int = 10, offset: int = 0) -> tuple:
+        """
+        Returns `(records, total)` for one page of a user's (or else a session's)
+        history, newest first. Records only carry the fields the sidebar needs.
+        """
+        column, value = ("user_id", user_id) if user_id else ("session_id", session_id)
+        with self._connect() as conn:
+            total = conn.execute(f"SELECT COUNT(*) FROM records WHERE {column} = ?", (value,)).fetchone()[0]
+            rows = conn.execute(
+                f"SELECT key, title, substr(job_text, 1, 60) AS job_preview, updated_at"
+                f" FROM records WHERE {column} = ? ORDER BY updated_at DESC LIMIT ? OFFSET ?",
+                (value, limit, offset),
+            ).fetchall()
+        return [dict(row) for row in rows], total
+
+    def prune(self, max_age_seconds: float) -> int:
+        """Deletes records not updated within `max_age_seconds`; returns how many."""
+        with self._connect() as conn:
+            return conn.execute(
+                "DELETE FROM records WHERE updated_at < ?", (time.time() - max_age_seconds,)
+            ).rowcount
+
+
+_store = None
+_store_lock = threading.Lock()
+
+
+def get_history_store() -> HistoryStore:
+    """Returns the process-wide store, pruning expired records when it is first opened."""
+    global _store
+    with _store_lock:
+        if _store is None:
+            _store = HistoryStore()
+            _store.prune(MAX_AGE_DAYS * 24 * 3600)
+        return _store
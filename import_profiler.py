@@ -0,0 +1,85 @@
+# In import_profiler.py
+
+"""
+Reports how long each app module takes to import from a cold interpreter,
+and which dependencies that time goes to.
+
+    python import_profiler.py
+    python import_profiler.py evaluator_agent jd_ranker --top 5
+
+Each module is imported in a fresh `python -X importtime` process, so the
+numbers include everything it pulls in and nothing already loaded by another.
+"""
+
+import argparse
+import re
+import subprocess
+import sys
+
+APP_MODULES = (
+    "streamlit",
+    "app_resources",
+    "history_store",
+    "instrumentation",
+    "score_render",
+    "resume_ingest",
+    "local_scorer",
+    "chat_agent",
+    "agent",
+    "career_agent",
+    "evaluator_agent",
+    "jd_ranker",
+)
+
+_LINE = re.compile(r"^import time:\s+(\d+)\s+\|\s+(\d+)\s+\|\s*(\S+)")
+
+
+def profile_module(name: str) -> dict:
+    """
+    Imports `name` in a fresh interpreter. Returns its total import time and
+    the self time of every top-level package loaded along the way, in ms.
+    """
+    result = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", f"import {name}"],
+        capture_output=True, text=True,
+    )
+    if result.returncode != 0:
+        last_line = (result.stderr.strip().splitlines() or ["unknown error"])[-1]
+        return {"module": name, "error": last_line}
+
+    total_us = 0
+    by_package = {}
+    for line in result.stderr.splitlines():
+        match = _LINE.match(line)
+        if not match:
+            continue
+        self_us, cumulative_us, module = match.groups()
+        package = module.split(".")[0]
+        by_package[package] = by_package.get(package, 0) + int(self_us)
+        if module == name:
+            total_us = int(cumulative_us)
+    return {
+        "module": name,
+        "total_ms": round(total_us / 1000, 1),
+        "packages_ms": {package: round(us / 1000, 1) for package, us in by_package.items()},
+    }
+
+
+def main(argv=None) -> None:
+    parser = argparse.ArgumentParser(description="Report cold import time per app module.")
+    parser.add_argument("modules", nargs="*", help=f"Modules to profile (default: {', '.join(APP_MODULES)})")
+    parser.add_argument("--top", type=int, default=3, help="Heaviest dependencies to list per module")
+    args = parser.parse_args(argv)
+
+    for name in args.modules or APP_MODULES:
+        report = profile_module(name)
+        if "error" in report:
+            print(f"{name:<18} failed: {report['error']}")
+            continue
+        heaviest = sorted(report["packages_ms"].items(), key=lambda item: item[1], reverse=True)[:args.top]
+        breakdown = ", ".join(f"{package} {ms:.0f} ms" for package, ms in heaviest)
+        print(f"{name:<18} {report['total_ms']:>8.1f} ms   ({breakdown})")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,253 @@
+# In instrumentation.py
+
+import contextvars
+import json
+import os
+import threading
+import time
+from collections import deque
+from contextlib import contextmanager
+
+from result_cache import CACHE_DIR
+
+METRICS_DIR = os.environ.get("CAREERO_METRICS_DIR", os.path.join(CACHE_DIR, "metrics"))
+MAX_LOG_BYTES = int(os.environ.get("CAREERO_METRICS_MAX_BYTES", str(10 * 1024 * 1024)))
+LOG_BACKUPS = 5
+PROMETHEUS_INTERVAL_SECONDS = 5.0
+
+_current = contextvars.ContextVar("careero_call_record", default=None)
+_write_lock = threading.Lock()
+_recent = deque(maxlen=2000)
+_last_prometheus_write = 0.0
+
+
+class CallRecord:
+    """Measurements for one agent call. Counters may be updated from several threads."""
+
+    def __init__(self, agent: str, **fields):
+        self.agent = agent
+        self.started = time.perf_counter()
+        self.fields = {
+            "agent": agent,
+            "timestamp": time.time(),
+            "prompt_chars": 0,
+            "input_tokens": 0,
+            "output_tokens": 0,
+            "retries": 0,
+            "parse_failures": 0,
+            "llm_calls": 0,
+        }
+        self.fields.update(fields)
+        self._lock = threading.Lock()
+        self._finished = False
+
+    def add(self, key: str, amount=1) -> None:
+        with self._lock:
+            self.fields[key] = self.fields.get(key, 0) + amount
+
+    def set(self, **fields) -> None:
+        with self._lock:
+            self.fields.update(fields)
+
+    def mark_first_token(self) -> None:
+        with self._lock:
+            if "ttft_ms" not in self.fields:
+                self.fields["ttft_ms"] = round((time.perf_counter() - self.started) * 1000, 1)
+
+    def finish(self, error: BaseException = None) -> None:
+        with self._lock:
+            if self._finished:
+                return
+            self._finished = True
+            self.fields["latency_ms"] = round((time.perf_counter() - self.started) * 1000, 1)
+            self.fields["status"] = "ok" if error is None else "error"
+            if error is None:
+                # A call that did not stream delivers its whole answer at once.
+                self.fields.setdefault("ttft_ms", self.fields["latency_ms"])
+            if error is not None:
+                self.fields["error"] = f"{type(error).__name__}: {error}"[:500]
+            record = dict(self.fields)
+        _emit(record)
+
+
+def current_record() -> CallRecord:
+    return _current.get()
+
+
+def count(key: str, amount=1) -> None:
+    """Adds to a counter on the call being tracked in this context, if any."""
+    record = _current.get()
+    if record is not None:
+        record.add(key, amount)
+
+
+@contextmanager
+def activate(record: CallRecord):
+    """Makes `record` the current record without finishing it on exit."""
+    token = _current.set(record)
+    try:
+        yield record
+    finally:
+        _current.reset(token)
+
+
+@contextmanager
+def track(agent: str, **fields):
+    """
+    Times a block as one call of `agent` and writes the record when it ends.
+    LLM requests made inside the block (through the gateway) add their prompt
+    size, tokens and retries to it.
+    """
+    record = CallRecord(agent, **fields)
+    token = _current.set(record)
+    try:
+        yield record
+    except BaseException as e:
+        record.finish(e)
+        raise
+    else:
+        record.finish()
+    finally:
+        _current.reset(token)
+
+
+def langchain_callbacks() -> list:
+    """Callback handlers that copy token usage from LangChain responses into the current record."""
+    record = _current.get()
+    if record is None:
+        return []
+    from langchain_core.callbacks import BaseCallbackHandler
+
+    class UsageHandler(BaseCallbackHandler):
+        def on_llm_new_token(self, token, **kwargs):
+            record.mark_first_token()
+
+        def on_llm_end(self, response, **kwargs):
+            for generations in response.generations:
+                for generation in generations:
+                    usage = getattr(getattr(generation, "message", None), "usage_metadata", None) or {}
+                    record.add("input_tokens", usage.get("input_tokens", 0))
+                    record.add("output_tokens", usage.get("output_tokens", 0))
+
+    return [UsageHandler()]
+
+
+# --- OUTPUT ---
+
+def _log_path() -> str:
+    return os.path.join(METRICS_DIR, "calls.jsonl")
+
+
+def _rotate(path: str) -> None:
+    for i in range(LOG_BACKUPS - 1, 0, -1):
+        if os.path.exists(f"{path}.{i}"):
+            os.replace(f"{path}.{i}", f"{path}.{i + 1}")
+    os.replace(path, f"{path}.1")
+
+
+def _emit(record: dict) -> None:
+    global _last_prometheus_write
+    _recent.append(record)
+    try:
+        with _write_lock:
+            os.makedirs(METRICS_DIR, exist_ok=True)
+            path = _log_path()
+            if os.path.exists(path) and os.path.getsize(path) > MAX_LOG_BYTES:
+                _rotate(path)
+            with open(path, "a", encoding="utf-8") as f:
+                f.write(json.dumps(record, ensure_ascii=False) + "\n")
+            now = time.monotonic()
+            if now - _last_prometheus_write >= PROMETHEUS_INTERVAL_SECONDS:
+                _last_prometheus_write = now
+                with open(os.path.join(METRICS_DIR, "metrics.prom"), "w", encoding="utf-8") as f:
+                    f.write(prometheus_text())
+    except OSError as e:
+        # Metrics must never break a user request.
+        print(f"Could not write metrics: {e}")
+
+
+def load_records(limit: int = 2000) -> list:
+    """Returns the most recent records from the JSONL log (all processes)."""
+    path = _log_path()
+    if not os.path.exists(path):
+        return list(_recent)[-limit:]
+    with open(path, encoding="utf-8") as f:
+        lines = deque(f, maxlen=limit)
+    return [json.loads(line) for line in lines if line.strip()]
+
+
+def _percentile(values: list, q: float) -> float:
+    if not values:
+        return None
+    values = sorted(values)
+    index = min(len(values) - 1, max(0, round(q * (len(values) - 1))))
+    return values[index]
+
+
+def summarize(records: list) -> list:
+    """Per-agent call counts, error rates, latency and TTFT percentiles, and mean tokens."""
+    by_agent = {}
+    for record in records:
+        by_agent.setdefault(record["agent"], []).append(record)
+    rows = []
+    for agent, items in sorted(by_agent.items()):
+        latencies = [r["latency_ms"] for r in items if "latency_ms" in r]
+        ttfts = [r["ttft_ms"] for r in items if "ttft_ms" in r]
+        rows.append({
+            "agent": agent,
+            "calls": len(items),
+            "error_rate": sum(r.get("status") == "error" for r in items) / len(items),
+            "p50_ms": _percentile(latencies, 0.5),
+            "p95_ms": _percentile(latencies, 0.95),
+            "ttft_p50_ms": _percentile(ttfts, 0.5),
+            "ttft_p95_ms": _percentile(ttfts, 0.95),
+            "avg_input_tokens": sum(r.get("input_tokens", 0) for r in items) / len(items),
+            "avg_output_tokens": sum(r.get("output_tokens", 0) for r in items) / len(items),
+            "retries": sum(r.get("retries", 0) for r in items),
+            "parse_failures": sum(r.get("parse_failures", 0) for r in items),
+        })
+    return rows
+
+
+def prometheus_text() -> str:
+    """Renders the in-process records of this server in the Prometheus text format."""
+    lines = []
+    metrics = (
+        ("careero_agent_calls_total", "counter", "calls"),
+        ("careero_agent_error_ratio", "gauge", "error_rate"),
+        ("careero_agent_retries_total", "counter", "retries"),
+        ("careero_agent_parse_failures_total", "counter", "parse_failures"),
+    )
+    rows = summarize(list(_recent))
+    for name, kind, key in metrics:
+        lines.append(f"# TYPE {name} {kind}")
+        for row in rows:
+            lines.append(f'{name}{{agent="{row["agent"]}"}} {row[key]}')
+    lines.append("# TYPE careero_agent_latency_ms gauge")
+    for row in rows:
+        for quantile, key in (("0.5", "p50_ms"), ("0.95", "p95_ms")):
+            if row[key] is not None:
+                lines.append(f'careero_agent_latency_ms{{agent="{row["agent"]}",quantile="{quantile}"}} {row[key]}')
+    return "\n".join(lines) + "\n"
+
+
+def debug_enabled() -> bool:
+    return os.environ.get("CAREERO_DEBUG", "").lower() in ("1", "true", "yes")
+
+
+def render_debug_panel() -> None:
+    """Streamlit panel with p50/p95 per agent and model tier, shown when CAREERO_DEBUG is set."""
+    import pandas as pd
+    import streamlit as st
+
+    with st.expander("🔧 Performance (debug)"):
+        rows = summarize(load_records())
+        if not rows:
+            st.write("No calls recorded yet.")
+            return
+        st.dataframe(pd.DataFrame(rows), use_container_width=True, hide_index=True)
+        from model_router import tier_summary
+        tiers = tier_summary(load_records())
+        if tiers:
+            st.caption("Model tiers")
+            st.dataframe(pd.DataFrame(tiers), use_container_width=True, hide_index=True)
@@ -0,0 +1,106 @@
+# In jd_ranker.py
+
+import hashlib
+import threading
+import uuid
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+
+import llm_gateway
+
+# The embedding model reads roughly the first 2k tokens; longer text only costs upload time.
+MAX_EMBED_CHARS = 8000
+MAX_CACHED_VECTORS = 2048
+
+_vectors = OrderedDict()
+_lock = threading.Lock()
+_client = None
+
+
+def _text_hash(text: str) -> str:
+    return hashlib.sha256(text.encode("utf-8")).hexdigest()
+
+
+def _get_client():
+    global _client
+    with _lock:
+        if _client is None:
+            import chromadb  # slow to import, so only loaded when jobs are first ranked
+            _client = chromadb.EphemeralClient()
+        return _client
+
+
+def embed_texts(texts: list, keys: list = None) -> list:
+    """
+    Embeds `texts`, reusing vectors already computed for the same content (or
+    the same `keys`, e.g. a resume's file hash) in this process.
+    """
+    keys = keys or [_text_hash(text) for text in texts]
+    vectors = [None] * len(texts)
+    missing = []
+    with _lock:
+        for i, key in enumerate(keys):
+            vector = _vectors.get(key)
+            if vector is not None:
+                _vectors.move_to_end(key)
+                vectors[i] = vector
+            else:
+                missing.append(i)
+
+    if missing:
+        embeddings = llm_gateway.get_embeddings()
+        new_vectors = llm_gateway.call(embeddings.embed_documents, [texts[i][:MAX_EMBED_CHARS] for i in missing])
+        with _lock:
+            for i, vector in zip(missing, new_vectors):
+                vectors[i] = vector
+                _vectors[keys[i]] = vector
+            while len(_vectors) > MAX_CACHED_VECTORS:
+                _vectors.popitem(last=False)
+    return vectors
+
+
+def rank_job_descriptions(resume: str, job_descriptions: list, resume_hash: str = None) -> list:
+    """
+    Ranks job descriptions by embedding similarity to the resume.
+    Returns `(index, similarity)` pairs, most similar first.
+    """
+    if not job_descriptions:
+        return []
+    resume_vector = embed_texts([resume], keys=[resume_hash] if resume_hash else None)[0]
+    job_vectors = embed_texts(job_descriptions)
+
+    collection = _get_client().create_collection(
+        name=f"jobs-{uuid.uuid4().hex}", metadata={"hnsw:space": "cosine"}
+    )
+    try:
+        collection.add(ids=[str(i) for i in range(len(job_descriptions))], embeddings=job_vectors)
+        result = collection.query(query_embeddings=[resume_vector], n_results=len(job_descriptions))
+    finally:
+        _get_client().delete_collection(collection.name)
+
+    return [(int(i), 1.0 - distance) for i, distance in zip(result["ids"][0], result["distances"][0])]
+
+
+def evaluate_against_jobs(resume: str, job_descriptions: list, top_k: int = 3,
+                          resume_hash: str = None, workers: int = 3) -> list:
+    """
+    Pre-ranks `job_descriptions` by similarity and runs the full
+    `evaluate_resume` call only on the `top_k` best matches, in parallel.
+
+    Returns one dict per job description, most similar first, with `index`,
+    `similarity` and, for the top-k only, `evaluation` (or `error`).
+    """
+    from evaluator_agent import evaluate_resume
+
+    ranking = rank_job_descriptions(resume, job_descriptions, resume_hash=resume_hash)
+    results = [{"index": i, "similarity": similarity} for i, similarity in ranking]
+
+    def evaluate(result):
+        try:
+            result["evaluation"] = evaluate_resume(resume, job_descriptions[result["index"]])
+        except Exception as e:
+            result["error"] = str(e)
+
+    with ThreadPoolExecutor(max_workers=workers) as pool:
+        list(pool.map(evaluate, results[:top_k]))
+    return results
@@ -0,0 +1,78 @@
+# In json_repair.py
+
+import json
+import re
+
+_FENCE = re.compile(r"```(?:json)?\s*(.*?)(?:```|$)", re.DOTALL | re.IGNORECASE)
+_TRAILING_COMMA = re.compile(r",(\s*[}\]])")
+_SMART_QUOTES = ("“", "”")
+
+
+def _strip_comments_and_commas(text: str) -> str:
+    """
+    Drops `//` comments and trailing commas outside of strings, and turns
+    smart quotes that delimit strings into plain ones. Smart quotes inside a
+    plain-quoted string are left alone, as they are part of its text.
+    """
+    out = []
+    in_string = escaped = smart = False
+    i = 0
+    while i < len(text):
+        char = text[i]
+        if in_string:
+            if escaped:
+                escaped = False
+            elif char == "\\":
+                escaped = True
+            elif char == '"' or (smart and char in _SMART_QUOTES):
+                in_string = False
+                char = '"'
+            out.append(char)
+        elif char == '"' or char in _SMART_QUOTES:
+            in_string = True
+            smart = char != '"'
+            out.append('"')
+        elif text.startswith("//", i):
+            newline = text.find("\n", i)
+            i = len(text) if newline == -1 else newline
+            continue
+        elif char == ",":
+            match = _TRAILING_COMMA.match(text, i)
+            if not match:
+                out.append(char)
+        else:
+            out.append(char)
+        i += 1
+    return "".join(out)
+
+
+def repair_json(text: str):
+    """
+    Parses JSON from an LLM reply, fixing the usual syntax slips locally:
+    markdown fences, prose around the object, smart quotes, comments,
+    trailing commas and output cut off before the closing brackets.
+    Raises ValueError if nothing usable is found.
+    """
+    text = (text or "").strip()
+    fenced = _FENCE.search(text)
+    if fenced:
+        text = fenced.group(1).strip()
+    starts = [i for i in (text.find("{"), text.find("[")) if i != -1]
+    if not starts:
+        raise ValueError("No JSON object in the response.")
+    text = text[min(starts):]
+
+    decoder = json.JSONDecoder()
+    for candidate in (text, _strip_comments_and_commas(text)):
+        try:
+            # raw_decode ignores anything after the first complete value
+            return decoder.raw_decode(candidate)[0]
+        except json.JSONDecodeError:
+            continue
+
+    # Truncated output: close the open strings and brackets.
+    from langchain_core.utils.json import parse_partial_json
+    repaired = parse_partial_json(candidate)
+    if repaired is None:
+        raise ValueError("The response is not valid JSON and could not be repaired.")
+    return repaired
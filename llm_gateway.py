@@ -0,0 +1,303 @@
+# In llm_gateway.py
+
+import asyncio
+import os
+import threading
+import time
+from collections import OrderedDict
+
+import instrumentation
+from rate_limiter import RateLimiter, backoff_delay
+
+# Process-wide limits, shared by every Streamlit session in this server process.
+REQUESTS_PER_MINUTE = float(os.environ.get("CAREERO_LLM_RPM", "60"))
+MAX_IN_FLIGHT = int(os.environ.get("CAREERO_LLM_MAX_IN_FLIGHT", "8"))
+MAX_RETRIES = int(os.environ.get("CAREERO_LLM_MAX_RETRIES", "4"))
+OLLAMA_HOST = os.environ.get("OLLAMA_HOST", "http://localhost:11434")
+
+RETRYABLE_STATUS_CODES = {429, 500, 502, 503, 504}
+RETRYABLE_ERROR_NAMES = {
+    "ResourceExhausted", "TooManyRequests", "ServiceUnavailable",
+    "InternalServerError", "BadGateway", "GatewayTimeout", "DeadlineExceeded",
+}
+
+limiter = RateLimiter(REQUESTS_PER_MINUTE)
+_in_flight = threading.BoundedSemaphore(MAX_IN_FLIGHT)
+
+_lock = threading.Lock()
+_chat_models = {}
+_chains = {}
+_genai_models = OrderedDict()
+_MAX_GENAI_MODELS = 256
+_genai_configured = False
+_backend = None
+
+
+def set_rate_limit(requests_per_minute: float, burst: int = None) -> None:
+    """Replaces the process-wide rate limit, e.g. from a CLI flag."""
+    global limiter
+    limiter = RateLimiter(requests_per_minute, burst)
+
+
+def set_backend(backend) -> None:
+    """
+    Serves every client from `backend` instead of Gemini, or restores Gemini
+    when `backend` is None. The backend needs `chat_model(model, temperature)`,
+    `genai_model(model, system_instruction)` and `embeddings(model)`; see
+    fake_llm.py. Cached clients and chains are dropped so they are rebuilt.
+    """
+    global _backend
+    with _lock:
+        _backend = backend
+        _chat_models.clear()
+        _chains.clear()
+        _genai_models.clear()
+
+
+# --- CLIENTS ---
+
+def get_chat_model(model: str, temperature: float = None):
+    """
+    Returns a long-lived LangChain chat client for `model` and `temperature`.
+    Names starting with "ollama/" are served by a local Ollama server.
+    """
+    key = (model, temperature)
+    with _lock:
+        client = _chat_models.get(key)
+        if client is None:
+            if _backend is not None:
+                client = _chat_models[key] = _backend.chat_model(model, temperature)
+            elif model.startswith("ollama/"):
+                # Local models served by Ollama (see model_router.LOCAL_MODEL)
+                from langchain_ollama import ChatOllama
+                kwargs = {"model": model[len("ollama/"):], "base_url": OLLAMA_HOST}
+                if temperature is not None:
+                    kwargs["temperature"] = temperature
+                client = _chat_models[key] = ChatOllama(**kwargs)
+            else:
+                from langchain_google_genai import ChatGoogleGenerativeAI
+                kwargs = {"model": model, "max_retries": 1}  # retries are handled here, not in the client
+                if temperature is not None:
+                    kwargs["temperature"] = temperature
+                client = _chat_models[key] = ChatGoogleGenerativeAI(**kwargs)
+        return client
+
+
+def get_embeddings(model: str = "models/text-embedding-004"):
+    """Returns a long-lived LangChain embeddings client."""
+    key = ("embeddings", model)
+    with _lock:
+        client = _chat_models.get(key)
+        if client is None:
+            if _backend is not None:
+                client = _chat_models[key] = _backend.embeddings(model)
+            else:
+                from langchain_google_genai import GoogleGenerativeAIEmbeddings
+                client = _chat_models[key] = GoogleGenerativeAIEmbeddings(model=model)
+        return client
+
+
+def get_chain(key, factory):
+    """
+    Returns the chain registered under `key`, building it with `factory()` the
+    first time. Agents use this so prompts, parsers and clients are built once
+    per process instead of on every call.
+    """
+    with _lock:
+        chain = _chains.get(key)
+    if chain is None:
+        chain = factory()
+        with _lock:
+            chain = _chains.setdefault(key, chain)
+    return chain
+
+
+def _configure_genai():
+    global _genai_configured
+    import google.generativeai as genai
+    if not _genai_configured:
+        genai.configure(api_key=os.environ["GOOGLE_API_KEY"])
+        _genai_configured = True
+    return genai
+
+
+def get_genai_model(model: str, system_instruction: str = None):
+    """
+    Returns a cached `genai.GenerativeModel`. System instructions differ per chat,
+    so only the most recently used models are kept.
+    """
+    key = (model, system_instruction)
+    with _lock:
+        client = _genai_models.get(key)
+        if client is not None:
+            _genai_models.move_to_end(key)
+            return client
+        if _backend is not None:
+            client = _backend.genai_model(model, system_instruction)
+        else:
+            genai = _configure_genai()
+            client = genai.GenerativeModel(model, system_instruction=system_instruction)
+        _genai_models[key] = client
+        while len(_genai_models) > _MAX_GENAI_MODELS:
+            _genai_models.popitem(last=False)
+        return client
+
+
+# --- CALLS ---
+
+def is_retryable(error: Exception) -> bool:
+    """True for quota (429) and server-side (5xx) errors."""
+    for attr in ("code", "status_code"):
+        code = getattr(error, attr, None)
+        if callable(code):
+            try:
+                code = code()
+            except Exception:
+                code = None
+        code = getattr(code, "value", code)
+        if isinstance(code, int) and code in RETRYABLE_STATUS_CODES:
+            return True
+    if type(error).__name__ in RETRYABLE_ERROR_NAMES:
+        return True
+    message = str(error)
+    return any(marker in message for marker in ("429", "503", "Resource has been exhausted", "overloaded"))
+
+
+def call(fn, *args, max_retries: int = None, extra_limiter: RateLimiter = None, **kwargs):
+    """
+    Runs one blocking LLM request under the global rate limit and in-flight cap,
+    retrying quota and server errors with backoff. `extra_limiter` lets a caller
+    add its own, stricter limit on top of the global one.
+    """
+    max_retries = max_retries or MAX_RETRIES
+    for attempt in range(max_retries):
+        limiter.acquire()
+        if extra_limiter is not None:
+            extra_limiter.acquire()
+        with _in_flight:
+            instrumentation.count("llm_calls")
+            try:
+                return fn(*args, **kwargs)
+            except Exception as e:
+                if attempt == max_retries - 1 or not is_retryable(e):
+                    raise
+        instrumentation.count("retries")
+        time.sleep(backoff_delay(attempt))
+
+
+async def _acquire_in_flight() -> None:
+    """Takes an in-flight slot without blocking the event loop; a cancelled wait never keeps one."""
+    acquire = asyncio.ensure_future(asyncio.to_thread(_in_flight.acquire))
+    try:
+        await asyncio.shield(acquire)
+    except asyncio.CancelledError:
+        # The thread still takes the slot; hand it back once it does.
+        acquire.add_done_callback(lambda _: _in_flight.release())
+        raise
+
+
+async def acall(fn, *args, max_retries: int = None, extra_limiter: RateLimiter = None, **kwargs):
+    """Async version of `call` for coroutine functions such as `chain.ainvoke`."""
+    max_retries = max_retries or MAX_RETRIES
+    for attempt in range(max_retries):
+        await limiter.acquire_async()
+        if extra_limiter is not None:
+            await extra_limiter.acquire_async()
+        await _acquire_in_flight()
+        instrumentation.count("llm_calls")
+        try:
+            return await fn(*args, **kwargs)
+        except Exception as e:
+            if attempt == max_retries - 1 or not is_retryable(e):
+                raise
+        finally:
+            _in_flight.release()
+        instrumentation.count("retries")
+        await asyncio.sleep(backoff_delay(attempt))
+
+
+def _prompt_chars(contents) -> int:
+    if isinstance(contents, str):
+        return len(contents)
+    if isinstance(contents, dict):
+        return sum(_prompt_chars(value) for value in contents.values())
+    if isinstance(contents, (list, tuple)):
+        return sum(_prompt_chars(item) for item in contents)
+    return 0
+
+
+def _record_genai_usage(response, record) -> None:
+    usage = getattr(response, "usage_metadata", None)
+    if record is not None and usage is not None:
+        record.add("input_tokens", getattr(usage, "prompt_token_count", 0) or 0)
+        record.add("output_tokens", getattr(usage, "candidates_token_count", 0) or 0)
+
+
+def invoke(chain, inputs: dict, **options):
+    instrumentation.count("prompt_chars", _prompt_chars(inputs))
+    config = {"callbacks": instrumentation.langchain_callbacks()}
+    return call(chain.invoke, inputs, config=config, **options)
+
+
+async def ainvoke(chain, inputs: dict, **options):
+    instrumentation.count("prompt_chars", _prompt_chars(inputs))
+    config = {"callbacks": instrumentation.langchain_callbacks()}
+    return await acall(chain.ainvoke, inputs, config=config, **options)
+
+
+def generate_content(model, contents, **options):
+    """Calls `model.generate_content` through the gateway (chat streams use `astream_content`)."""
+    record = instrumentation.current_record()
+    instrumentation.count("prompt_chars", _prompt_chars(contents))
+    response = call(model.generate_content, contents, **options)
+    _record_genai_usage(response, record)
+    return response
+
+
+async def astream_content(model, contents, max_retries: int = None, record=None):
+    """
+    Async generator over `model.generate_content_async(contents, stream=True)`
+    under the same rate limit, in-flight cap and retries as `call`.
+    Closing the generator, or cancelling the task reading it, abandons the
+    request and frees its slot. Token usage goes to `record` (default: the
+    current record).
+    """
+    record = record or instrumentation.current_record()
+    if record is not None:
+        record.add("prompt_chars", _prompt_chars(contents))
+    max_retries = max_retries or MAX_RETRIES
+    for attempt in range(max_retries):
+        await limiter.acquire_async()
+        await _acquire_in_flight()
+        if record is not None:
+            record.add("llm_calls")
+        try:
+            response = await model.generate_content_async(contents, stream=True)
+            iterator = response.__aiter__()
+            # The first chunk is where quota and server errors surface.
+            first = await iterator.__anext__()
+            break
+        except StopAsyncIteration:
+            first = None
+            break
+        except BaseException as e:
+            _in_flight.release()
+            if not isinstance(e, Exception) or attempt == max_retries - 1 or not is_retryable(e):
+                raise
+        if record is not None:
+            record.add("retries")
+        await asyncio.sleep(backoff_delay(attempt))
+
+    last = first
+    try:
+        if first is not None:
+            yield first
+            async for chunk in iterator:
+                last = chunk
+                yield chunk
+    finally:
+        _in_flight.release()
+        _record_genai_usage(last, record)
+        close = getattr(iterator, "aclose", None)
+        if close is not None:
+            await close()
@@ -0,0 +1,177 @@
+# In local_scorer.py
+
+import json
+import os
+import re
+from functools import lru_cache
+
+import numpy as np
+
+TAXONOMY_PATH = os.environ.get(
+    "CAREERO_SKILLS_TAXONOMY",
+    os.path.join(os.path.dirname(os.path.abspath(__file__)), "data", "skills_taxonomy.json"),
+)
+
+DEGREE_RANKS = {"diploma": 1, "bachelor": 2, "master": 3, "phd": 4}
+
+# Words that carry no signal for the keyword fallback.
+STOP_WORDS = frozenset("""
+a an and are as at be by for from has have in is it its of on or our the this to we will with you your
+they their them who what which when where how all any can able should must may work working experience
+years year strong good excellent knowledge skills skill team role job candidate candidates required
+requirements preferred responsibilities including etc using use used across within about into also
+""".split())
+
+TOKEN_PATTERN = re.compile(r"[a-z][a-z0-9+#.]*")
+
+
+class _Matcher:
+    """Finds canonical names in text from a {canonical: [aliases]} mapping with one regex."""
+
+    def __init__(self, aliases_by_name: dict):
+        self.names = tuple(aliases_by_name)
+        self._alias_to_name = {}
+        for name, aliases in aliases_by_name.items():
+            for alias in aliases:
+                self._alias_to_name[alias.lower()] = name
+        # Longest aliases first so "react native" wins over "react".
+        alternation = "|".join(re.escape(a) for a in sorted(self._alias_to_name, key=len, reverse=True))
+        self._pattern = re.compile(rf"(?<![\w+#.])(?:{alternation})(?![\w+#])")
+
+    def counts(self, text: str) -> dict:
+        found = {}
+        for match in self._pattern.finditer(text.lower()):
+            name = self._alias_to_name[match.group(0)]
+            found[name] = found.get(name, 0) + 1
+        return found
+
+
+@lru_cache(maxsize=1)
+def _taxonomy():
+    with open(TAXONOMY_PATH, encoding="utf-8") as f:
+        data = json.load(f)
+    skills = {}
+    for group in data["skills"].values():
+        skills.update(group)
+    return _Matcher(skills), _Matcher(data["degree_levels"]), _Matcher(data["fields"])
+
+
+def _tfidf_cosine(first: dict, second: dict) -> float:
+    """Cosine similarity of two term-count dicts under sublinear TF-IDF weighting."""
+    vocabulary = sorted(set(first) | set(second))
+    if not vocabulary:
+        return 0.0
+    counts = np.array([[doc.get(term, 0) for term in vocabulary] for doc in (first, second)], dtype=float)
+    tf = np.log1p(counts)
+    df = (counts > 0).sum(axis=0)
+    idf = np.log((1 + len(counts)) / (1 + df)) + 1
+    vectors = tf * idf
+    norms = np.linalg.norm(vectors, axis=1)
+    if not norms.all():
+        return 0.0
+    return float(vectors[0] @ vectors[1] / (norms[0] * norms[1]))
+
+
+def _keywords(text: str) -> dict:
+    counts = {}
+    for token in TOKEN_PATTERN.findall(text.lower()):
+        token = token.rstrip(".")
+        if len(token) > 2 and token not in STOP_WORDS:
+            counts[token] = counts.get(token, 0) + 1
+    return counts
+
+
+def extract_skills(text: str) -> dict:
+    """Returns {skill: mentions} for every taxonomy skill found in `text`."""
+    skills, _, _ = _taxonomy()
+    return skills.counts(text)
+
+
+def score_matching_skills(resume: str, job_description: str) -> dict:
+    resume_skills = extract_skills(resume)
+    job_skills = extract_skills(job_description)
+
+    if job_skills:
+        matched = sorted(set(job_skills) & set(resume_skills))
+        missing = sorted(set(job_skills) - set(resume_skills), key=lambda s: -job_skills[s])
+        coverage = len(matched) / len(job_skills)
+        similarity = _tfidf_cosine(resume_skills, job_skills)
+        score = 10 * (0.7 * coverage + 0.3 * similarity)
+        positive = [f"Matches {len(matched)} of {len(job_skills)} skills in the job description: {', '.join(matched)}"] if matched else []
+        negative = [f"Not found in the resume: {', '.join(missing)}"] if missing else []
+    else:
+        # The job description names no known skills, so compare plain keywords.
+        score = 10 * _tfidf_cosine(_keywords(resume), _keywords(job_description))
+        positive, negative = [], ["The job description lists no recognised skills; score is based on keyword overlap."]
+
+    return {"score": f"{score:.1f}", "positive": positive, "negative": negative}
+
+
+def score_education_relevance(resume: str, job_description: str) -> dict:
+    _, levels, fields = _taxonomy()
+    resume_levels = [DEGREE_RANKS[level] for level in levels.counts(resume)]
+    job_levels = [DEGREE_RANKS[level] for level in levels.counts(job_description)]
+    resume_fields = set(fields.counts(resume))
+    job_fields = set(fields.counts(job_description))
+    positive, negative = [], []
+
+    resume_level = max(resume_levels, default=0)
+    required_level = min(job_levels, default=0)
+    if not required_level:
+        level_score = 1.0 if resume_level else 0.6
+    elif resume_level >= required_level:
+        level_score = 1.0
+        positive.append("Degree level meets the job's requirement.")
+    elif resume_level == required_level - 1:
+        level_score = 0.5
+        negative.append("Degree level is one step below what the job asks for.")
+    else:
+        level_score = 0.2 if resume_level else 0.0
+        negative.append("No degree matching the job's requirement was found in the resume.")
+
+    if not job_fields:
+        field_score = 1.0 if resume_fields else 0.6
+    elif resume_fields & job_fields:
+        field_score = 1.0
+        positive.append(f"Field of study matches: {', '.join(sorted(resume_fields & job_fields))}.")
+    else:
+        field_score = 0.3
+        negative.append(f"The job prefers a background in: {', '.join(sorted(job_fields))}.")
+
+    score = 10 * (0.5 * level_score + 0.5 * field_score)
+    return {"score": f"{score:.1f}", "positive": positive, "negative": negative}
+
+
+def score_resume(resume: str, job_description: str) -> dict:
+    """
+    Scores `matching_skills` and `education_relevance` locally, in the same
+    shape `display_evaluation` expects from the LLM. The same inputs always
+    give the same scores.
+    """
+    return {
+        "matching_skills": score_matching_skills(resume, job_description),
+        "education_relevance": score_education_relevance(resume, job_description),
+    }
+
+
+def _score_number(value) -> float:
+    if isinstance(value, dict):
+        value = value.get("score", "")
+    match = re.search(r'(\d+\.?\d*)', str(value))
+    return float(match.group(1)) if match else None
+
+
+def merge_evaluations(local: dict, llm: dict) -> dict:
+    """
+    Combines an LLM evaluation with local scores: the local scores replace the
+    LLM's for the same metrics, and the global score is recomputed as the
+    simple average of the four metrics.
+    """
+    merged = dict(llm)
+    merged.update(local)
+    scores = [_score_number(merged.get(key)) for key in
+              ("education_relevance", "matching_skills", "project_relevance", "industry_standard")]
+    scores = [score for score in scores if score is not None]
+    if scores:
+        merged["global_score"] = f"{sum(scores) / len(scores):.1f}"
+    return merged
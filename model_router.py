@@ -0,0 +1,182 @@
+# In model_router.py
+
+"""
+Picks a model tier for each LLM request instead of hard-coding one model per
+agent. A request is classified by its task, prompt size and whether it must
+return structured output; cheap tiers serve the easy requests, and a request
+is only repeated on the strong tier when its answer fails validation.
+
+Tiers and their models (override with CAREERO_MODEL_LITE / _FAST / _STRONG):
+    lite    gemini-2.5-flash-lite   short extraction chunks, chat follow-ups, summaries
+    fast    gemini-2.5-flash        JSON answers, chat, merging partial answers
+    strong  gemini-2.5-pro          resume evaluation, very long prompts, escalations
+
+Set CAREERO_LOCAL_MODEL (e.g. "llama3.1:8b") to serve the tiers listed in
+CAREERO_LOCAL_TIERS (default "lite") from a local Ollama server at
+OLLAMA_HOST. Set CAREERO_ROUTING to a tier name to send every request to it.
+
+Every routed attempt is logged as a "model_tier" record with its task, tier,
+latency and outcome; run `python model_router.py` for latency and escalation
+rates per tier.
+"""
+
+import os
+
+import instrumentation
+import llm_gateway
+
+TIERS = ("lite", "fast", "strong")
+TIER_MODELS = {
+    "lite": os.environ.get("CAREERO_MODEL_LITE", "gemini-2.5-flash-lite"),
+    "fast": os.environ.get("CAREERO_MODEL_FAST", "gemini-2.5-flash"),
+    "strong": os.environ.get("CAREERO_MODEL_STRONG", "gemini-2.5-pro"),
+}
+ROUTING = os.environ.get("CAREERO_ROUTING", "auto").lower()
+LOCAL_MODEL = os.environ.get("CAREERO_LOCAL_MODEL", "")
+LOCAL_TIERS = {tier.strip() for tier in os.environ.get("CAREERO_LOCAL_TIERS", "lite").split(",")}
+
+# Prompts longer than these (in characters) move up a tier. The lite limit
+# leaves room for a full extraction chunk (agent.CHUNK_TOKENS tokens, about
+# 8,000 characters) plus its question, so page chunks stay on the lite tier.
+LITE_MAX_CHARS = int(os.environ.get("CAREERO_ROUTER_LITE_MAX_CHARS", "10000"))
+FAST_MAX_CHARS = int(os.environ.get("CAREERO_ROUTER_FAST_MAX_CHARS", "120000"))
+
+# Starting tier per task, before prompt size and output structure are considered.
+TASK_TIERS = {
+    "evaluate": "strong",
+    "careers": "fast",
+    "colleges": "fast",
+    "extract": "lite",
+    "reduce": "fast",
+    "chat": "fast",
+    "chat_followup": "lite",
+    "summary": "lite",
+}
+
+
+def classify(task: str, prompt_chars: int = 0, structured: bool = False) -> str:
+    """Returns the tier for a request of `task` with a prompt of `prompt_chars` characters."""
+    if ROUTING in TIERS:
+        return ROUTING
+    tier = TASK_TIERS.get(task, "strong")
+    if tier == "lite" and (structured or prompt_chars > LITE_MAX_CHARS):
+        # The smallest models often break JSON schemas and lose track of long inputs.
+        tier = "fast"
+    if prompt_chars > FAST_MAX_CHARS:
+        tier = "strong"
+    return tier
+
+
+def model_name(tier: str, local: bool = True) -> str:
+    """
+    The model serving `tier`. Local models are named "ollama/<model>"; pass
+    `local=False` for callers that need a Gemini model (e.g. `genai` streams).
+    """
+    if local and LOCAL_MODEL and tier in LOCAL_TIERS:
+        return f"ollama/{LOCAL_MODEL}"
+    return TIER_MODELS[tier]
+
+
+def chat_model(tier: str, temperature: float = None):
+    """Returns the gateway's LangChain chat client for `tier`."""
+    return llm_gateway.get_chat_model(model_name(tier), temperature)
+
+
+# --- ROUTED CALLS ---
+
+def _start(task: str, tier: str, prompt_chars: int):
+    instrumentation.count(f"calls_{tier}")
+    return instrumentation.CallRecord(
+        "model_tier", task=task, tier=tier, model=model_name(tier), prompt_chars=prompt_chars
+    )
+
+
+def _settle(attempt_record, tier: str, result, error, accept) -> bool:
+    """Finishes the attempt's record; returns True if the request should be repeated on the strong tier."""
+    if error is not None and not isinstance(error, ValueError):
+        attempt_record.finish(error)
+        return False
+    if error is not None:
+        # The only place parse failures are counted, whether or not the request escalates.
+        instrumentation.count("parse_failures")
+    accepted = error is None and (accept is None or accept(result))
+    if accepted or tier == "strong":
+        attempt_record.set(outcome="ok" if accepted else "rejected")
+        attempt_record.finish(error)
+        return False
+    attempt_record.set(outcome="escalated")
+    attempt_record.finish()
+    instrumentation.count("escalations")
+    print(f"[{attempt_record.fields['task']}] Escalating from the {tier} tier: "
+          f"{error if error is not None else 'answer rejected'}")
+    return True
+
+
+def run(task: str, attempt, prompt_chars: int = 0, structured: bool = False, accept=None):
+    """
+    Returns `attempt(tier)` for the tier `classify` picks. If the attempt
+    raises ValueError (a schema or parsing failure) or `accept(result)` is
+    False, it is made once more on the strong tier.
+    """
+    tier = classify(task, prompt_chars, structured)
+    while True:
+        attempt_record = _start(task, tier, prompt_chars)
+        result = error = None
+        try:
+            result = attempt(tier)
+        except Exception as e:
+            error = e
+        if not _settle(attempt_record, tier, result, error, accept):
+            if error is not None:
+                raise error
+            return result
+        tier = "strong"
+
+
+async def arun(task: str, attempt, prompt_chars: int = 0, structured: bool = False, accept=None):
+    """Async version of `run` for a coroutine function `attempt`."""
+    tier = classify(task, prompt_chars, structured)
+    while True:
+        attempt_record = _start(task, tier, prompt_chars)
+        result = error = None
+        try:
+            result = await attempt(tier)
+        except Exception as e:
+            error = e
+        if not _settle(attempt_record, tier, result, error, accept):
+            if error is not None:
+                raise error
+            return result
+        tier = "strong"
+
+
+# --- REPORTING ---
+
+def tier_summary(records: list) -> list:
+    """Calls, latency percentiles and escalation rate per tier and task."""
+    groups = {}
+    for record in records:
+        if record.get("tier"):
+            groups.setdefault((record["tier"], record.get("task", record["agent"])), []).append(record)
+    rows = []
+    for (tier, task), items in sorted(groups.items(), key=lambda item: (TIERS.index(item[0][0]), item[0][1])):
+        latencies = [r["latency_ms"] for r in items if "latency_ms" in r]
+        rows.append({
+            "tier": tier,
+            "task": task,
+            "calls": len(items),
+            "p50_ms": instrumentation._percentile(latencies, 0.5),
+            "p95_ms": instrumentation._percentile(latencies, 0.95),
+            "escalation_rate": sum(r.get("outcome") == "escalated" for r in items) / len(items),
+            "error_rate": sum(r.get("status") == "error" for r in items) / len(items),
+        })
+    return rows
+
+
+if __name__ == "__main__":
+    rows = tier_summary(instrumentation.load_records(limit=20000))
+    if not rows:
+        print("No routed calls recorded yet.")
+    for row in rows:
+        print(f"{row['tier']:>6}  {row['task']:<14} calls={row['calls']:<5} p50={row['p50_ms']}ms "
+              f"p95={row['p95_ms']}ms escalated={row['escalation_rate']:.1%} errors={row['error_rate']:.1%}")
@@ -2,12 +2,17 @@ from dotenv import load_dotenv
 load_dotenv()
 import streamlit as st
 from typing import ContextManager
-from langchain_community.document_loaders import PyPDFLoader
-from evaluator_agent import evaluate_resume
-from chat_agent import call_chat_agent
-import plotly.graph_objects as go
+from chat_context import ChatContext
+from resume_ingest import get_resume_text
+from history_store import get_history_store, record_key
+from background_jobs import SessionJobs
+from chat_stream import ChatStreams
+import app_resources
+from instrumentation import debug_enabled, render_debug_panel
+from score_render import SCORE_RENDERER, clean_and_convert_score, prepare_evaluation
+import os
 import re
-import pandas as pd
+import uuid
 
 st.set_page_config(
     page_title="Interview Prep | CareeroAI",
@@ -18,14 +23,8 @@ st.set_page_config(
 
 # --- HELPER FUNCTIONS ---
 
-def stream_gemini_response(stream):
-    for chunk in stream:
-        try:
-            yield chunk.text
-        except Exception:
-            continue
-
 def create_donut_chart(score: float):
+    import plotly.graph_objects as go
     score = max(0, min(10, score))
     fig = go.Figure(data=[go.Pie(
         values=[score, 10 - score],
@@ -41,113 +40,151 @@ def create_donut_chart(score: float):
     )
     return fig
 
-def clean_and_convert_score(score_string: str) -> float:
-    match = re.search(r'(\d+\.?\d*)', str(score_string))
-    if match:
-        try:
-            return float(match.group(1))
-        except (ValueError, IndexError):
-            return 0.0
-    return 0.0
-
-# --- THIS IS THE CORRECTED, MORE ROBUST FUNCTION ---
 def display_evaluation(container: ContextManager) -> None:
+    # Scores, gauges and the improvements table are built once per evaluation;
+    # reruns (e.g. every chat message) only re-emit them.
+    prepared = prepare_evaluation(st.session_state.evaluation)
     with container:
-        evaluation = st.session_state.evaluation
-
-        # Display Scores
         st.header("📊 Evaluation Breakdown")
-        
-        score_metrics = {
-            "global_score": "Global Score",
-            "education_relevance": "Education Relevance",
-            "matching_skills": "Matching Skills",
-            "project_relevance": "Project Relevance",
-            "industry_standard": "Standard vs. Industry"
-        }
-
-        # Display the Global Score
-        if "global_score" in evaluation:
-            raw_global_score = evaluation.get("global_score", "0")
-            numeric_global_score = clean_and_convert_score(raw_global_score)
-            
-            c1, c2, c3 = st.columns([5, 3, 2])
-            with c1: st.markdown(f"## {score_metrics['global_score']}")
-            with c2: st.markdown(f"<b style='text-align: right; font-size: 38px;'>{numeric_global_score:.1f}/10</b>", unsafe_allow_html=True)
-            with c3: st.plotly_chart(create_donut_chart(numeric_global_score), use_container_width=True)
-            st.divider()
-
-        # Display the rest of the scores
-        for key, display_name in score_metrics.items():
-            if key != "global_score" and key in evaluation:
-                # --- THIS IS THE FIX ---
-                # Check if the 'details' for this key is a dictionary before processing
-                details = evaluation.get(key)
-                if isinstance(details, dict):
-                    raw_score = details.get('score', "0")
-                    numeric_score = clean_and_convert_score(raw_score)
-                    
-                    c1, c2, c3 = st.columns([5, 3, 2])
-                    with c1: st.markdown(f"### {display_name}")
-                    with c2: st.markdown(f"<b style='text-align: right; font-size: 30px;'>{numeric_score:.1f}/10</b>", unsafe_allow_html=True)
-                    with c3: st.plotly_chart(create_donut_chart(numeric_score), use_container_width=True)
-
-                    with st.expander("Positive Points"):
-                        for point in details.get("positive", []):
-                            st.write(f"- {point}")
-                    
-                    with st.expander("Negative Points"):
-                        negative_points = details.get("negative", [])
-                        if negative_points:
-                            for point in negative_points:
-                                st.write(f"- {point}")
-                        else:
-                            st.write("No negative points.")
+
+        for section in prepared["sections"]:
+            if "note" in section:
+                st.markdown(f"### {section['name']}")
+                st.info(section["note"])
+                continue
+
+            if SCORE_RENDERER == "plotly":
+                level, size = ("##", 38) if section["key"] == "global_score" else ("###", 30)
+                c1, c2, c3 = st.columns([5, 3, 2])
+                with c1: st.markdown(f"{level} {section['name']}")
+                with c2: st.markdown(f"<b style='text-align: right; font-size: {size}px;'>{section['score']:.1f}/10</b>", unsafe_allow_html=True)
+                with c3: st.plotly_chart(create_donut_chart(section["score"]), use_container_width=True, key=f"donut_{section['key']}")
+            else:
+                st.markdown(section["html"], unsafe_allow_html=True)
+
+            if section["key"] == "global_score":
+                st.divider()
+                continue
+            with st.expander("Positive Points"):
+                for point in section["positive"]:
+                    st.write(f"- {point}")
+            with st.expander("Negative Points"):
+                if section["negative"]:
+                    for point in section["negative"]:
+                        st.write(f"- {point}")
                 else:
-                    # If 'details' is just a string, display it as a general note
-                    st.markdown(f"### {display_name}")
-                    st.info(str(details)) # Using st.info to make it stand out
+                    st.write("No negative points.")
         st.divider()
 
         # Display Areas to Improve Table
         st.header("🔑 Key Areas to Improve")
-        improvements = evaluation.get("areas_to_improve", [])
-        if improvements and isinstance(improvements, list):
-            df_improvements = pd.DataFrame(improvements)
-            if not df_improvements.empty:
-                df_improvements.rename(columns={
-                    'Area': 'Area to Focus On',
-                    'Importance': 'Importance',
-                    'Your Current Level': 'Your Current Level',
-                    'Approx. Time to Prepare': 'Time to Prepare'
-                }, inplace=True, errors='ignore')
-            st.dataframe(df_improvements, use_container_width=True, hide_index=True)
+        if prepared["improvements"] is not None:
+            st.dataframe(prepared["improvements"], use_container_width=True, hide_index=True)
         else:
             st.success("Great job! The AI found no specific areas for immediate improvement.")
 
+def display_instant_scores(container: ContextManager, scores: dict) -> None:
+    """Shows the locally computed scores while the full AI evaluation is running."""
+    with container:
+        st.caption("Instant scores, computed locally. The full evaluation is on its way...")
+        c1, c2 = st.columns(2)
+        c1.metric("Matching Skills", f"{clean_and_convert_score(scores['matching_skills']['score']):.1f}/10")
+        c2.metric("Education Relevance", f"{clean_and_convert_score(scores['education_relevance']['score']):.1f}/10")
+        for point in scores['matching_skills']['positive'] + scores['matching_skills']['negative']:
+            st.write(f"- {point}")
+
 # --- The rest of your code remains the same ---
 
+HISTORY_PAGE_SIZE = 10
+
+# Evaluations start in the background once a resume and job description are
+# both present, after the job description has been left alone for this long.
+SPECULATIVE_EVALUATION = os.environ.get("CAREERO_SPECULATIVE_EVALUATION", "1").lower() not in ("0", "false", "no")
+EVALUATION_DELAY_SECONDS = 1.5
+
+def current_record_key():
+    if "resume_hash" not in st.session_state or st.session_state.job_text == "":
+        return None
+    return record_key(st.session_state.resume_hash, st.session_state.job_text)
+
+def save_history(**fields) -> None:
+    key = current_record_key()
+    if key is not None:
+        get_history_store().save(
+            key, st.session_state.job_text,
+            user_id=st.session_state.resume_hash, session_id=st.session_state.session_id, **fields
+        )
+
 def update_history():
     if st.session_state.job_text != '':
-        job_text = st.session_state.job_text
-        existing_record = next((record for record in st.session_state.jobs_history if record['job_text'] == job_text), None)
-        if existing_record:
-            if "messages" in st.session_state: existing_record["messages"] = st.session_state.messages; del st.session_state.messages
-            if "evaluation" in st.session_state: existing_record["evaluation"] = st.session_state.evaluation; del st.session_state.evaluation
+        save_history(evaluation=st.session_state.get("evaluation"), messages=st.session_state.get("messages"))
+        if "messages" in st.session_state: del st.session_state.messages
+        if "evaluation" in st.session_state: del st.session_state.evaluation
+
+# --- BACKGROUND EVALUATION ---
+
+def evaluation_job(job, resume: str, job_description: str, user_id: str, session_id: str) -> dict:
+    # Runs on a worker thread, so it must not call Streamlit. The evaluator is
+    # imported here rather than through app_resources for the same reason.
+    from evaluator_agent import evaluate_resume_instant
+
+    def on_local_scores(scores):
+        job.progress["local_scores"] = scores
+        job.raise_if_cancelled()  # superseded jobs stop before the LLM call
+
+    evaluation = evaluate_resume_instant(resume, job_description, on_local_scores=on_local_scores)
+    # Stored as soon as it is ready, so a speculative evaluation is not lost if
+    # Evaluate is never clicked; the button (and later visits) load it from here.
+    get_history_store().save(job.key, job_description, user_id=user_id, session_id=session_id, evaluation=evaluation)
+    return evaluation
+
+def start_evaluation(delay: float = 0.0):
+    """Starts the evaluation of the current resume and job description, or returns the one already running."""
+    return st.session_state.jobs.start(
+        "evaluation", current_record_key(), evaluation_job,
+        st.session_state.resume_content, st.session_state.job_text,
+        st.session_state.resume_hash, st.session_state.session_id, delay=delay,
+    )
+
+def speculate_evaluation() -> None:
+    key = current_record_key()
+    if key is None:
+        st.session_state.jobs.cancel("evaluation")
+        return
+    if not SPECULATIVE_EVALUATION or "evaluation" in st.session_state or st.session_state.jobs.get("evaluation", key):
+        return
+    if get_history_store().get_evaluation(key) is None:
+        start_evaluation(delay=EVALUATION_DELAY_SECONDS)
+
+def collect_evaluation(job) -> None:
+    # The job has already saved the evaluation to the history store.
+    try:
+        st.session_state.evaluation = job.result()
+    except Exception as e:
+        st.session_state.evaluation_error = str(e)
+
+@st.fragment(run_every=1.0)
+def show_evaluation_progress():
+    # Polls the background job in a fragment, so the chat tab stays usable meanwhile
+    job = st.session_state.jobs.get("evaluation", st.session_state.evaluation_pending)
+    if job is not None and not job.done():
+        scores = job.progress.get("local_scores")
+        if scores is not None:
+            display_instant_scores(st.container(), scores)
         else:
-            new_record = {'job_text': job_text}
-            if "messages" in st.session_state: new_record["messages"] = st.session_state.messages; del st.session_state.messages
-            if "evaluation" in st.session_state: new_record["evaluation"] = st.session_state.evaluation; del st.session_state.evaluation
-            if len(new_record) > 1: st.session_state.jobs_history.append(new_record)
+            st.caption("Evaluating your resume...")
+        return
+    del st.session_state.evaluation_pending
+    if job is not None:
+        collect_evaluation(job)
+    st.rerun()
 
+@st.fragment
 def run_chat_agent(resume: str, job_description: str):
-    system_prompt = f"""
-    You are a career advisor for a candidate with the resume delimited by <<<>>> and the job description delimited by ((( ))).
-    Resume: <<< {resume} >>>
-    Job description: ((( {job_description} )))
-    Answer the questions giving the given information only. If you don't know the answer, say that you don't know.
-    """
+    # A fragment, so sending a message reruns only the chat and not the evaluation tab
     if "messages" not in st.session_state: st.session_state.messages = []
+    if "chat_context" not in st.session_state: st.session_state.chat_context = ChatContext(summarize=app_resources.chat_agent().summarize_messages)
+    chat_context = st.session_state.chat_context
     message_container = st.container(height=600)
     for message in st.session_state.messages:
         if message.get("role") != "system":
@@ -157,47 +194,135 @@ def run_chat_agent(resume: str, job_description: str):
         st.session_state.messages.append({"role": "user", "content": prompt})
         message_container.chat_message("user").write(prompt)
         messages_to_send = [msg for msg in st.session_state.messages if msg.get("role") != "system"]
-        stream = call_chat_agent(messages_to_send, system_prompt)
-        response = message_container.chat_message("assistant").write_stream(stream_gemini_response(stream))
-        st.session_state.messages.append({"role": "model", "content": response})
+        # Long resumes and job descriptions are cut down to the sections relevant to this question
+        system_prompt = app_resources.chat_agent().advisor_system_prompt(resume, job_description, messages_to_send)
+        messages_to_send, turn_system_prompt, usage = chat_context.build(messages_to_send, system_prompt)
+        # Starting a turn cancels one still streaming from an earlier message
+        turn = st.session_state.chat_streams.start(
+            app_resources.chat_agent().start_chat_turn(messages_to_send, turn_system_prompt)
+        )
+        try:
+            message_container.chat_message("assistant").write_stream(turn.stream())
+        except Exception as e:
+            message_container.error(f"Sorry, the answer could not be completed. Details: {e}")
+        finally:
+            # Also runs when a newer message interrupts this run, so partial answers are kept (marked as such)
+            turn.cancel()
+            st.session_state.messages.append(turn.history_message())
+            save_history(messages=st.session_state.messages)
+        # Fold older turns into the rolling summary off the script thread
+        chat_context.schedule_summary([msg for msg in st.session_state.messages if msg.get("role") != "system"])
+        st.caption(f"~{usage['total_tokens']} tokens sent ({usage['messages_sent']} messages in context)")
+
+def run_job_comparison():
+    st.write("Paste several job descriptions separated by a line containing only `---`. "
+             "They are ranked by similarity to your resume and only the best matches get a full evaluation.")
+    jobs_text = st.text_area("Job Descriptions:", height=250, key="compare_jobs_text")
+    top_k = st.slider("Jobs to evaluate in full", 1, 10, 3)
+    if st.button("Compare", type='primary', use_container_width=True, icon='📚'):
+        job_descriptions = [jd.strip() for jd in re.split(r'^\s*---\s*$', jobs_text, flags=re.MULTILINE) if jd.strip()]
+        if "resume_content" not in st.session_state:
+            st.warning('Please upload a resume first', icon="⚠️")
+        elif not job_descriptions:
+            st.warning('Please provide at least one job description', icon="⚠️")
+        else:
+            with st.spinner(f"Ranking {len(job_descriptions)} jobs and evaluating the top {min(top_k, len(job_descriptions))}..."):
+                try:
+                    st.session_state.job_comparison = (job_descriptions, app_resources.jd_ranker().evaluate_against_jobs(
+                        st.session_state.resume_content, job_descriptions, top_k=top_k,
+                        resume_hash=st.session_state.get("resume_hash"),
+                    ))
+                except Exception as e:
+                    st.error("Sorry, there was an error while comparing jobs.")
+                    st.error(f"Details: {e}")
+
+    if "job_comparison" in st.session_state:
+        job_descriptions, results = st.session_state.job_comparison
+        rows = []
+        for rank, result in enumerate(results, start=1):
+            evaluation = result.get("evaluation") or {}
+            rows.append({
+                "Rank": rank,
+                "Job": evaluation.get("title") or job_descriptions[result["index"]][:80],
+                "Similarity": round(result["similarity"], 3),
+                "Global Score": clean_and_convert_score(evaluation["global_score"]) if "global_score" in evaluation else None,
+            })
+        st.dataframe(rows, use_container_width=True, hide_index=True)
+        for result in results:
+            if "evaluation" in result:
+                evaluation = result["evaluation"]
+                with st.expander(evaluation.get("title", f"Job {result['index'] + 1}")):
+                    if st.button("Open in Evaluation tab", key=f"open_job_{result['index']}"):
+                        update_history()
+                        st.session_state.job_text = job_descriptions[result["index"]]
+                        st.session_state.evaluation = evaluation
+                        save_history(evaluation=evaluation)
+                        st.rerun()
+                    improvements = evaluation.get("areas_to_improve", [])
+                    if improvements and isinstance(improvements, list):
+                        st.dataframe(improvements, use_container_width=True, hide_index=True)
+            elif "error" in result:
+                st.warning(f"Job {result['index'] + 1} could not be evaluated: {result['error']}")
 
-def retrieve_job_history(job_history: str) -> None:
+def retrieve_job_history(key: str) -> None:
     update_history()
-    st.session_state.job_text = job_history.get('job_text')
-    if 'evaluation' in job_history: st.session_state.evaluation = job_history.get('evaluation')
-    if "messages" in job_history:
-        loaded_messages = job_history.get('messages')
-        st.session_state.messages = [msg for msg in loaded_messages if msg.get("role") != "system"]
+    record = get_history_store().get(key)
+    if record is None:
+        return
+    st.session_state.job_text = record['job_text']
+    if record['evaluation']: st.session_state.evaluation = record['evaluation']
+    if record['messages']:
+        st.session_state.messages = [msg for msg in record['messages'] if msg.get("role") != "system"]
 
 if "job_text" not in st.session_state: st.session_state.job_text = ""
-if "jobs_history" not in st.session_state: st.session_state.jobs_history = []
+if "session_id" not in st.session_state: st.session_state.session_id = uuid.uuid4().hex
+if "history_page" not in st.session_state: st.session_state.history_page = 0
+if "jobs" not in st.session_state: st.session_state.jobs = SessionJobs()
+if "chat_streams" not in st.session_state: st.session_state.chat_streams = ChatStreams()
 
 with st.sidebar:
     st.header("History")
-    for i, job_history in enumerate(st.session_state.jobs_history):
-        try:
-            job = job_history['evaluation']['title']
-        except KeyError:
-            job = "New record"
-        if st.button(job, type='tertiary', use_container_width=True, key=f'{job}_{i}'):
-            retrieve_job_history(job_history)
+    records, total = get_history_store().list_records(
+        user_id=st.session_state.get("resume_hash"), session_id=st.session_state.session_id,
+        limit=HISTORY_PAGE_SIZE, offset=st.session_state.history_page * HISTORY_PAGE_SIZE,
+    )
+    for record in records:
+        job = record['title'] or record['job_preview'] or "New record"
+        if st.button(job, type='tertiary', use_container_width=True, key=f"history_{record['key']}"):
+            retrieve_job_history(record['key'])
+    pages = max(1, -(-total // HISTORY_PAGE_SIZE))
+    if st.session_state.history_page > pages - 1:
+        # The list shrank (e.g. a different resume was uploaded); go to its last page
+        st.session_state.history_page = pages - 1
+        st.rerun()
+    if pages > 1:
+        prev_col, page_col, next_col = st.columns([1, 2, 1])
+        if prev_col.button("◀", disabled=st.session_state.history_page == 0, key="history_prev"):
+            st.session_state.history_page -= 1
+            st.rerun()
+        page_col.caption(f"Page {st.session_state.history_page + 1} of {pages}")
+        if next_col.button("▶", disabled=st.session_state.history_page >= pages - 1, key="history_next"):
+            st.session_state.history_page += 1
+            st.rerun()
+    if debug_enabled():
+        render_debug_panel()
 
 left_section, right_section = st.columns(2)
 with left_section:
     st.title("🧐 Interview Prep for College Students")
     resume = st.file_uploader("Upload your resume", type=["pdf"])
     if resume is not None:
-        with open("temp_resume.pdf", "wb") as f: f.write(resume.read())
-        loader = PyPDFLoader("temp_resume.pdf")
-        pages = loader.load()
-        st.session_state.resume_content = "\n".join(page.page_content for page in pages)
+        # Parsed in memory and cached by content hash, so reruns do not re-read the PDF
+        st.session_state.resume_hash, st.session_state.resume_content = get_resume_text(resume.getvalue())
         with st.expander("Show Resume Content"):
             st.write(st.session_state.resume_content)
     job_text = st.text_area("Job Description:", st.session_state.job_text, height=350, on_change=update_history)
     st.session_state.job_text = job_text
+    if "resume_content" in st.session_state:
+        speculate_evaluation()
 
 with right_section:
-    tab1, tab2 = st.tabs(["⭐ Evaluation", "💬 Free Chat"])
+    tab1, tab2, tab3 = st.tabs(["⭐ Evaluation", "💬 Free Chat", "📚 Compare Jobs"])
     with tab1:
         if st.button("Evaluate", type='primary', use_container_width=True, icon='🧐'):
             if "resume_content" not in st.session_state:
@@ -205,16 +330,30 @@ with right_section:
             elif st.session_state.job_text == "":
                 st.warning('Please provide a job description', icon="⚠️")
             else:
-                with st.spinner("Evaluating your resume..."):
-                    try:
-                        st.session_state.evaluation = evaluate_resume(st.session_state.resume_content, st.session_state.job_text)
-                    except Exception as e:
-                        st.error("Sorry, there was an error during evaluation.")
-                        st.error(f"Details: {e}")
+                stored_evaluation = get_history_store().get_evaluation(current_record_key())
+                if stored_evaluation is not None:
+                    # This resume was already scored against this job description
+                    st.session_state.evaluation = stored_evaluation
+                    st.toast("Loaded your previous evaluation for this job.")
+                else:
+                    # Attaches to the evaluation started in the background, if any
+                    job = start_evaluation()
+                    if job.done():
+                        collect_evaluation(job)
+                    else:
+                        st.session_state.evaluation_pending = job.key
+        if "evaluation_pending" in st.session_state:
+            show_evaluation_progress()
+        if "evaluation_error" in st.session_state:
+            st.error("Sorry, there was an error during evaluation.")
+            st.error(f"Details: {st.session_state.pop('evaluation_error')}")
         evaluation_container = st.container(height=600)
         if "evaluation" in st.session_state:
             display_evaluation(evaluation_container)
     with tab2:
         if ("resume_content" in st.session_state) and (st.session_state.job_text != ""):
             run_chat_agent(st.session_state.resume_content, st.session_state.job_text)
+    with tab3:
+        run_job_comparison()
 
+app_resources.preload("evaluator_agent", "chat_agent", "langchain.output_parsers", "langchain_google_genai", "google.generativeai")
@@ -2,8 +2,8 @@
 # In pages/1_Career_Finder.py
 
 import streamlit as st
-import pandas as pd
-from career_agent import get_career_suggestions
+import app_resources
+from instrumentation import debug_enabled, render_debug_panel
 from dotenv import load_dotenv
 
 # Load environment variables
@@ -16,6 +16,35 @@ st.set_page_config(
     layout="wide",
 )
 
+if debug_enabled():
+    with st.sidebar:
+        render_debug_panel()
+
+# --- Helper Functions ---
+
+def display_career_details(career: dict) -> None:
+    st.subheader("💡 Reasoning")
+    st.write(career['reasoning'])
+
+    st.subheader("💰 Average Starting Salary")
+    st.write(career['average_salary'])
+
+    # Display Government Colleges Table
+    st.subheader("🎓 Top Government Colleges")
+    govt_colleges = career['top_colleges'].get('government', [])
+    if govt_colleges:
+        st.dataframe(govt_colleges, use_container_width=True, hide_index=True)
+    else:
+        st.write("No specific government colleges found matching the criteria.")
+
+    # Display Private Colleges Table
+    st.subheader("🎓 Top Private Colleges")
+    private_colleges = career['top_colleges'].get('private', [])
+    if private_colleges:
+        st.dataframe(private_colleges, use_container_width=True, hide_index=True)
+    else:
+        st.write("No specific private colleges found matching the criteria.")
+
 st.title("🧭 Career Path Finder for High Schoolers")
 st.write("For high school students trying to find their way. Fill out the survey below to get started!")
 
@@ -87,14 +116,30 @@ if submitted:
             "cities": ", ".join(cities) if cities else "Any"
         }
         
-        # Show the spinner and call the AI agent
-        with st.spinner("Analyzing your profile and finding the best career paths for you..."):
+        # Stream the careers in and show each one as soon as it is complete
+        stream_area = st.empty()
+        with stream_area.container():
+            status = st.status("Analyzing your profile and finding the best career paths for you...")
+            stream_cols = st.columns(3)
+            # Careers can finish out of order, so keep each one at its own position
+            results = [None] * 3
             try:
-                result = get_career_suggestions(survey_data)
-                st.session_state.career_results = result['careers']
+                for i, career in app_resources.career_agent().stream_career_suggestions(survey_data):
+                    results[i] = career
+                    # Disabled while streaming so a click cannot interrupt the remaining careers
+                    stream_cols[i % 3].button(career['career_name'], use_container_width=True,
+                                              disabled=True, key=f"career_stream_btn_{i}")
+                    with st.expander(career['career_name'], expanded=(i == 0)):
+                        display_career_details(career)
+                    found = sum(career is not None for career in results)
+                    status.update(label=f"Found {found} of 3 career paths...")
+                st.session_state.career_results = [career for career in results if career is not None]
             except Exception as e:
+                status.update(label="Something went wrong.", state="error")
                 st.error("Sorry, something went wrong. Please try again!")
                 st.error(f"Error details: {e}")
+        if "career_results" in st.session_state:
+            stream_area.empty()
 
 # Display results if they exist in the session state
 if "career_results" in st.session_state:
@@ -116,26 +161,6 @@ if "career_results" in st.session_state:
         career = st.session_state.selected_career
         st.header(f"Insights for: {career['career_name']}")
 
-        st.subheader("💡 Reasoning")
-        st.write(career['reasoning'])
+        display_career_details(career)
 
-        st.subheader("💰 Average Starting Salary")
-        st.write(career['average_salary'])
-
-        # Display Government Colleges Table
-        st.subheader("🎓 Top Government Colleges")
-        govt_colleges = career['top_colleges'].get('government', [])
-        if govt_colleges:
-            df_govt = pd.DataFrame(govt_colleges)
-            st.dataframe(df_govt, use_container_width=True, hide_index=True)
-        else:
-            st.write("No specific government colleges found matching the criteria.")
-        
-        # Display Private Colleges Table
-        st.subheader("🎓 Top Private Colleges")
-        private_colleges = career['top_colleges'].get('private', [])
-        if private_colleges:
-            df_private = pd.DataFrame(private_colleges)
-            st.dataframe(df_private, use_container_width=True, hide_index=True)
-        else:
-            st.write("No specific private colleges found matching the criteria.")
+app_resources.preload("career_agent", "langchain_core.output_parsers", "langchain_google_genai")
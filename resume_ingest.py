@@ -0,0 +1,56 @@
+# In resume_ingest.py
+
+import hashlib
+import io
+import threading
+from collections import OrderedDict
+
+import instrumentation
+
+# Upper bound on the extracted text kept in memory, across all sessions.
+MAX_CACHED_CHARS = 5_000_000
+
+_cache = OrderedDict()
+_cached_chars = 0
+_lock = threading.Lock()
+
+
+def content_hash(data: bytes) -> str:
+    return hashlib.sha256(data).hexdigest()
+
+
+def extract_text(data: bytes) -> str:
+    """Extracts the text of a PDF held in memory, one page per line block."""
+    from pypdf import PdfReader
+    reader = PdfReader(io.BytesIO(data))
+    return "\n".join(page.extract_text() or "" for page in reader.pages)
+
+
+def get_resume_text(data: bytes) -> tuple:
+    """
+    Returns `(content_hash, text)` for an uploaded resume.
+
+    Text is cached by the hash of the file's bytes, so Streamlit reruns and
+    repeat uploads of the same file skip PDF parsing entirely. Nothing is
+    written to disk, so concurrent sessions cannot overwrite each other's file.
+    """
+    global _cached_chars
+    key = content_hash(data)
+    with _lock:
+        text = _cache.get(key)
+        if text is not None:
+            _cache.move_to_end(key)
+            return key, text
+
+    with instrumentation.track("pdf_parse", pdf_bytes=len(data)) as record:
+        text = extract_text(data)
+        record.set(text_chars=len(text))
+
+    with _lock:
+        if key not in _cache:
+            _cache[key] = text
+            _cached_chars += len(text)
+        while _cached_chars > MAX_CACHED_CHARS and len(_cache) > 1:
+            _, evicted = _cache.popitem(last=False)
+            _cached_chars -= len(evicted)
+    return key, text
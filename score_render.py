@@ -0,0 +1,129 @@
+# In score_render.py
+
+import html
+import math
+import os
+import re
+import threading
+from collections import OrderedDict
+
+from result_cache import make_cache_key
+
+# "svg" draws the score gauges as inline SVG; "plotly" keeps the donut charts.
+SCORE_RENDERER = os.environ.get("CAREERO_SCORE_RENDERER", "svg")
+MAX_PREPARED = 64
+
+SCORE_METRICS = {
+    "global_score": "Global Score",
+    "education_relevance": "Education Relevance",
+    "matching_skills": "Matching Skills",
+    "project_relevance": "Project Relevance",
+    "industry_standard": "Standard vs. Industry",
+}
+
+IMPROVEMENT_COLUMNS = {
+    'Area': 'Area to Focus On',
+    'Importance': 'Importance',
+    'Your Current Level': 'Your Current Level',
+    'Approx. Time to Prepare': 'Time to Prepare',
+}
+
+_prepared = OrderedDict()
+_lock = threading.Lock()
+
+
+def clean_and_convert_score(score_string) -> float:
+    match = re.search(r'(\d+\.?\d*)', str(score_string))
+    if match:
+        try:
+            return float(match.group(1))
+        except (ValueError, IndexError):
+            return 0.0
+    return 0.0
+
+
+def evaluation_hash(evaluation: dict) -> str:
+    return make_cache_key(evaluation)
+
+
+def gauge_svg(score: float, size: int = 50, color: str = "#009688", track: str = "#ECEFF1") -> str:
+    """A donut gauge for a score out of 10, drawn like the Plotly donut but as a few bytes of SVG."""
+    score = max(0.0, min(10.0, score))
+    stroke = size * 0.2
+    radius = (size - stroke) / 2
+    circumference = 2 * math.pi * radius
+    filled = circumference * score / 10
+    centre = size / 2
+    return (
+        f'<svg width="{size}" height="{size}" viewBox="0 0 {size} {size}" role="img" aria-label="{score:.1f} out of 10">'
+        f'<circle cx="{centre}" cy="{centre}" r="{radius:.2f}" fill="none" stroke="{track}" stroke-width="{stroke:.2f}"/>'
+        f'<circle cx="{centre}" cy="{centre}" r="{radius:.2f}" fill="none" stroke="{color}" stroke-width="{stroke:.2f}"'
+        f' stroke-dasharray="{filled:.2f} {circumference - filled:.2f}" transform="rotate(-90 {centre} {centre})"/>'
+        f'</svg>'
+    )
+
+
+def score_row_html(label: str, score: float, heading: str = "h3", font_size: int = 30) -> str:
+    """Label, score and gauge on one line, as a single HTML block."""
+    return (
+        '<div style="display:flex;align-items:center;gap:1rem;">'
+        f'<{heading} style="flex:5;margin:0;">{html.escape(label)}</{heading}>'
+        f'<b style="flex:3;text-align:right;font-size:{font_size}px;">{score:.1f}/10</b>'
+        f'<div style="flex:2;text-align:center;">{gauge_svg(score)}</div>'
+        '</div>'
+    )
+
+
+def _prepare(evaluation: dict) -> dict:
+    import pandas as pd
+
+    sections = []
+    if "global_score" in evaluation:
+        score = clean_and_convert_score(evaluation.get("global_score", "0"))
+        sections.append({
+            "key": "global_score", "name": SCORE_METRICS["global_score"], "score": score,
+            "html": score_row_html(SCORE_METRICS["global_score"], score, heading="h2", font_size=38),
+        })
+    for key, name in SCORE_METRICS.items():
+        if key == "global_score" or key not in evaluation:
+            continue
+        details = evaluation.get(key)
+        if isinstance(details, dict):
+            score = clean_and_convert_score(details.get("score", "0"))
+            sections.append({
+                "key": key, "name": name, "score": score,
+                "html": score_row_html(name, score),
+                "positive": list(details.get("positive", [])),
+                "negative": list(details.get("negative", [])),
+            })
+        else:
+            # If 'details' is just a string, it is shown as a general note
+            sections.append({"key": key, "name": name, "note": str(details)})
+
+    improvements = evaluation.get("areas_to_improve", [])
+    frame = None
+    if improvements and isinstance(improvements, list):
+        frame = pd.DataFrame(improvements)
+        if not frame.empty:
+            frame = frame.rename(columns=IMPROVEMENT_COLUMNS, errors='ignore')
+    return {"sections": sections, "improvements": frame}
+
+
+def prepare_evaluation(evaluation: dict) -> dict:
+    """
+    Returns everything `display_evaluation` needs (numeric scores, gauge HTML,
+    the improvements table) for `evaluation`, computed once per distinct
+    evaluation so Streamlit reruns only re-emit it.
+    """
+    key = evaluation_hash(evaluation)
+    with _lock:
+        prepared = _prepared.get(key)
+        if prepared is not None:
+            _prepared.move_to_end(key)
+            return prepared
+    prepared = _prepare(evaluation)
+    with _lock:
+        _prepared[key] = prepared
+        while len(_prepared) > MAX_PREPARED:
+            _prepared.popitem(last=False)
+    return prepared
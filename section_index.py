@@ -0,0 +1,190 @@
+# In section_index.py
+
+"""
+Splits resumes and job descriptions into sections (experience, projects,
+skills, education; requirements, responsibilities, ...) and keeps their
+embeddings in a persistent chromadb collection, keyed by a hash of each
+document. A chat turn then only needs the sections relevant to its question
+instead of both documents in full. A document is embedded once and reused
+by every turn and session that sees the same text.
+"""
+
+import hashlib
+import os
+import re
+import threading
+import time
+
+from result_cache import CACHE_DIR
+
+SECTION_INDEX_DIR = os.environ.get("CAREERO_SECTION_INDEX_DIR", os.path.join(CACHE_DIR, "sections"))
+SECTION_MAX_CHARS = 1500
+INDEX_TTL_SECONDS = 30 * 24 * 3600
+PRUNE_EVERY = 50  # documents indexed between pruning passes
+SPLIT_VERSION = 2  # bump when split_sections changes, so indexed documents are split again
+
+RESUME_HEADINGS = {
+    "summary": ("summary", "objective", "profile", "about me", "career objective", "professional summary"),
+    "experience": ("experience", "work experience", "professional experience", "employment", "employment history",
+                   "internships", "internship", "work history"),
+    "projects": ("projects", "academic projects", "personal projects", "key projects"),
+    "skills": ("skills", "technical skills", "key skills", "technologies", "tools", "core competencies"),
+    "education": ("education", "academics", "academic background", "qualifications", "educational qualifications"),
+    "achievements": ("achievements", "awards", "certifications", "certificates", "publications", "activities",
+                     "extracurricular activities", "positions of responsibility", "leadership"),
+}
+JOB_HEADINGS = {
+    "responsibilities": ("responsibilities", "key responsibilities", "what you will do", "what you'll do",
+                         "the role", "role", "duties", "your role"),
+    "requirements": ("requirements", "required", "qualifications", "minimum qualifications", "must have",
+                     "what you will need", "what you'll need", "who you are", "skills", "required skills",
+                     "eligibility"),
+    "preferred": ("nice to have", "preferred", "preferred qualifications", "bonus points", "good to have"),
+    "about": ("about us", "about the company", "company", "who we are", "benefits", "perks", "what we offer"),
+}
+# Text before the first heading: the candidate's name and contact line, or the job title.
+LEADING_SECTION = {"resume": "header", "job": "overview"}
+
+_HEADING_TEXT = re.compile(r"[^a-z' ]")
+_lock = threading.Lock()
+_client = None
+_collection = None
+_documents_added = 0
+
+
+def _heading(line: str, headings: dict) -> tuple:
+    """Returns `(section, rest_of_line)` if `line` starts a section, else None."""
+    stripped = line.strip().lstrip("#*-•> ").rstrip("*")
+    if not stripped or len(stripped) > 200:
+        return None
+    label, colon, rest = stripped.partition(":")
+    if not colon and len(stripped) > 40:
+        return None
+    label = " ".join(_HEADING_TEXT.sub(" ", label.lower()).split())
+    for section, names in headings.items():
+        if label in names:
+            return section, rest.strip()
+    return None
+
+
+def _parts(text: str) -> list:
+    """Splits a long section at line breaks into parts of at most SECTION_MAX_CHARS."""
+    parts, current = [], ""
+    for line in text.splitlines():
+        if current and len(current) + len(line) + 1 > SECTION_MAX_CHARS:
+            parts.append(current)
+            current = ""
+        current = f"{current}\n{line}" if current else line
+    if current:
+        parts.append(current)
+    return parts
+
+
+def split_sections(text: str, kind: str) -> list:
+    """
+    Splits a resume (`kind="resume"`) or job description (`kind="job"`) at
+    recognised heading lines. An inline heading such as "Skills: Python, SQL"
+    only files its own value under that section; the lines after it stay in
+    the enclosing one (e.g. "Tools: Docker" inside a project). Returns `{"section", "text"}` dicts in document order; repeated headings
+    are merged and long sections split into numbered parts.
+    """
+    headings = RESUME_HEADINGS if kind == "resume" else JOB_HEADINGS
+    sections = {}
+    current = LEADING_SECTION[kind]
+    for line in (text or "").splitlines():
+        found = _heading(line, headings)
+        section = current
+        if found is not None:
+            section, line = found
+            if not line:
+                current = section
+        if line.strip():
+            sections.setdefault(section, []).append(line.strip())
+    result = []
+    for section, lines in sections.items():
+        parts = _parts("\n".join(lines))
+        for i, part in enumerate(parts):
+            name = section if len(parts) == 1 else f"{section} ({i + 1})"
+            result.append({"section": name, "text": part})
+    return result
+
+
+def document_hash(text: str) -> str:
+    return hashlib.sha256(f"{SPLIT_VERSION}\n{text or ''}".encode("utf-8")).hexdigest()
+
+
+def _get_collection():
+    global _client, _collection
+    with _lock:
+        if _collection is None:
+            import chromadb  # slow to import, so only loaded when a chat first needs it
+            os.makedirs(SECTION_INDEX_DIR, exist_ok=True)
+            _client = chromadb.PersistentClient(path=SECTION_INDEX_DIR)
+            _collection = _client.get_or_create_collection(name="sections", metadata={"hnsw:space": "cosine"})
+        return _collection
+
+
+def _ensure_indexed(text: str, kind: str) -> str:
+    """Embeds and stores the sections of `text` unless they already are; returns its hash."""
+    global _documents_added
+    doc = document_hash(text)
+    collection = _get_collection()
+    sections = None
+    if not collection.get(where={"doc": doc}, limit=1, include=[])["ids"]:
+        sections = split_sections(text, kind)
+    if sections:
+        from jd_ranker import embed_texts
+        # Deterministic ids, so two processes indexing the same document at once just overwrite each other.
+        collection.upsert(
+            ids=[f"{doc}-{i}" for i in range(len(sections))],
+            embeddings=embed_texts([f"{section['section']}\n{section['text']}" for section in sections]),
+            documents=[section["text"] for section in sections],
+            metadatas=[{"doc": doc, "kind": kind, "section": section["section"], "position": i,
+                        "created_at": time.time()} for i, section in enumerate(sections)],
+        )
+        with _lock:
+            _documents_added += 1
+            due = _documents_added % PRUNE_EVERY == 0
+        if due:
+            prune()
+    return doc
+
+
+def relevant_sections(resume: str, job_description: str, query: str, top_k: int = 4) -> dict:
+    """
+    Returns the `top_k` sections of the resume and job description most
+    similar to `query`, as `{"resume": [...], "job": [...]}` lists of
+    `{"section", "text"}` in document order, plus every section name under
+    "outline" so the model knows what else exists.
+    """
+    from jd_ranker import embed_texts
+
+    docs = {"resume": _ensure_indexed(resume, "resume"), "job": _ensure_indexed(job_description, "job")}
+    collection = _get_collection()
+    result = collection.query(
+        query_embeddings=embed_texts([query]),
+        n_results=top_k,
+        where={"doc": {"$in": list(docs.values())}},
+        include=["documents", "metadatas"],
+    )
+    chosen = {"resume": [], "job": []}
+    for text, metadata in zip(result["documents"][0], result["metadatas"][0]):
+        kind = "resume" if metadata["doc"] == docs["resume"] else "job"
+        chosen[kind].append((metadata["position"], {"section": metadata["section"], "text": text}))
+
+    outline = {}
+    for kind, doc in docs.items():
+        entries = collection.get(where={"doc": doc}, include=["metadatas"])["metadatas"]
+        outline[kind] = [entry["section"] for entry in sorted(entries, key=lambda entry: entry["position"])]
+        chosen[kind] = [section for _, section in sorted(chosen[kind], key=lambda item: item[0])]
+    chosen["outline"] = outline
+    return chosen
+
+
+def prune() -> int:
+    """Deletes sections of documents indexed more than INDEX_TTL_SECONDS ago; returns how many."""
+    collection = _get_collection()
+    expired = collection.get(where={"created_at": {"$lt": time.time() - INDEX_TTL_SECONDS}}, include=[])["ids"]
+    if expired:
+        collection.delete(ids=expired)
+    return len(expired)
@@ -0,0 +1,143 @@
+# In semantic_cache.py
+
+import json
+import os
+import threading
+import time
+import uuid
+
+from result_cache import CACHE_DIR, make_cache_key
+
+SEMANTIC_CACHE_DIR = os.environ.get("CAREERO_SEMANTIC_CACHE_DIR", os.path.join(CACHE_DIR, "semantic"))
+ENABLED = os.environ.get("CAREERO_SEMANTIC_CACHE", "1").lower() not in ("0", "false", "no")
+PRUNE_EVERY = 100  # writes between age/size pruning passes
+
+_client = None
+_client_lock = threading.Lock()
+
+
+def _get_client():
+    global _client
+    with _client_lock:
+        if _client is None:
+            import chromadb  # slow to import, so only loaded when the cache is first used
+            os.makedirs(SEMANTIC_CACHE_DIR, exist_ok=True)
+            _client = chromadb.PersistentClient(path=SEMANTIC_CACHE_DIR)
+        return _client
+
+
+def scope_key(*parts) -> str:
+    """Hash of the values a cached answer must match exactly to be reused."""
+    return make_cache_key(list(parts))
+
+
+class SemanticCache:
+    """
+    Cache of responses looked up by embedding similarity instead of exact key,
+    so near-duplicate requests (a score of 74 vs 75, a question reworded) reuse
+    an earlier answer. Only entries with the same `scope` are considered, so
+    hard constraints (e.g. the same resume and job description) still have to
+    match exactly. Entries expire after `ttl_seconds`; beyond `max_items` the
+    oldest are evicted.
+
+    The threshold and TTL can be overridden per feature with
+    CAREERO_SEMANTIC_THRESHOLD_<FEATURE> and CAREERO_SEMANTIC_TTL_<FEATURE>.
+    """
+
+    def __init__(self, feature: str, threshold: float, ttl_seconds: float, max_items: int = 5000):
+        self.feature = feature
+        prefix = feature.upper()
+        self.threshold = float(os.environ.get(f"CAREERO_SEMANTIC_THRESHOLD_{prefix}", threshold))
+        self.ttl_seconds = float(os.environ.get(f"CAREERO_SEMANTIC_TTL_{prefix}", ttl_seconds))
+        self.max_items = max_items
+        self._lock = threading.Lock()
+        self._collection = None
+        self._writes = 0
+        self.hits = 0
+        self.misses = 0
+
+    def _get_collection(self):
+        with self._lock:
+            if self._collection is None:
+                self._collection = _get_client().get_or_create_collection(
+                    name=f"semantic-{self.feature}", metadata={"hnsw:space": "cosine"}
+                )
+            return self._collection
+
+    def _embed(self, text: str) -> list:
+        from jd_ranker import embed_texts
+        return embed_texts([text])[0]
+
+    def get(self, text: str, scope: str):
+        """Returns `(response, similarity)` for the closest fresh entry above the threshold, or None."""
+        if not ENABLED:
+            return None
+        try:
+            result = self._get_collection().query(
+                query_embeddings=[self._embed(text)],
+                n_results=1,
+                where={"$and": [{"scope": scope}, {"created_at": {"$gte": time.time() - self.ttl_seconds}}]},
+                include=["documents", "distances"],
+            )
+        except Exception as e:
+            # A cache lookup must never break the request it is trying to speed up.
+            print(f"Semantic cache lookup failed ({self.feature}): {e}")
+            return None
+        if result["ids"][0]:
+            similarity = 1.0 - result["distances"][0][0]
+            if similarity >= self.threshold:
+                self.hits += 1
+                return json.loads(result["documents"][0][0]), similarity
+        self.misses += 1
+        return None
+
+    def set(self, text: str, scope: str, response) -> None:
+        if not ENABLED:
+            return
+        try:
+            self._get_collection().add(
+                ids=[uuid.uuid4().hex],
+                embeddings=[self._embed(text)],
+                documents=[json.dumps(response, ensure_ascii=False)],
+                metadatas=[{"scope": scope, "created_at": time.time()}],
+            )
+        except Exception as e:
+            print(f"Semantic cache write failed ({self.feature}): {e}")
+            return
+        with self._lock:
+            self._writes += 1
+            due = self._writes % PRUNE_EVERY == 0
+        if due:
+            try:
+                self.prune()
+            except Exception as e:
+                print(f"Semantic cache pruning failed ({self.feature}): {e}")
+
+    def invalidate(self, scope: str) -> None:
+        """Drops every entry for `scope`, e.g. after the prompt for it changes."""
+        self._get_collection().delete(where={"scope": scope})
+
+    def prune(self) -> int:
+        """Deletes expired entries and the oldest beyond `max_items`; returns how many."""
+        collection = self._get_collection()
+        expired = collection.get(where={"created_at": {"$lt": time.time() - self.ttl_seconds}}, include=[])["ids"]
+        if expired:
+            collection.delete(ids=expired)
+        removed = len(expired)
+        excess = collection.count() - self.max_items
+        if excess > 0:
+            entries = collection.get(include=["metadatas"])
+            oldest = sorted(zip(entries["ids"], entries["metadatas"]), key=lambda entry: entry[1]["created_at"])
+            collection.delete(ids=[entry_id for entry_id, _ in oldest[:excess]])
+            removed += excess
+        return removed
+
+    def clear(self) -> None:
+        collection = self._get_collection()
+        ids = collection.get(include=[])["ids"]
+        if ids:
+            collection.delete(ids=ids)
+
+    def stats(self) -> dict:
+        total = self.hits + self.misses
+        return {"hits": self.hits, "misses": self.misses, "hit_rate": self.hits / total if total else 0.0}
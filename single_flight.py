@@ -0,0 +1,99 @@
+# In single_flight.py
+
+import asyncio
+
+
+class Overloaded(Exception):
+    """Raised when a WorkerPool's queue is full; callers should retry later."""
+
+    def __init__(self, retry_after: float = 1.0):
+        super().__init__("Server is busy, please retry shortly.")
+        self.retry_after = retry_after
+
+
+class SingleFlight:
+    """
+    Coalesces concurrent identical async calls: while a call for `key` is
+    running, later callers with the same key await its result instead of
+    starting their own. Cancelling one caller does not cancel the shared call.
+    """
+
+    def __init__(self):
+        self._calls = {}
+        self.started = 0
+        self.coalesced = 0
+
+    async def do(self, key, fn):
+        """Runs `await fn()` once for all concurrent callers with this key."""
+        task = self._calls.get(key)
+        if task is None:
+            task = asyncio.ensure_future(fn())
+            self._calls[key] = task
+            self.started += 1
+            task.add_done_callback(lambda done: self._forget(key, done))
+        else:
+            self.coalesced += 1
+        return await asyncio.shield(task)
+
+    def _forget(self, key, task) -> None:
+        if self._calls.get(key) is task:
+            del self._calls[key]
+        if not task.cancelled():
+            task.exception()  # marks the error as retrieved if every caller went away
+
+    @property
+    def in_flight(self) -> int:
+        return len(self._calls)
+
+
+class WorkerPool:
+    """
+    Runs blocking agent calls on threads, at most `max_workers` at a time.
+    Up to `max_queue` more callers may wait for a slot; beyond that `acquire`
+    raises `Overloaded` straight away so the server sheds load instead of
+    queueing without bound.
+    """
+
+    def __init__(self, max_workers: int, max_queue: int):
+        self.max_workers = max_workers
+        self.max_queue = max_queue
+        self.active = 0
+        self.waiting = 0
+        self._semaphore = None
+
+    def _get_semaphore(self) -> asyncio.Semaphore:
+        # Created lazily so it binds to the server's event loop.
+        if self._semaphore is None:
+            self._semaphore = asyncio.Semaphore(self.max_workers)
+        return self._semaphore
+
+    async def acquire(self) -> None:
+        semaphore = self._get_semaphore()
+        if self.active >= self.max_workers and self.waiting >= self.max_queue:
+            raise Overloaded(retry_after=max(1.0, self.waiting / self.max_workers))
+        self.waiting += 1
+        try:
+            await semaphore.acquire()
+        finally:
+            self.waiting -= 1
+        self.active += 1
+
+    def release(self) -> None:
+        self.active -= 1
+        self._get_semaphore().release()
+
+    async def run(self, fn, *args, **kwargs):
+        """Runs `fn(*args, **kwargs)` on a thread once a slot is free."""
+        await self.acquire()
+        try:
+            return await asyncio.to_thread(fn, *args, **kwargs)
+        finally:
+            self.release()
+
+    async def run_async(self, fn, *args, **kwargs):
+        """Awaits the coroutine function `fn` once a slot is free."""
+        await self.acquire()
+        try:
+            return await fn(*args, **kwargs)
+        finally:
+            self.release()
@@ -0,0 +1,37 @@
+from agent import NO_MATCH_REPLY, combine_answers, is_no_match, parse_content
+
+
+def test_no_match_reply():
+    assert is_no_match(NO_MATCH_REPLY)
+    assert is_no_match("  ")
+    assert is_no_match(None)
+
+
+def test_numeric_answers_are_kept():
+    for answer in ("123", "₹499", "4.2", "2024"):
+        assert not is_no_match(answer)
+    assert combine_answers([NO_MATCH_REPLY, "₹499", "₹499", "4.2"]) == ["₹499", "4.2"]
+
+
+def test_parse_content_stops_on_numeric_answer(monkeypatch):
+    calls = []
+
+    async def fake_call(task, build, inputs, **options):
+        calls.append(inputs["body_content"])
+        return "₹499" if "price" in inputs["body_content"] else NO_MATCH_REPLY
+
+    monkeypatch.setattr("agent._arouted_call", fake_call)
+    pages = ["price " + "x " * 5000] + ["filler " * 2000] * 5
+    result = parse_content(pages, "What is the price?", stop_on_first_match=True, concurrency=1)
+    assert result == "₹499"
+    assert len(calls) == 1
+
+
+def test_repeated_values_are_kept():
+    answers = ["Plan A\nPrice: ₹499\nPlan B\nPrice: ₹499", "Plan C\nPrice: ₹499"]
+    assert combine_answers(answers) == answers
+
+
+def test_chunk_overlap_lines_are_dropped():
+    answers = ["Plan A\nPrice: ₹499\nPlan B", "Plan B\nPrice: ₹799", "Plan B\nPrice: ₹799"]
+    assert combine_answers(answers) == ["Plan A\nPrice: ₹499\nPlan B", "Price: ₹799"]
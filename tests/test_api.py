@@ -0,0 +1,67 @@
+import asyncio
+import json
+
+import pytest
+
+import api
+import fake_llm
+import instrumentation
+import llm_gateway
+import semantic_cache
+
+BODY = {"resume": "Python developer", "job_description": "Backend engineer",
+        "messages": [{"role": "user", "content": "Am I a good fit?"}]}
+
+
+@pytest.fixture
+def fake_backend(monkeypatch, tmp_path):
+    monkeypatch.setattr(semantic_cache, "SEMANTIC_CACHE_DIR", str(tmp_path))
+    monkeypatch.setattr(semantic_cache, "_client", None)
+    records = []
+    monkeypatch.setattr(instrumentation, "_emit", records.append)
+    llm_gateway.set_backend(fake_llm.FakeBackend())
+    yield records
+    llm_gateway.set_backend(None)
+
+
+async def _call(messages, slow_start=False):
+    """
+    Runs one /chat request through the ASGI app; `messages` are what the client
+    sends after the body. With `slow_start`, sending the response headers
+    stalls, so a disconnect lands before the body is started.
+    """
+    body = json.dumps(BODY).encode()
+    incoming = [{"type": "http.request", "body": body, "more_body": False}] + messages
+    sent = []
+
+    async def receive():
+        if incoming:
+            return incoming.pop(0)
+        await asyncio.sleep(3600)
+
+    async def send(message):
+        sent.append(message)
+        if slow_start and message["type"] == "http.response.start":
+            await asyncio.sleep(1)
+
+    scope = {"type": "http", "asgi": {"version": "3.0", "spec_version": "2.3"}, "http_version": "1.1",
+             "method": "POST", "scheme": "http", "path": "/chat", "raw_path": b"/chat", "query_string": b"",
+             "root_path": "", "headers": [(b"content-type", b"application/json")],
+             "client": ("test", 1), "server": ("test", 80)}
+    await asyncio.wait_for(api.app(scope, receive, send), 30)
+    return sent
+
+
+def test_disconnect_before_body_releases_worker_slot(fake_backend):
+    sent = asyncio.run(_call([{"type": "http.disconnect"}], slow_start=True))
+    assert [m["type"] for m in sent] == ["http.response.start"]
+    assert api.workers.active == 0
+    turn_records = [r for r in fake_backend if r["agent"] == "chat_turn"]
+    assert len(turn_records) == 1 and turn_records[0]["outcome"] == "cancelled"
+
+
+def test_full_stream_releases_worker_slot_once(fake_backend):
+    sent = asyncio.run(_call([]))
+    body = b"".join(m.get("body", b"") for m in sent if m["type"] == "http.response.body").decode()
+    assert "event: done" in body
+    assert api.workers.active == 0
@@ -0,0 +1,66 @@
+import json
+
+from pypdf import PdfWriter
+
+import batch_evaluate
+import evaluator_agent
+
+
+def test_parse_failures_are_written_with_a_status(monkeypatch, tmp_path):
+    resumes = tmp_path / "resumes"
+    resumes.mkdir()
+    writer = PdfWriter()
+    writer.add_blank_page(width=200, height=200)
+    with open(resumes / "good.pdf", "wb") as f:
+        writer.write(f)
+    (resumes / "broken.pdf").write_bytes(b"not a pdf")
+    monkeypatch.setattr(evaluator_agent, "evaluate_resume",
+                        lambda resume, job_description: {"global_score": "7/10"})
+
+    out = tmp_path / "results.jsonl"
+    summary = batch_evaluate.evaluate_directory(str(resumes), "Backend engineer", str(out), parse_processes=1)
+
+    records = {r["file"]: r for r in map(json.loads, out.read_text().splitlines())}
+    assert records["good.pdf"]["status"] == "ok"
+    assert records["broken.pdf"]["status"] == "parse_error" and records["broken.pdf"]["error"]
+    assert summary == {"total": 2, "scored": 1, "skipped": 0, "failed": 1}
+
+    # A rerun skips the scored resume and retries the unreadable one.
+    summary = batch_evaluate.evaluate_directory(str(resumes), "Backend engineer", str(out), parse_processes=1)
+    assert summary == {"total": 2, "scored": 0, "skipped": 1, "failed": 1}
+
+
+def test_csv_output_includes_parse_failures(monkeypatch, tmp_path):
+    resumes = tmp_path / "resumes"
+    resumes.mkdir()
+    (resumes / "broken.pdf").write_bytes(b"not a pdf")
+    out = tmp_path / "results.csv"
+    batch_evaluate.evaluate_directory(str(resumes), "Backend engineer", str(out), parse_processes=1)
+    lines = out.read_text().splitlines()
+    assert lines[0].startswith("file,") and lines[1].startswith("broken.pdf,,")
+    assert ",parse_error," in lines[1]
+
+
+def test_load_scored_skips_a_partial_last_line(tmp_path):
+    out = tmp_path / "results.jsonl"
+    out.write_text(json.dumps({"resume_hash": "r1", "job_hash": "j", "status": "ok"}) + "\n"
+                   + '{"resume_hash": "r2", "job_hash": "j", "sta')
+    assert batch_evaluate.load_scored(str(out), "j") == {"r1"}
+
+
+def test_rerun_after_a_killed_run(monkeypatch, tmp_path):
+    resumes = tmp_path / "resumes"
+    resumes.mkdir()
+    writer = PdfWriter()
+    writer.add_blank_page(width=200, height=200)
+    with open(resumes / "good.pdf", "wb") as f:
+        writer.write(f)
+    monkeypatch.setattr(evaluator_agent, "evaluate_resume",
+                        lambda resume, job_description: {"global_score": "7/10"})
+    out = tmp_path / "results.jsonl"
+    out.write_text('{"file": "other.pdf", "resume_hash": "x", "sta')
+
+    summary = batch_evaluate.evaluate_directory(str(resumes), "Backend engineer", str(out), parse_processes=1)
+    assert summary["scored"] == 1
+    summary = batch_evaluate.evaluate_directory(str(resumes), "Backend engineer", str(out), parse_processes=1)
+    assert summary["skipped"] == 1
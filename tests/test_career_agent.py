@@ -0,0 +1,87 @@
+import pytest
+
+import career_agent
+
+SURVEY = {"subjects": "Physics, Mathematics", "score": "88", "interests": "Robotics", "work_style": "Team",
+          "budget": "₹1-3 Lakhs", "relocate": "Yes", "home_state": "Karnataka", "cities": "Bengaluru"}
+
+
+class FakeCache:
+    def __init__(self):
+        self.stored = []
+
+    def get(self, *args):
+        return None
+
+    def set(self, *args):
+        self.stored.append(args)
+
+
+def _career(name, colleges=career_agent.COLLEGES_PER_LIST):
+    college = {"College Name": name}
+    return {"career_name": name,
+            "top_colleges": {ownership: [college] * colleges for ownership in career_agent.OWNERSHIP_TYPES}}
+
+
+@pytest.fixture
+def caches(monkeypatch):
+    exact, semantic = FakeCache(), FakeCache()
+    monkeypatch.setattr(career_agent, "suggestion_cache", exact)
+    monkeypatch.setattr(career_agent, "semantic_suggestions", semantic)
+    return exact, semantic
+
+
+def _generate(careers, failed=False):
+    def generate(survey_data, record):
+        if failed:
+            record.add("failed_college_lists")
+        yield from enumerate(careers)
+    return generate
+
+
+@pytest.mark.parametrize("careers, failed", [
+    ([_career("A"), _career("B")], False),
+    ([_career("A"), _career("B"), _career("C", colleges=4)], False),
+    ([_career("A"), _career("B"), _career("C")], True),
+])
+def test_partial_suggestions_are_not_cached(monkeypatch, caches, careers, failed):
+    monkeypatch.setattr(career_agent, "_generate_careers", _generate(careers, failed))
+    response = career_agent.get_career_suggestions(SURVEY)
+    assert len(response["careers"]) == len(careers)
+    assert caches[0].stored == [] and caches[1].stored == []
+
+
+def test_complete_suggestions_are_cached(monkeypatch, caches):
+    monkeypatch.setattr(career_agent, "_generate_careers", _generate([_career("A"), _career("B"), _career("C")]))
+    career_agent.get_career_suggestions(SURVEY)
+    list(career_agent.stream_career_suggestions(SURVEY))
+    assert len(caches[0].stored) == 2 and len(caches[1].stored) == 2
+
+
+def test_semantic_cache_is_scoped_by_cities_and_subjects(monkeypatch, tmp_path):
+    import fake_llm
+    import llm_gateway
+    import semantic_cache
+
+    monkeypatch.setattr(semantic_cache, "SEMANTIC_CACHE_DIR", str(tmp_path))
+    monkeypatch.setattr(semantic_cache, "_client", None)
+    llm_gateway.set_backend(fake_llm.FakeBackend())
+    try:
+        cache = semantic_cache.SemanticCache("careers_test", threshold=0.97, ttl_seconds=3600)
+        monkeypatch.setattr(career_agent, "semantic_suggestions", cache)
+        survey = career_agent.canonicalize_survey(SURVEY)
+        career_agent._store_suggestions(survey, "key", {"careers": [_career("A"), _career("B"), _career("C")]},
+                                        career_agent.instrumentation.CallRecord("test"))
+
+        def lookup(**changes):
+            changed = dict(survey, **changes)
+            return cache.get(career_agent._semantic_text(changed), career_agent._semantic_scope(changed))
+
+        assert lookup() is not None
+        # A city or subject change misses however close the embeddings are.
+        for field, value in (("cities", "Pune"), ("subjects", "Biology")):
+            assert career_agent._semantic_scope(dict(survey, **{field: value})) != career_agent._semantic_scope(survey)
+        assert lookup(cities="Pune") is None
+        assert lookup(subjects="Biology, Chemistry") is None
+    finally:
+        llm_gateway.set_backend(None)
@@ -0,0 +1,56 @@
+import asyncio
+import threading
+import time
+from types import SimpleNamespace
+
+import instrumentation
+from chat_stream import ChatTurn
+
+
+async def _chunks(*texts):
+    for text in texts:
+        yield SimpleNamespace(text=text)
+
+
+def test_on_complete_runs_off_the_event_loop(monkeypatch):
+    monkeypatch.setattr(instrumentation, "_emit", lambda record: None)
+    completed = threading.Event()
+    hook_threads = []
+
+    def on_complete(text):
+        hook_threads.append(threading.current_thread())
+        time.sleep(0.3)  # e.g. embedding the question for the semantic cache
+        completed.set()
+
+    async def scenario():
+        turn = ChatTurn(lambda: _chunks("Hello", " there"), instrumentation.CallRecord("chat_turn"),
+                        on_complete=on_complete)
+        started = time.monotonic()
+        text = "".join([part async for part in turn.astream()])
+        elapsed = time.monotonic() - started
+        await asyncio.to_thread(completed.wait, 2)
+        return turn, text, elapsed
+
+    turn, text, elapsed = asyncio.run(scenario())
+    assert text == "Hello there" and turn.status == "complete"
+    assert elapsed < 0.2
+    assert hook_threads and hook_threads[0] is not threading.main_thread()
+
+
+def test_cancelled_turn_skips_on_complete(monkeypatch):
+    monkeypatch.setattr(instrumentation, "_emit", lambda record: None)
+    calls = []
+
+    async def slow():
+        yield SimpleNamespace(text="partial")
+        await asyncio.sleep(10)
+        yield SimpleNamespace(text="never")
+
+    turn = ChatTurn(slow, instrumentation.CallRecord("chat_turn"), on_complete=calls.append)
+    parts = []
+    for part in turn.stream():
+        parts.append(part)
+        break
+    time.sleep(0.1)
+    assert parts == ["partial"] and turn.status == "cancelled" and calls == []
+    assert turn.history_message()["interrupted"]
@@ -0,0 +1,26 @@
+from college_catalogue import get_catalogue
+
+
+def _names(colleges):
+    return [college["College Name"] for college in colleges]
+
+
+def test_medicine_view_is_ordered_by_medical_ranks_first():
+    colleges = get_catalogue().find_colleges("medicine", "private", limit=20)
+    ranks = [college["NIRF Rank"] for college in colleges]
+    medical = [rank for rank in ranks if rank.endswith("(Medical)")]
+    assert ranks[:len(medical)] == medical
+    assert [int(rank.split()[0]) for rank in medical] == sorted(int(rank.split()[0]) for rank in medical)
+    # Overall ranks (SRM 13, KIIT 16) come after every medical rank, not between them.
+    names = _names(colleges)
+    assert names.index("SRM Institute of Science and Technology") > names.index("Bharati Vidyapeeth Medical College")
+    assert names.index("KIIT University") > names.index("Bharati Vidyapeeth Medical College")
+
+
+def test_rank_shown_is_the_views_category():
+    catalogue = get_catalogue()
+    engineering = catalogue.find_colleges("engineering", "government", limit=1)[0]
+    assert engineering["College Name"] == "IIT Madras" and engineering["NIRF Rank"] == "1 (Engineering)"
+    design = {c["College Name"]: c["NIRF Rank"] for c in catalogue.find_colleges("design", "government", limit=50)}
+    assert design["IIT Madras"] == "Unranked"
+    assert design["National Institute of Design Ahmedabad"] == "Unranked"
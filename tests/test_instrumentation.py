@@ -0,0 +1,41 @@
+import pytest
+
+import career_agent
+import instrumentation
+import model_router
+
+
+def test_exhausted_json_failures_are_counted_once_per_attempt(monkeypatch):
+    monkeypatch.setattr(model_router, "ROUTING", "auto")
+    monkeypatch.setattr(career_agent, "_build_chain", lambda *args: None)
+    monkeypatch.setattr(career_agent.llm_gateway, "invoke", lambda chain, inputs: "no json here")
+    records = []
+    monkeypatch.setattr(instrumentation, "_emit", records.append)
+
+    with pytest.raises(Exception, match="No usable JSON"):
+        with instrumentation.track("get_career_suggestions"):
+            career_agent._invoke_json("careers", "{format_instructions}", "", {}, "careers")
+
+    record = next(r for r in records if r["agent"] == "get_career_suggestions")
+    # One failure on the fast tier and one on the strong tier it escalated to.
+    assert record["parse_failures"] == 2
+    assert record["status"] == "error"
+
+
+def test_non_streamed_calls_report_latency_as_ttft(monkeypatch):
+    records = []
+    monkeypatch.setattr(instrumentation, "_emit", records.append)
+
+    with instrumentation.track("get_career_suggestions"):
+        pass
+    with instrumentation.track("chat") as record:
+        record.mark_first_token()
+        record.fields["ttft_ms"] = 1.0  # streamed: keeps its own first-token time
+    with pytest.raises(RuntimeError):
+        with instrumentation.track("evaluate_resume"):
+            raise RuntimeError("boom")
+
+    plain, streamed, failed = records
+    assert plain["ttft_ms"] == plain["latency_ms"]
+    assert streamed["ttft_ms"] == 1.0
+    assert "ttft_ms" not in failed
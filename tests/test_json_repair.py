@@ -0,0 +1,35 @@
+import pytest
+
+from json_repair import repair_json
+
+
+def test_plain_json():
+    assert repair_json('{"a": 1}') == {"a": 1}
+
+
+def test_fences_and_prose():
+    assert repair_json('Here you go:\n```json\n{"a": [1, 2]}\n```\nHope this helps!') == {"a": [1, 2]}
+
+
+def test_trailing_commas_and_comments():
+    text = '{"a": [1, 2,], // the list\n "b": "http://example.com",}'
+    assert repair_json(text) == {"a": [1, 2], "b": "http://example.com"}
+
+
+def test_truncated_output():
+    assert repair_json('{"careers": [{"career_name": "Data Scientist", "reasoning": "Good at ma') == {
+        "careers": [{"career_name": "Data Scientist", "reasoning": "Good at ma"}]
+    }
+
+
+def test_curly_quotes_inside_strings_are_kept():
+    assert repair_json('{"a": "He said “hi” to me", "b": [1,2,],}') == {"a": "He said “hi” to me", "b": [1, 2]}
+
+
+def test_curly_quotes_as_delimiters():
+    assert repair_json('{“a”: “it’s fine”, "b": 2,}') == {"a": "it’s fine", "b": 2}
+
+
+def test_no_json():
+    with pytest.raises(ValueError):
+        repair_json("Sorry, I cannot help with that.")
@@ -0,0 +1,34 @@
+import asyncio
+
+import llm_gateway
+
+
+def test_cancelled_acall_waiters_do_not_keep_slots(monkeypatch):
+    async def no_wait():
+        pass
+
+    monkeypatch.setattr(llm_gateway.limiter, "acquire_async", no_wait)
+
+    async def answer():
+        return "ok"
+
+    async def scenario():
+        held = [llm_gateway._in_flight.acquire(blocking=False) for _ in range(llm_gateway.MAX_IN_FLIGHT)]
+        assert all(held)
+        waiters = [asyncio.ensure_future(llm_gateway.acall(answer)) for _ in range(3)]
+        await asyncio.sleep(0.05)
+        for waiter in waiters:
+            waiter.cancel()
+        await asyncio.gather(*waiters, return_exceptions=True)
+        for _ in held:
+            llm_gateway._in_flight.release()
+        await asyncio.sleep(0.05)
+        # Every slot is free again: as many calls as MAX_IN_FLIGHT can hold one at once.
+        slots = [llm_gateway._in_flight.acquire(blocking=False) for _ in range(llm_gateway.MAX_IN_FLIGHT)]
+        for taken in slots:
+            if taken:
+                llm_gateway._in_flight.release()
+        assert all(slots)
+        assert await llm_gateway.acall(answer) == "ok"
+
+    asyncio.run(scenario())
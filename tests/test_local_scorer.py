@@ -0,0 +1,28 @@
+from local_scorer import _taxonomy, extract_skills
+
+
+def test_llm_skill_is_not_a_masters_degree():
+    text = "B.Tech in CSE; built LLM-powered chatbots"
+    _, levels, _ = _taxonomy()
+    assert set(levels.counts(text)) == {"bachelor"}
+    assert "Large Language Models" in str(extract_skills(text))
+
+
+def test_ll_m_is_a_masters_degree():
+    _, levels, _ = _taxonomy()
+    assert set(levels.counts("LL.M. in Corporate Law")) == {"master"}
+
+
+def test_scrum_master_is_not_a_masters_degree():
+    from local_scorer import score_resume
+    _, levels, _ = _taxonomy()
+    assert levels.counts("Scrum Master. Worked on Python.") == {}
+    result = score_resume("Scrum Master. Worked on Python.", "Requires a Bachelor degree in computer science.")
+    assert "Degree level meets the job's requirement." not in str(result)
+
+
+def test_masters_degree_phrasings():
+    _, levels, _ = _taxonomy()
+    for text in ("Master of Science in Physics", "Master's degree in CS", "Masters in Data Science",
+                 "M.S. in Computer Science", "M.Tech (CSE)", "MBA, 2021"):
+        assert set(levels.counts(text)) == {"master"}, text
@@ -0,0 +1,36 @@
+import pytest
+
+import agent
+import chat_agent
+import model_router
+
+
+@pytest.fixture(autouse=True)
+def auto_routing(monkeypatch):
+    monkeypatch.setattr(model_router, "ROUTING", "auto")
+
+
+def test_full_extraction_chunks_go_to_lite():
+    page = "Plan Basic costs ₹499 per month and includes support. " * 2000
+    chunks = list(agent.iter_chunks(page))
+    query = "What does the Basic plan cost?"
+    assert len(chunks) > 10
+    assert max(map(len, chunks)) > agent.CHUNK_TOKENS * agent.CHARS_PER_TOKEN * 0.9
+    assert {model_router.classify("extract", len(chunk) + len(query)) for chunk in chunks} == {"lite"}
+
+
+def test_classify_moves_up_for_size_and_structure():
+    assert model_router.classify("extract", model_router.LITE_MAX_CHARS + 1) == "fast"
+    assert model_router.classify("summary", 100, structured=True) == "fast"
+    assert model_router.classify("chat", model_router.FAST_MAX_CHARS + 1) == "strong"
+    assert model_router.classify("evaluate", 100) == "strong"
+
+
+def test_chat_followups_are_logged_as_their_own_task():
+    messages = [{"role": "user", "content": "What should I learn for this role?"},
+                {"role": "model", "content": "Kubernetes and Go."},
+                {"role": "user", "content": "And for Java?"}]
+    assert chat_agent._chat_task(messages, "short prompt") == ("chat_followup", "lite")
+    assert chat_agent._chat_task(messages[:1], "short prompt") == ("chat", "fast")
+    # A long system prompt (e.g. full documents) keeps the turn off the lite tier.
+    assert chat_agent._chat_task(messages, "x" * model_router.LITE_MAX_CHARS)[1] == "fast"
@@ -0,0 +1,45 @@
+from section_index import split_sections
+
+RESUME = """Jane Doe
+jane@example.com
+
+Experience
+Software Engineer, Acme
+Technologies: Java, Spring
+Led migration to Kubernetes for 40 services.
+Deployed on GCP with Terraform.
+
+Projects
+Chatbot
+Tools: Python
+Built a retrieval pipeline.
+
+Skills: Python, SQL, Docker
+Education
+B.Tech in CSE
+"""
+
+
+def _by_section(text, kind="resume"):
+    return {section["section"]: section["text"] for section in split_sections(text, kind)}
+
+
+def test_standalone_headings_start_sections():
+    sections = _by_section(RESUME)
+    assert list(sections) == ["header", "experience", "skills", "projects", "education"]
+    assert "jane@example.com" in sections["header"]
+    assert sections["education"] == "B.Tech in CSE"
+
+
+def test_inline_heading_keeps_following_lines_in_enclosing_section():
+    sections = _by_section(RESUME)
+    assert "Led migration to Kubernetes" in sections["experience"]
+    assert "Deployed on GCP" in sections["experience"]
+    assert "Built a retrieval pipeline." in sections["projects"]
+    assert sections["skills"].splitlines() == ["Java, Spring", "Python", "Python, SQL, Docker"]
+
+
+def test_job_headings():
+    sections = _by_section("Backend Engineer\nResponsibilities:\nBuild APIs\nRequirements\n3+ years of Go", "job")
+    assert sections == {"overview": "Backend Engineer", "responsibilities": "Build APIs",
+                        "requirements": "3+ years of Go"}